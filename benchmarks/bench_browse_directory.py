@@ -0,0 +1,68 @@
+"""
+Benchmark of the opening of a huge directory in the volume browser.
+
+Builds a volume tree holding a directory of --entries files, then times
+the browser screen showing that directory, the first time and once it
+was opened before, in a headless Textual app.
+
+Usage:
+    python benchmarks/bench_browse_directory.py --entries 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+from textual.app import App
+
+from docker_volume_analyzer.filesystem import FileSystem
+from docker_volume_analyzer.tui import VolumeBrowserScreen
+
+
+def volume_tree(entries: int) -> FileSystem:
+    fs = FileSystem()
+    fs.add_entries(
+        (f"spool/f{i}.log", i, 1700000000, "-rw-r--r--", "app", "app", False)
+        for i in range(entries)
+    )
+    return fs.compute_directory_sizes()
+
+
+class Manager:
+    """Volume manager serving an already built tree."""
+
+    def __init__(self, fs: FileSystem):
+        self.fs = fs
+
+    def get_volume_tree(self, volume_name: str, progress=None) -> FileSystem:
+        return self.fs
+
+
+async def measure(entries: int):
+    screen = VolumeBrowserScreen(Manager(volume_tree(entries)), "volume")
+    async with App().run_test() as pilot:
+        await pilot.app.push_screen(screen)
+        await pilot.app.workers.wait_for_complete()
+        await pilot.pause()
+        for label in ("first open", "re-entry"):
+            screen.current_path = "spool"
+            start = time.perf_counter()
+            screen.load_data()
+            await pilot.pause()
+            elapsed = time.perf_counter() - start
+            print(f"{label:>10}: {entries:,} entries in {elapsed:.2f}s")
+            screen.current_path = ""
+            screen.load_data()
+            await pilot.pause()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=200_000)
+    args = parser.parse_args()
+
+    asyncio.run(measure(args.entries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of the memory used by a parsed volume tree.
+
+Feeds synthetic 'find' output lines for a tree of --entries entries to a
+FileSystemBuilder, the way a real scan does, and reports the memory held by
+the resulting file system (nodes and index) as measured by tracemalloc,
+for each tree engine (or only the one given with --engine).
+
+Usage:
+    python benchmarks/bench_filenode_memory.py --entries 1000000
+    python benchmarks/bench_filenode_memory.py --engine columnar
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.filesystem import FileSystemBuilder
+
+USERS = ("root", "www-data", "postgres", "1000")
+MODES = ("-rw-r--r--", "-rw-------", "-rwxr-xr-x")
+
+
+def find_lines(entries: int, files_per_directory: int = 50):
+    """Yields 'find' records for `entries` entries (directories included)."""
+    directories = 0
+    emitted = 0
+    while emitted < entries:
+        directory = f"/mnt/docker_volume/d{directories // 100}/d{directories}"
+        if directories % 100 == 0:
+            yield (
+                f"directory|/mnt/docker_volume/d{directories // 100}|4096"
+                f"|drwxr-xr-x|root|root|1700000000"
+            )
+            emitted += 1
+        yield f"directory|{directory}|4096|drwxr-xr-x|root|root|1700000000"
+        emitted += 1
+        for i in range(min(files_per_directory, entries - emitted)):
+            user = USERS[i % len(USERS)]
+            yield (
+                f"file|{directory}/file{i}.dat|{i * 37}|{MODES[i % 3]}"
+                f"|{user}|{user}|{1700000000 + i}"
+            )
+            emitted += 1
+        directories += 1
+
+
+def measure(entries: int, engine: str):
+    fs_factory = DockerClient.TREE_ENGINES[engine]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    builder = FileSystemBuilder(fs_factory=fs_factory)
+    fs = builder.feed(find_lines(entries)).build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = len(fs.index)
+    print(
+        f"{engine:>8}: {nodes} nodes, {current / 2**20:,.1f} MiB "
+        f"({current / nodes:,.0f} bytes/node), built in {elapsed:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--engine", choices=list(DockerClient.TREE_ENGINES))
+    args = parser.parse_args()
+
+    for engine in [args.engine] if args.engine else DockerClient.TREE_ENGINES:
+        measure(args.entries, engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark of the 'find' + 'stat' scanner modes.
+
+Builds a synthetic tree in a temporary directory and runs the command
+generated by DockerClient.build_find_command for each scan mode, reporting
+the number of entries scanned per second.
+
+By default the commands run on the local host, which is a close proxy of
+the Alpine helper (both 'find' and 'stat' accept the same arguments).
+Use --volume to run them through the helper container against an existing
+Docker volume instead.
+
+Usage:
+    python benchmarks/bench_find_scan.py --files 20000
+    python benchmarks/bench_find_scan.py --volume my_volume
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from docker_volume_analyzer.docker_client import DockerClient
+
+
+def build_tree(root: str, files: int, files_per_directory: int = 100):
+    """Creates `files` empty files spread over sub directories."""
+    for i in range(files):
+        directory = os.path.join(root, f"dir{i // files_per_directory}")
+        if i % files_per_directory == 0:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.txt"), "w") as f:
+            f.write("x" * (i % 512))
+
+
+def run_local(path: str, scan_mode: str) -> int:
+    command = DockerClient.build_find_command(path, scan_mode)
+    output = subprocess.run(
+        ["sh", "-c", command], capture_output=True, check=True
+    ).stdout
+    return output.count(b"\n")
+
+
+def run_docker(client: DockerClient, volume_name: str, scan_mode: str) -> int:
+    client.scan_mode = scan_mode
+    output = client.get_directory_informations_with_find(volume_name)
+    return output.count("\n") + 1 if output else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--volume", help="Scan this Docker volume instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        if args.volume:
+            client = DockerClient()
+
+            def scan(mode):
+                return run_docker(client, args.volume, mode)
+
+        else:
+            build_tree(root, args.files)
+
+            def scan(mode):
+                return run_local(root, mode)
+
+        for scan_mode in reversed(DockerClient.SCAN_MODES):
+            start = time.perf_counter()
+            entries = scan(scan_mode)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{scan_mode:>9}: {entries} entries in {elapsed:.2f}s "
+                f"({entries / elapsed:,.0f} entries/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
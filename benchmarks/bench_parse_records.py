@@ -0,0 +1,123 @@
+"""
+Benchmark of the 'find' output parsers.
+
+Generates the same synthetic 1M-entry listing in both helper output
+formats, '|' separated lines and NUL-delimited record batches, and times
+building a FileSystem from 64 KiB chunks of each, the way the output of
+the helper container is streamed.
+
+Usage:
+    python benchmarks/bench_parse_records.py --entries 1000000
+    python benchmarks/bench_parse_records.py --workers 4
+"""
+
+import argparse
+import gc
+import time
+
+from docker_volume_analyzer.docker_client import iter_lines
+from docker_volume_analyzer.filesystem import FileSystemBuilder
+
+PREFIX = "/mnt/docker_volume"
+CHUNK_SIZE = 64 * 1024
+
+
+def entries(count: int, files_per_directory: int = 50):
+    """Yields (type, path, size, mode, user, group, mtime) tuples."""
+    directory = None
+    for i in range(count):
+        if i % (files_per_directory + 1) == 0:
+            directory = f"{PREFIX}/d{i // 5000}/d{i}"
+            yield ("directory", directory, 4096, "drwxr-xr-x", "root")
+        else:
+            yield (
+                "regular file",
+                f"{directory}/f{i}.dat",
+                i,
+                "-rw-r--r--",
+                "app",
+            )
+
+
+def lines_output(count: int) -> bytes:
+    return "".join(
+        f"{type_str}|{path}|{size}|{mode}|{user}|{user}|1700000000\n"
+        for type_str, path, size, mode, user in entries(count)
+    ).encode()
+
+
+def records_output(count: int, batch_size: int = 1000) -> bytes:
+    batches = []
+    batch = []
+    for entry in entries(count):
+        batch.append(entry)
+        if len(batch) == batch_size:
+            batches.append(_batch(batch))
+            batch = []
+    if batch:
+        batches.append(_batch(batch))
+    return b"".join(batches)
+
+
+def _batch(batch) -> bytes:
+    fields = [str(len(batch))]
+    fields.extend(path for _, path, *_ in batch)
+    for type_str, _, size, mode, user in batch:
+        fields.extend((type_str, str(size), mode, user, user, "1700000000"))
+    return "".join(f"{field}\0" for field in fields).encode() + b"\0"
+
+
+def chunks(data: bytes):
+    view = memoryview(data)
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield bytes(view[start : start + CHUNK_SIZE])
+
+
+def measure(name: str, data: bytes, parse, **options):
+    gc.collect()
+    start = time.perf_counter()
+    fs = parse(FileSystemBuilder(PREFIX, **options), chunks(data)).build()
+    elapsed = time.perf_counter() - start
+    count = len(fs.index) - 1
+    print(
+        f"{name:>7}: {count:,} entries in {elapsed:.2f}s "
+        f"({count / elapsed:,.0f} entries/s, {fs.malformed} malformed)"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="also parse NUL records in parallel with this many processes",
+    )
+    args = parser.parse_args()
+
+    lines = measure(
+        "lines",
+        lines_output(args.entries),
+        lambda builder, data: builder.feed(iter_lines(data)),
+    )
+    records = measure(
+        "nul",
+        records_output(args.entries),
+        lambda builder, data: builder.feed_records(data),
+    )
+    print(f"speed-up: x{lines / records:.1f}")
+    if args.workers:
+        parallel = measure(
+            f"nul x{args.workers}",
+            records_output(args.entries),
+            lambda builder, data: builder.feed_records(data),
+            parallel_threshold=FileSystemBuilder.PIECE_SIZE,
+            workers=args.workers,
+        )
+        print(f"speed-up: x{lines / parallel:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of the volume reports.
+
+Builds a tree of --entries files of various extensions, owners and ages,
+then times the report by extension, owner, group and age computed by
+build_report, against a loop updating the four groupings file by file.
+
+Usage:
+    python benchmarks/bench_reports.py --entries 1000000 3000000
+    python benchmarks/bench_reports.py --engine columnar
+"""
+
+import argparse
+import gc
+import time
+from bisect import bisect_right
+
+from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.reports import AGE_BUCKETS, build_report
+
+NOW = 1_700_000_000
+EXTENSIONS = (".js", ".log", ".json", ".tar.gz", ".PNG", "", ".py", ".md")
+USERS = ("root", "node", "www-data", "1000")
+
+
+def entries_of(count: int, files_per_directory: int = 100):
+    for i in range(count):
+        directory = f"d{i // files_per_directory}"
+        if i % files_per_directory == 0:
+            yield (directory, 0, NOW, "drwxr-xr-x", "root", "root", True)
+        yield (
+            f"{directory}/file{i}{EXTENSIONS[i % len(EXTENSIONS)]}",
+            i % 65536,
+            NOW - (i % 500) * 86400,
+            "-rw-r--r--",
+            USERS[i % len(USERS)],
+            USERS[i % 3],
+            False,
+        )
+
+
+def naive_report(fs) -> dict:
+    """Groups the files one node at a time, as a plain loop would."""
+    thresholds = [NOW - days * 86400 for days in reversed(AGE_BUCKETS)]
+    totals = ({}, {}, {}, {})
+    for node in list(fs.index.values()):
+        if node.is_directory:
+            continue
+        dot = node.name.rfind(".", 1)
+        keys = (
+            node.name[dot:].lower() if dot > 0 else "",
+            node.user,
+            node.group,
+            bisect_right(thresholds, node.mtime_epoch),
+        )
+        for grouping, key in zip(totals, keys):
+            files, size = grouping.get(key, (0, 0))
+            grouping[key] = (files + 1, size + node.size)
+    return totals
+
+
+def measure(count: int, engine: str):
+    fs = DockerClient.TREE_ENGINES[engine]()
+    fs.add_entries(entries_of(count))
+    fs.compute_directory_sizes()
+    gc.collect()
+
+    start = time.perf_counter()
+    naive_report(fs)
+    naive = time.perf_counter() - start
+    report = build_report(fs, now=NOW)
+    elapsed = report.timings["report"]
+    print(
+        f"{engine:>8} {count:>9,} files: "
+        f"report {elapsed:5.2f}s ({count / elapsed:,.0f}/s), "
+        f"file by file {naive:5.2f}s ({count / naive:,.0f}/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--entries", type=int, nargs="+", default=[1_000_000, 3_000_000]
+    )
+    parser.add_argument("--engine", choices=list(DockerClient.TREE_ENGINES))
+    args = parser.parse_args()
+
+    for engine in [args.engine] if args.engine else DockerClient.TREE_ENGINES:
+        for entries in args.entries:
+            measure(entries, engine)
+
+
+if __name__ == "__main__":
+    main()
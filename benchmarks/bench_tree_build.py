@@ -0,0 +1,84 @@
+"""
+Benchmark of the volume tree building throughput.
+
+Feeds synthetic 'find' output of a deep, node_modules-like tree to a
+FileSystemBuilder and times the tree building and the directory sizes
+computation separately, for each number of entries given with --entries.
+
+Usage:
+    python benchmarks/bench_tree_build.py --entries 100000 1000000 5000000
+    python benchmarks/bench_tree_build.py --engine columnar
+"""
+
+import argparse
+import gc
+import time
+
+from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.filesystem import FileSystemBuilder
+
+PREFIX = "/mnt/docker_volume"
+
+
+def find_lines(entries: int, depth: int = 8, files_per_package: int = 8):
+    """
+    Yields 'find' records, in 'find' order, for `entries` entries of nested
+    packages (node_modules/pkg/node_modules/pkg/...), each package holding
+    a lib directory with a few files.
+    """
+    emitted = 0
+    package = 0
+    while True:
+        path = PREFIX
+        for level in range(depth):
+            path = f"{path}/node_modules/pkg{package}-{level}"
+            directories = [path, f"{path}/lib"]
+            if level or not package:
+                directories.insert(0, path.rsplit("/", 1)[0])
+            for directory in directories:
+                yield f"directory|{directory}|4096|drwxr-xr-x|node|node|1"
+            emitted += len(directories)
+            for i in range(files_per_package):
+                yield (
+                    f"file|{path}/lib/file{i}.js|{i * 100}"
+                    f"|-rw-r--r--|node|node|1700000000"
+                )
+                emitted += 1
+            if emitted >= entries:
+                return
+        package += 1
+
+
+def measure(entries: int, engine: str):
+    fs_factory = DockerClient.TREE_ENGINES[engine]
+    gc.collect()
+    start = time.perf_counter()
+    builder = FileSystemBuilder(PREFIX, fs_factory=fs_factory)
+    fs = builder.feed(find_lines(entries)).build()
+    built = time.perf_counter()
+    fs.compute_directory_sizes()
+    computed = time.perf_counter()
+
+    print(
+        f"{engine:>8} {entries:>9,} entries: "
+        f"build {built - start:6.2f}s ({entries / (built - start):,.0f}/s), "
+        f"sizes {computed - built:5.2f}s "
+        f"({entries / (computed - built):,.0f}/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--entries", type=int, nargs="+", default=[100_000, 1_000_000]
+    )
+    parser.add_argument("--engine", choices=list(DockerClient.TREE_ENGINES))
+    args = parser.parse_args()
+
+    for engine in [args.engine] if args.engine else DockerClient.TREE_ENGINES:
+        for entries in args.entries:
+            measure(entries, engine)
+
+
+if __name__ == "__main__":
+    main()
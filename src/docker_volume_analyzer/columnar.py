@@ -0,0 +1,619 @@
+import heapq
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import compress
+from operator import add, gt
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+from docker_volume_analyzer.filesystem import (
+    FileNode,
+    FileSystem,
+    _paused_gc,
+)
+from docker_volume_analyzer.query import NameIndex, NameQuery
+
+
+class _StringTable:
+    """
+    Interns highly repetitive strings (modes, users, groups) as codes.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+
+class ColumnarFileSystem:
+    """
+    File system structure storing its entries in parallel typed arrays.
+
+    Each entry is identified by its position in the arrays, the root being
+    entry 0. Entries hold the id of their parent, first and last child and
+    next sibling, their size and modification time, codes of their mode,
+    user and group strings, and the offset of their name in a single UTF-8
+    buffer. Paths are never stored: they are resolved by walking the tree,
+    a per directory name lookup map being built on first use.
+
+    The `index` and `childrens` mappings and the nodes they return are thin
+    views over the arrays, behaving like FileSystem and FileNode so that
+    existing callers work with either engine, as do the sorted children
+    views, the largest nodes index, searches and file columns.
+
+    Entries are expected once each, parents before their children, as in
+    'find' output. Missing parent directories are created, and entries of
+    a directory which has been looked up are only added once.
+
+    Attributes:
+        root (ColumnarNode): The root node of the file system.
+        index (ColumnarIndex): A mapping of relative paths to their node.
+        malformed (int): Number of scan records which could not be parsed.
+    """
+
+    def __init__(self):
+        self.parents = array("q")
+        self.first_child = array("q")
+        self.last_child = array("q")
+        self.next_sibling = array("q")
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.mode_codes = array("I")
+        self.user_codes = array("I")
+        self.group_codes = array("I")
+        self.name_offsets = array("Q")
+        self.name_lengths = array("I")
+        self.is_directory = bytearray()
+        self.alive = bytearray()
+        self.names = bytearray()
+        self.modes = _StringTable()
+        self.users = _StringTable()
+        self.groups = _StringTable()
+        self.malformed = 0
+        self._child_maps: Dict[int, Dict[str, int]] = {}
+        self._open_directories = [("", 0)]
+        self._sorted_children: Dict[int, Dict[tuple, List[int]]] = {}
+        self._largest = None
+        self._names = None
+        self._append(-1, "", 0, int(time.time()), "", "", "", True)
+        self.root = ColumnarNode(self, 0)
+        self.index = ColumnarIndex(self)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def _append(
+        self,
+        parent: int,
+        name: str,
+        size: int,
+        mtime: int,
+        mode: str,
+        user: str,
+        group: str,
+        is_directory: bool,
+    ) -> int:
+        entry = len(self.parents)
+        encoded = name.encode("utf-8", "surrogateescape")
+        self.parents.append(parent)
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.mode_codes.append(self.modes.code(mode))
+        self.user_codes.append(self.users.code(user))
+        self.group_codes.append(self.groups.code(group))
+        self.name_offsets.append(len(self.names))
+        self.name_lengths.append(len(encoded))
+        self.is_directory.append(is_directory)
+        self.alive.append(True)
+        self.names += encoded
+        if parent >= 0:
+            if self.last_child[parent] < 0:
+                self.first_child[parent] = entry
+            else:
+                self.next_sibling[self.last_child[parent]] = entry
+            self.last_child[parent] = entry
+            child_map = self._child_maps.get(parent)
+            if child_map is not None:
+                child_map[name] = entry
+        return entry
+
+    def name_of(self, entry: int) -> str:
+        offset = self.name_offsets[entry]
+        return self.names[offset : offset + self.name_lengths[entry]].decode(
+            "utf-8", "surrogateescape"
+        )
+
+    def path_of(self, entry: int) -> str:
+        names = []
+        while entry > 0:
+            names.append(self.name_of(entry))
+            entry = self.parents[entry]
+        return "/".join(reversed(names))
+
+    def children_of(self, entry: int) -> Iterator[int]:
+        child = self.first_child[entry]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def _child_map(self, entry: int) -> Dict[str, int]:
+        child_map = self._child_maps.get(entry)
+        if child_map is None:
+            child_map = self._child_maps[entry] = {
+                self.name_of(child): child for child in self.children_of(entry)
+            }
+        return child_map
+
+    def lookup(self, path: str) -> Optional[int]:
+        """
+        Returns the id of the entry at a path, or None if it does not exist.
+
+        Args:
+            path (str): The path relative to the root.
+        """
+        entry = 0
+        for part in path.strip("/").split("/"):
+            if not part:
+                continue
+            if not self.is_directory[entry]:
+                return None
+            entry = self._child_map(entry).get(part)
+            if entry is None:
+                return None
+        return entry
+
+    def _parent_directory(
+        self, path: str, mtime: int, mode: str, user: str, group: str
+    ) -> int:
+        """
+        Returns the id of the parent directory of a path, creating missing
+        directories with the given attributes. The chain of directories
+        opened last is kept so that entries listed in 'find' order are
+        placed without any lookup.
+        """
+        parent_path = path.rpartition("/")[0]
+        stack = self._open_directories
+        while stack[-1][0] != parent_path and not parent_path.startswith(
+            f"{stack[-1][0]}/" if stack[-1][0] else ""
+        ):
+            stack.pop()
+        while stack[-1][0] != parent_path:
+            directory, entry = stack[-1]
+            remaining = parent_path[len(directory) :].lstrip("/")
+            part = remaining.split("/", 1)[0]
+            child = self._child_map(entry).get(part)
+            if child is None:
+                child = self._append(
+                    entry, part, 0, mtime, mode, user, group, True
+                )
+            stack.append((f"{directory}/{part}".lstrip("/"), child))
+        return stack[-1][1]
+
+    def add_node(self, node: FileNode) -> None:
+        """
+        Adds an entry, creating its missing parent directories.
+
+        Args:
+            node (FileNode): The entry to add. Only its attributes are
+            copied.
+        """
+        self.add_entry(
+            node.path,
+            node.size,
+            node.mtime_epoch,
+            node.mode,
+            node.user,
+            node.group,
+            node.is_directory,
+        )
+
+    def add_entry(
+        self,
+        path: str,
+        size: int,
+        mtime: int,
+        mode: str,
+        user: str,
+        group: str,
+        is_directory: bool,
+    ) -> None:
+        """
+        Adds an entry from its attributes, as add_node does.
+
+        Args:
+            path (str): The path relative to the root.
+            size (int): The size in bytes.
+            mtime (int): The last modified time as a Unix timestamp.
+            mode (str): The file mode (permissions) as a string.
+            user (str): The owner.
+            group (str): The group owner.
+            is_directory (bool): True if the entry is a directory.
+        """
+        path = path.strip("/")
+        if not path:
+            return
+        self._forget_views()
+        parent = self._parent_directory(path, mtime, mode, user, group)
+        name = path.rpartition("/")[2]
+        child_map = self._child_maps.get(parent)
+        if child_map is not None and name in child_map:
+            return
+        entry = self._append(
+            parent, name, size, mtime, mode, user, group, is_directory
+        )
+        if is_directory:
+            self._open_directories.append((path, entry))
+
+    def add_entries(self, entries: Iterable[tuple]) -> None:
+        """
+        Adds entries from their attributes, as add_entry does.
+
+        Args:
+            entries (Iterable[tuple]): (path, size, mtime, mode, user,
+            group, is_directory) tuples.
+        """
+        add_entry = self.add_entry
+        for entry in entries:
+            add_entry(*entry)
+
+    def delete_node(self, path: str) -> "ColumnarFileSystem":
+        """
+        Deletes a node and its children from the file system and updates
+        the sizes of parent directories.
+
+        Args:
+            path (str): The path of the node to delete.
+
+        Returns:
+            ColumnarFileSystem: The updated file system after deletion.
+        """
+        entry = self.lookup(path)
+        if entry is None or not path.strip("/"):
+            raise ValueError(
+                f"Path '{path}' does not exist in the file system."
+            )
+
+        parent = self.parents[entry]
+        previous = -1
+        for child in self.children_of(parent):
+            if child == entry:
+                break
+            previous = child
+        if previous < 0:
+            self.first_child[parent] = self.next_sibling[entry]
+        else:
+            self.next_sibling[previous] = self.next_sibling[entry]
+        if self.last_child[parent] == entry:
+            self.last_child[parent] = previous
+        self._child_map(parent).pop(self.name_of(entry))
+
+        stack = [entry]
+        while stack:
+            current = stack.pop()
+            self.alive[current] = False
+            self._child_maps.pop(current, None)
+            self._sorted_children.pop(current, None)
+            stack.extend(self.children_of(current))
+        self._open_directories = [("", 0)]
+        self._largest = None
+        self._names = None
+
+        size_change = self.sizes[entry]
+        while parent >= 0:
+            self.sizes[parent] -= size_change
+            self._sorted_children.pop(parent, None)
+            parent = self.parents[parent]
+
+        return self
+
+    def compute_directory_sizes(self) -> "ColumnarFileSystem":
+        """
+        Compute the total size of each directory by summing the sizes
+        of its files, subdirectories, and the directory's own size.
+
+        Parents always precede their children in the arrays, so a single
+        pass in reverse order accumulates every entry into its parent.
+        """
+        sizes, parents, alive = self.sizes, self.parents, self.alive
+        for entry in range(len(parents) - 1, 0, -1):
+            if alive[entry]:
+                sizes[parents[entry]] += sizes[entry]
+        self._forget_views()
+        return self
+
+    def sorted_children(
+        self, path: str, key: str = "name", reverse: bool = False
+    ) -> List["ColumnarNode"]:
+        """
+        Returns the children of a directory sorted by name, size or
+        modification time, as FileSystem.sorted_children does.
+        """
+        sort_keys = {
+            "name": self.name_of,
+            "size": self.sizes.__getitem__,
+            "mtime": self.mtimes.__getitem__,
+        }
+        if key not in sort_keys:
+            raise ValueError(f"Unknown sort key '{key}'.")
+        entry = self.lookup(path)
+        if entry is None:
+            return []
+        views = self._sorted_children.setdefault(entry, {})
+        view = views.get((key, reverse))
+        if view is None:
+            view = views[(key, reverse)] = sorted(
+                self.children_of(entry), key=sort_keys[key], reverse=reverse
+            )
+        return [ColumnarNode(self, child) for child in view]
+
+    def largest(
+        self, count: int = 50, directories: bool = False
+    ) -> List["ColumnarNode"]:
+        """
+        Returns the largest files, or directories, largest first, as
+        FileSystem.largest does.
+        """
+        if count > FileSystem.LARGEST_INDEX_SIZE:
+            entries = self._largest_entries(count, directories)
+        else:
+            if self._largest is None:
+                self._largest = (
+                    self._largest_entries(FileSystem.LARGEST_INDEX_SIZE, 0),
+                    self._largest_entries(FileSystem.LARGEST_INDEX_SIZE, 1),
+                )
+            entries = self._largest[directories][:count]
+        return [ColumnarNode(self, entry) for entry in entries]
+
+    def _largest_entries(self, count: int, directories: int) -> List[int]:
+        alive, is_directory = self.alive, self.is_directory
+        return heapq.nlargest(
+            count,
+            (
+                entry
+                for entry in range(1, len(self.parents))
+                if alive[entry] and is_directory[entry] == directories
+            ),
+            key=self.sizes.__getitem__,
+        )
+
+    def search(
+        self,
+        pattern: str = "*",
+        syntax: str = "glob",
+        min_size: int = 0,
+        older_than: Optional[timedelta] = None,
+        user: Optional[str] = None,
+        under: str = "",
+    ) -> Iterator["ColumnarNode"]:
+        """
+        Yields the nodes whose name matches a pattern, as they are found,
+        as FileSystem.search does.
+        """
+        query = NameQuery(pattern, syntax)
+        if self._names is None:
+            alive = self.alive
+            with _paused_gc():
+                self._names = NameIndex(
+                    (self.name_of(entry), entry)
+                    for entry in range(1, len(self.parents))
+                    if alive[entry]
+                )
+        before = (
+            time.time() - older_than.total_seconds()
+            if older_than is not None
+            else None
+        )
+        user_code = (
+            self.users._codes.get(user, -1) if user is not None else None
+        )
+        root = self.lookup(under) if under.strip("/") else 0
+        if root is None:
+            return
+        for entry in self._names.match(query):
+            if (
+                self.sizes[entry] >= min_size
+                and (before is None or self.mtimes[entry] < before)
+                and (user_code is None or self.user_codes[entry] == user_code)
+                and (not root or self._is_below(entry, root))
+            ):
+                yield ColumnarNode(self, entry)
+
+    def _is_below(self, entry: int, ancestor: int) -> bool:
+        entry = self.parents[entry]
+        while entry > 0 and entry != ancestor:
+            entry = self.parents[entry]
+        return entry == ancestor
+
+    def file_columns(self, batch_size: int = 2**20) -> Iterator[tuple]:
+        """
+        Yields the attributes of the files by batches of columns, as
+        FileSystem.file_columns does, read from the arrays directly.
+        """
+        files = list(
+            compress(
+                range(len(self.parents)),
+                map(gt, self.alive, self.is_directory),
+            )
+        )
+        # Slices of bytes are cheaper to create than of the bytearray
+        all_names = bytes(self.names)
+        for start in range(0, len(files), batch_size):
+            batch = files[start : start + batch_size]
+            offsets = list(map(self.name_offsets.__getitem__, batch))
+            ends = map(add, offsets, map(self.name_lengths.__getitem__, batch))
+            names = b"\0".join(
+                map(all_names.__getitem__, map(slice, offsets, ends))
+            )
+            yield (
+                list(map(self.sizes.__getitem__, batch)),
+                list(map(self.mtimes.__getitem__, batch)),
+                list(
+                    map(
+                        self.users.strings.__getitem__,
+                        map(self.user_codes.__getitem__, batch),
+                    )
+                ),
+                list(
+                    map(
+                        self.groups.strings.__getitem__,
+                        map(self.group_codes.__getitem__, batch),
+                    )
+                ),
+                (names + b"\0").decode("utf-8", "surrogateescape"),
+            )
+
+    def _forget_views(self) -> None:
+        self._sorted_children.clear()
+        self._largest = None
+        self._names = None
+
+
+class ColumnarNode:
+    """
+    Read view of an entry of a ColumnarFileSystem with the attributes
+    of a FileNode. Only `size` can be assigned.
+    """
+
+    __slots__ = ("fs", "id")
+
+    def __init__(self, fs: ColumnarFileSystem, entry: int):
+        self.fs = fs
+        self.id = entry
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, ColumnarNode)
+            and other.fs is self.fs
+            and other.id == self.id
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.fs), self.id))
+
+    def __repr__(self) -> str:
+        kind = "directory" if self.is_directory else "file"
+        return f"ColumnarNode({self.path!r}, {kind}, size={self.size})"
+
+    @property
+    def name(self) -> str:
+        return self.fs.name_of(self.id)
+
+    @property
+    def path(self) -> str:
+        return self.fs.path_of(self.id)
+
+    @property
+    def size(self) -> int:
+        return self.fs.sizes[self.id]
+
+    @size.setter
+    def size(self, value: int) -> None:
+        self.fs.sizes[self.id] = value
+
+    @property
+    def mtime_epoch(self) -> int:
+        return self.fs.mtimes[self.id]
+
+    @property
+    def mtime(self) -> datetime:
+        return datetime.fromtimestamp(self.fs.mtimes[self.id])
+
+    @property
+    def mode(self) -> str:
+        return self.fs.modes.strings[self.fs.mode_codes[self.id]]
+
+    @property
+    def user(self) -> str:
+        return self.fs.users.strings[self.fs.user_codes[self.id]]
+
+    @property
+    def group(self) -> str:
+        return self.fs.groups.strings[self.fs.group_codes[self.id]]
+
+    @property
+    def is_directory(self) -> bool:
+        return bool(self.fs.is_directory[self.id])
+
+    @property
+    def parent(self) -> Optional["ColumnarNode"]:
+        parent = self.fs.parents[self.id]
+        return ColumnarNode(self.fs, parent) if parent >= 0 else None
+
+    @property
+    def childrens(self) -> "ColumnarChildren":
+        return ColumnarChildren(self.fs, self.id)
+
+
+class ColumnarChildren(Mapping):
+    """
+    Mapping of child names to the nodes of a ColumnarFileSystem directory.
+    """
+
+    __slots__ = ("fs", "id")
+
+    def __init__(self, fs: ColumnarFileSystem, entry: int):
+        self.fs = fs
+        self.id = entry
+
+    def __getitem__(self, name: str) -> ColumnarNode:
+        return ColumnarNode(self.fs, self.fs._child_map(self.id)[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.fs.name_of(c) for c in self.fs.children_of(self.id))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.fs.children_of(self.id))
+
+    def items(self):
+        return [
+            (self.fs.name_of(child), ColumnarNode(self.fs, child))
+            for child in self.fs.children_of(self.id)
+        ]
+
+    def values(self):
+        return [
+            ColumnarNode(self.fs, child)
+            for child in self.fs.children_of(self.id)
+        ]
+
+
+class ColumnarIndex(Mapping):
+    """
+    Mapping of relative paths to the nodes of a ColumnarFileSystem.
+    """
+
+    __slots__ = ("fs",)
+
+    def __init__(self, fs: ColumnarFileSystem):
+        self.fs = fs
+
+    def __getitem__(self, path: str) -> ColumnarNode:
+        entry = self.fs.lookup(path)
+        if entry is None:
+            raise KeyError(path)
+        return ColumnarNode(self.fs, entry)
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, str) and self.fs.lookup(path) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        stack = [(0, "")]
+        while stack:
+            entry, path = stack.pop()
+            yield path
+            children = list(self.fs.children_of(entry))
+            for child in reversed(children):
+                name = self.fs.name_of(child)
+                stack.append((child, f"{path}/{name}" if path else name))
+
+    def __len__(self) -> int:
+        return sum(self.fs.alive)
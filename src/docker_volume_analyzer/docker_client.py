@@ -1,36 +1,240 @@
-import re
+import atexit
+import heapq
+import logging
+import os
+import shlex
+import threading
 import time
-from typing import List, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Union
 
 import docker
 from docker.errors import NotFound
 from docker.models.containers import Container
 
+from docker_volume_analyzer.columnar import ColumnarFileSystem
 from docker_volume_analyzer.errors import DockerNotAvailableError
+from docker_volume_analyzer.events import DockerEventWatcher
+from docker_volume_analyzer.filesystem import FileSystem
+from docker_volume_analyzer.helper_pool import HelperContainerPool
+from docker_volume_analyzer.scan_backends import (
+    HelperContainerBackend,
+    HostDirectBackend,
+    ScanBackend,
+)
+from docker_volume_analyzer.singleflight import SingleFlight
+from docker_volume_analyzer.units import VolumeSize, format_size
+
+# Failures are logged rather than printed, stdout belonging to the TUI
+logger = logging.getLogger(__name__)
 
 
 class DockerClient:
 
-    _SIZE_RE = re.compile(r"^\d+(\.\d+)?[KMGTP]?$")
+    FIND_STAT_FORMAT = "%F|%n|%s|%A|%U|%G|%Y"
+    # Run by 'find -exec sh -c ... sh {} +' for each batch of paths: writes
+    # the number of paths, the paths, then their stat fields, each field
+    # terminated by a NUL byte. When 'stat' fails on a path (e.g. removed
+    # during the scan), the paths of the batch are written one by one so
+    # that fields never get out of step with their path.
+    NUL_BATCH_SCRIPT = (
+        "f='%F|%s|%A|%U|%G|%Y'; s=$(mktemp); "
+        'if stat -c "$f" "$@" >"$s" 2>/dev/null; then '
+        "printf '%s\\0' \"$#\" \"$@\"; tr '|\\n' '\\0\\0' <\"$s\"; "
+        "printf '\\0'; "
+        "else for p; do "
+        'if stat -c "$f" "$p" >"$s" 2>/dev/null; then '
+        "printf '%s\\0' 1 \"$p\"; tr '|\\n' '\\0\\0' <\"$s\"; "
+        "printf '\\0'; "
+        'fi; done; fi; rm -f "$s"'
+    )
+    # Run by scan_volumes_size with the mountpoints of the volumes: writes
+    # for each volume its allocated size, the size of its files, hard
+    # linked files being counted once, and its mountpoint, tab separated.
+    SIZE_SCRIPT = (
+        'for path; do [ -d "$path" ] || continue; '
+        "find \"$path\" \\( -type d -exec stat -c 'd %b %B' {} + \\) "
+        "-o -exec stat -c 'f %h %d:%i %s %b %B' {} + 2>/dev/null | "
+        'awk -v path="$path" \''
+        '$1 == "d" { disk += $2 * $3; next } '
+        "$2 > 1 { if ($3 in seen) next; seen[$3] = 1 } "
+        "{ apparent += $4; disk += $5 * $6 } "
+        'END { printf "%.0f\\t%.0f\\t%s\\n", disk, apparent, path }'
+        "'; done"
+    )
+    SCAN_MODES = ("batched", "per-file")
+    RECORD_FORMATS = ("lines", "nul")
+    SCAN_BACKENDS = ("auto", "container", "host")
+    TREE_ENGINES = {"objects": FileSystem, "columnar": ColumnarFileSystem}
+    CACHE_TIMEOUT = 60
+    PARALLEL_PARSE_THRESHOLD = 32 * 2**20
 
-    def __init__(self):
+    def __init__(
+        self,
+        scan_mode: str = "batched",
+        use_helper_pool: bool | None = None,
+        helper_idle_timeout: float = 300,
+        scan_backend: str | None = None,
+        size_concurrency: int = 4,
+        use_system_df: bool = True,
+        tree_engine: str | None = None,
+        record_format: str = "nul",
+        parse_workers: int | None = None,
+        parallel_parse_threshold: int | None = PARALLEL_PARSE_THRESHOLD,
+    ):
+        """
+        Args:
+            scan_mode (str): Scanner mode used by 'find' ("batched" or
+            "per-file").
+            use_helper_pool (bool | None): Run helper commands in warm,
+            long-lived containers through 'exec_run' instead of starting a
+            new container per call. Defaults to the HELPER_POOL environment
+            variable.
+            helper_idle_timeout (float): Idle time in seconds before a warm
+            helper container is removed.
+            scan_backend (str | None): "container" to always scan volumes
+            in helper containers, "host" to walk their mountpoints directly,
+            or "auto" to walk them only when readable. Defaults to the
+            SCAN_BACKEND environment variable, then "auto".
+            size_concurrency (int): Maximum number of volume size
+            measurements running at the same time.
+            use_system_df (bool): Take volume sizes from the engine's
+            'system df' data when available, before scanning volumes. The
+            engine only reports apparent sizes.
+            tree_engine (str | None): "objects" to build volume trees as
+            FileNode objects, or "columnar" to store them in typed arrays,
+            which uses far less memory on volumes with millions of files.
+            Defaults to the TREE_ENGINE environment variable, then
+            "objects".
+            record_format (str): Output format of the helper container
+            scans: "nul" for NUL-delimited records, supporting any file
+            name, or "lines" for '|' separated lines.
+            parse_workers (int | None): Number of processes parsing the
+            output of large scans. Defaults to the number of CPUs.
+            parallel_parse_threshold (int | None): Size in bytes of scan
+            output from which the rest of it is parsed by a pool of
+            `parse_workers` processes, or None to never start the pool.
+        """
+        if scan_mode not in self.SCAN_MODES:
+            raise ValueError(
+                f"scan_mode must be one of {', '.join(self.SCAN_MODES)}"
+            )
+        self.scan_mode = scan_mode
+        if record_format not in self.RECORD_FORMATS:
+            raise ValueError(
+                "record_format must be one of "
+                f"{', '.join(self.RECORD_FORMATS)}"
+            )
+        self.record_format = record_format
+        self.parse_workers = parse_workers
+        self.parallel_parse_threshold = parallel_parse_threshold
+        scan_backend = scan_backend or os.getenv("SCAN_BACKEND") or "auto"
+        if scan_backend not in self.SCAN_BACKENDS:
+            raise ValueError(
+                f"scan_backend must be one of {', '.join(self.SCAN_BACKENDS)}"
+            )
+        self.scan_backend = scan_backend
+        tree_engine = tree_engine or os.getenv("TREE_ENGINE") or "objects"
+        if tree_engine not in self.TREE_ENGINES:
+            raise ValueError(
+                f"tree_engine must be one of {', '.join(self.TREE_ENGINES)}"
+            )
+        self.tree_engine = tree_engine
+        self.fs_factory = self.TREE_ENGINES[tree_engine]
+        self._mountpoints = {}
+        self.container_backend = HelperContainerBackend(self)
+        self.host_backend = HostDirectBackend(
+            self.mountpoint_of, self.fs_factory
+        )
+        self.size_concurrency = max(1, size_concurrency)
+        self.use_system_df = use_system_df
+        self.size_errors = {}
+        self.size_sources = {}
+        self._size_hints = {}
+        if use_helper_pool is None:
+            use_helper_pool = os.getenv("HELPER_POOL", "").lower() in (
+                "1",
+                "true",
+                "yes",
+            )
+        self.use_helper_pool = use_helper_pool
+        self.helper_idle_timeout = helper_idle_timeout
+        self._helper_pool = None
+        self._event_watcher = None
         try:
             self.client = docker.from_env()
             self._volume_size_cache = {}
-            self._cache_timeout = 60
+            # Guards the size cache and the size bookkeeping, updated by
+            # the threads of threaded servers and by the event watcher
+            self._cache_lock = threading.Lock()
+            self._size_flights = SingleFlight()
+            self._cache_timeout = self.CACHE_TIMEOUT
         except docker.errors.DockerException as e:
             raise DockerNotAvailableError from e
 
+    @property
+    def helper_pool(self) -> HelperContainerPool | None:
+        """
+        The warm helper container pool, created on first use when enabled.
+        """
+        if self.use_helper_pool and self._helper_pool is None:
+            self._helper_pool = HelperContainerPool(
+                self.client, idle_timeout=self.helper_idle_timeout
+            )
+            atexit.register(self._helper_pool.close)
+        return self._helper_pool
+
     def list_volumes(self) -> List[docker.models.volumes.Volume]:
         """
-        Returns all Docker volume objects.
+        Returns all Docker volume objects, remembering their mountpoints.
+        """
+        volumes = self.client.volumes.list()
+        for volume in volumes:
+            mountpoint = volume.attrs.get("Mountpoint")
+            if isinstance(mountpoint, str):
+                self._mountpoints[volume.name] = mountpoint
+        return volumes
+
+    def mountpoint_of(self, volume_name: str) -> str | None:
+        """
+        Returns the host mountpoint of a volume listed by list_volumes.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+
+        Returns:
+            str | None: The mountpoint, or None if unknown.
+        """
+        return self._mountpoints.get(volume_name)
+
+    def backend_for(self, volume_name: str) -> ScanBackend:
+        """
+        Selects the backend used to scan a volume.
+
+        In "auto" mode, the volume mountpoint is walked directly when it is
+        readable from this process, otherwise a helper container is used.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+
+        Returns:
+            ScanBackend: The backend to use.
         """
-        return self.client.volumes.list()
+        if self.scan_backend == "host" or (
+            self.scan_backend == "auto"
+            and HostDirectBackend.is_readable(self.mountpoint_of(volume_name))
+        ):
+            return self.host_backend
+        return self.container_backend
 
     def list_containers(self) -> List[Container]:
         """
         Returns all Docker container objects (running and stopped),
         skipping containers that may have been removed during the process.
+
+        Each container is inspected with its own API call: prefer
+        list_container_summaries or get_mounts_index when the summary
+        fields are enough.
         """
         containers: List[Container] = []
         for summary in self.client.api.containers(all=True):
@@ -41,6 +245,157 @@ class DockerClient:
                 continue
         return containers
 
+    def list_container_summaries(
+        self, filters: dict | None = None
+    ) -> List[dict]:
+        """
+        Returns the summary of all Docker containers (running and stopped)
+        as reported by a single list call, without inspecting them.
+
+        Args:
+            filters (dict | None): Filters of the container list call.
+        """
+        return self.client.api.containers(all=True, filters=filters)
+
+    def build_mounts_index(
+        self, filters: dict | None = None
+    ) -> Dict[str, List[dict]]:
+        """
+        Builds the mapping of volume names to the containers mounting them
+        from the container summaries, which already include the mounts.
+
+        Args:
+            filters (dict | None): Filters of the container list call.
+
+        Returns:
+            dict: Dictionary with volume names as keys and the list of
+            mounting containers (short_id, container_name, mountpoint,
+            driver, mode, rw, running) as values. The analyzer's own
+            helper containers are left out.
+        """
+        index = {}
+        for summary in self.list_container_summaries(filters):
+            if HelperContainerPool.LABEL in (summary.get("Labels") or {}):
+                continue
+            for mount in summary.get("Mounts") or []:
+                if mount.get("Type", "volume") != "volume":
+                    continue
+                index.setdefault(mount.get("Name"), []).append(
+                    self._mount_entry(summary, mount)
+                )
+        return index
+
+    def get_mounts_index(self) -> Dict[str, List[dict]]:
+        """
+        Returns the mapping of volume names to the containers mounting them.
+
+        The live index maintained by the event watcher is used when it is
+        running, otherwise the mapping is built from a container list call.
+
+        Returns:
+            dict: See build_mounts_index.
+        """
+        if self._event_watcher is not None and self._event_watcher.running:
+            return self._event_watcher.mounts_index()
+        return self.build_mounts_index()
+
+    def start_event_watcher(self, cache_timeout: float = 3600) -> None:
+        """
+        Starts keeping the mounts index and the size cache up to date from
+        the Docker events stream.
+
+        Since changed volumes are evicted as soon as an event is received,
+        sizes stay cached for `cache_timeout` seconds instead of the default
+        timeout while the watcher runs. Writes emit no event though: the
+        volumes mounted read-write by a running container keep the default
+        timeout.
+
+        Args:
+            cache_timeout (float): Size cache timeout while watching.
+        """
+        if self._event_watcher is not None and self._event_watcher.running:
+            return
+        self._event_watcher = DockerEventWatcher(self)
+        self._event_watcher.start()
+        self._cache_timeout = cache_timeout
+
+    def stop_event_watcher(self) -> None:
+        """
+        Stops watching Docker events and restores the default cache timeout.
+        """
+        if self._event_watcher is not None:
+            self._event_watcher.stop()
+            self._event_watcher = None
+        self._cache_timeout = self.CACHE_TIMEOUT
+
+    def _size_cache_timeout(self, volume_name: str) -> float:
+        """
+        Returns the number of seconds the size of a volume stays cached.
+        """
+        watcher = self._event_watcher
+        if (
+            watcher is not None
+            and watcher.running
+            and watcher.is_written(volume_name)
+        ):
+            return min(self._cache_timeout, self.CACHE_TIMEOUT)
+        return self._cache_timeout
+
+    def invalidate_volume_size(self, volume_name: str) -> None:
+        """
+        Evicts a volume from the size cache.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+        """
+        with self._cache_lock:
+            self._volume_size_cache.pop(volume_name, None)
+
+    def clear_volume_size_cache(self) -> None:
+        """
+        Evicts every volume from the size cache.
+        """
+        with self._cache_lock:
+            self._volume_size_cache.clear()
+
+    @staticmethod
+    def _mount_entry(summary: dict, mount: dict) -> dict:
+        names = summary.get("Names") or [""]
+        return {
+            "short_id": summary["Id"][:12],
+            "container_name": names[0].lstrip("/"),
+            "mountpoint": mount.get("Destination", ""),
+            "driver": mount.get("Driver", ""),
+            "mode": mount.get("Mode", ""),
+            "rw": mount.get("RW", False),
+            "running": summary.get("State") == "running",
+        }
+
+    @staticmethod
+    def _volumes_binding(
+        volumes_name: Union[str, List[str]], mode: str = "ro"
+    ) -> dict:
+        """
+        Builds the volumes mapping mounting each volume under /mnt/<name>.
+
+        Args:
+            volumes_name (str | list): Name(s) of the Docker volume(s).
+            mode (str): Volume mount mode ("ro" or "rw").
+
+        Returns:
+            dict: Volumes mapping expected by the Docker SDK.
+        """
+        if isinstance(volumes_name, str):
+            volumes_name = [volumes_name]
+        elif not isinstance(volumes_name, list):
+            raise ValueError(
+                "volumes_name must be a string or a list of strings"
+            )
+        return {
+            name: {"bind": f"/mnt/{name}", "mode": mode}
+            for name in volumes_name
+        }
+
     def _run_in_container(
         self,
         command: Union[str, List[str]],
@@ -59,35 +414,100 @@ class DockerClient:
         Returns:
             str | None: Output of the command or None if failed.
         """
-
-        if isinstance(volumes_name, str):
-            volumes_binding = {
-                volumes_name: {"bind": f"/mnt/{volumes_name}", "mode": mode}
-            }
-        elif isinstance(volumes_name, list):
-            volumes_binding = {
-                name: {"bind": f"/mnt/{name}", "mode": mode}
-                for name in volumes_name
-            }
-        else:
-            raise ValueError(
-                "volumes_name must be a string or a list of strings"
+        if self.helper_pool:
+            exit_code, output = self.helper_pool.exec_run(
+                command, self._volumes_binding(volumes_name, mode)
             )
+            if exit_code:
+                logger.warning("Command failed: exit code %s", exit_code)
+                return False
+            return output.decode().strip()
 
         try:
             output = self.client.containers.run(
                 image="alpine",
                 command=command,
-                volumes=volumes_binding,
+                volumes=self._volumes_binding(volumes_name, mode),
+                labels={HelperContainerPool.LABEL: "true"},
                 remove=True,
                 stdout=True,
                 stderr=False,
             )
             return output.decode().strip()
         except docker.errors.ContainerError as e:
-            print(f"[Docker Error] Command failed: {e}")
+            logger.warning("Command failed: %s", e)
             return False
 
+    def _stream_in_container(
+        self,
+        command: Union[str, List[str]],
+        volumes_name: Union[str, List[str]],
+        mode: str = "ro",
+    ) -> Iterator[str]:
+        """
+        Runs a command in a detached Alpine container and yields its output
+        line by line while the command is still running.
+
+        Only the current chunk and an incomplete trailing line are held in
+        memory, whatever the total size of the output.
+
+        Args:
+            command (str | list): Shell command to execute.
+            volumes_name (str | list): Name(s) of the Docker volume(s).
+            mode (str): Volume mount mode ("ro" or "rw").
+
+        Yields:
+            str: Each non-empty line written on stdout.
+        """
+        yield from iter_lines(
+            self._stream_chunks_in_container(command, volumes_name, mode)
+        )
+
+    def _stream_chunks_in_container(
+        self,
+        command: Union[str, List[str]],
+        volumes_name: Union[str, List[str]],
+        mode: str = "ro",
+    ) -> Iterator[bytes]:
+        """
+        Runs a command in a detached Alpine container and yields the raw
+        chunks of its stdout while the command is still running.
+
+        Args:
+            command (str | list): Shell command to execute.
+            volumes_name (str | list): Name(s) of the Docker volume(s).
+            mode (str): Volume mount mode ("ro" or "rw").
+
+        A command exiting with an error is logged once its output is
+        exhausted, rather than failing the stream: 'find' and 'du' exit
+        with an error when an entry vanishes during the scan, which leaves
+        the rest of their output valid.
+
+        Yields:
+            bytes: Chunks of the output, as received.
+        """
+        if self.helper_pool:
+            exit_code = yield from self.helper_pool.exec_stream(
+                command, self._volumes_binding(volumes_name, mode)
+            )
+        else:
+            container = self.client.containers.run(
+                image="alpine",
+                command=command,
+                volumes=self._volumes_binding(volumes_name, mode),
+                labels={HelperContainerPool.LABEL: "true"},
+                detach=True,
+            )
+            try:
+                yield from container.logs(
+                    stream=True, follow=True, stdout=True, stderr=False
+                )
+                exit_code = container.wait()["StatusCode"]
+            finally:
+                container.remove(force=True)
+        if exit_code:
+            logger.warning("Command failed: exit code %s", exit_code)
+
     def get_volume_size(self, volume_name: Union[str, List[str]]) -> str:
         """
         Gets human-readable size of a volume using 'du -sh'.
@@ -125,6 +545,48 @@ class DockerClient:
                 f"Failed to remove volume '{volume_name}': {e}"
             ) from e
 
+    @classmethod
+    def build_find_command(
+        cls,
+        path: str,
+        scan_mode: str = "batched",
+        record_format="lines",
+        max_depth: int | None = None,
+    ) -> str:
+        """
+        Builds the shell command listing every entry under a path
+        with its stat record.
+
+        In "batched" mode, 'find' passes as many paths as possible to each
+        'stat' invocation ('-exec ... +'), so only a handful of processes
+        are forked for the whole scan. The "per-file" mode forks one 'stat'
+        per entry ('-exec ... \\;') and is kept for comparison purposes.
+
+        Args:
+            path (str): Path to scan inside the helper container.
+            scan_mode (str): "batched" or "per-file".
+            record_format (str): "lines" for one '%F|%n|%s|%A|%U|%G|%Y'
+            line per entry, or "nul" for NUL_BATCH_SCRIPT batches.
+            max_depth (int | None): Depth below which entries are not
+            listed, 1 listing only the entries of the directory itself.
+
+        Returns:
+            str: The shell command.
+        """
+        terminator = "+" if scan_mode == "batched" else "\\;"
+        find = f"find {shlex.quote(path)}"
+        if max_depth is not None:
+            find = f"{find} -maxdepth {max_depth}"
+        if record_format == "nul":
+            return (
+                f"{find} -exec sh -c "
+                f"{shlex.quote(cls.NUL_BATCH_SCRIPT)} sh {{}} {terminator}"
+            )
+        return (
+            f"{find} -exec stat -c '{cls.FIND_STAT_FORMAT}' "
+            f"{{}} {terminator}"
+        )
+
     def get_directory_informations_with_find(
         self, volume_name: str, directory: str | None = None
     ) -> Union[str, None]:
@@ -145,17 +607,192 @@ class DockerClient:
             else f"/mnt/{volume_name}"
         )
 
+        command = ["sh", "-c", self.build_find_command(path, self.scan_mode)]
+        output = self._run_in_container(command, volume_name)
+        return output if output else None
+
+    def stream_directory_informations_with_find(
+        self, volume_name: str, directory: str | None = None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of get_directory_informations_with_find.
+
+        Args:
+            volume_name (str): Docker volume name.
+            directory (str): Directory path inside the volume.
+
+        Yields:
+            str: Each line of the 'find' with stat command output.
+        """
+        path = (
+            f"/mnt/{volume_name}/{directory}"
+            if directory
+            else f"/mnt/{volume_name}"
+        )
+        command = ["sh", "-c", self.build_find_command(path, self.scan_mode)]
+        yield from self._stream_in_container(command, volume_name)
+
+    def stream_directory_records_with_find(
+        self, volume_name: str, directory: str | None = None
+    ) -> Iterator[bytes]:
+        """
+        Variant of stream_directory_informations_with_find writing
+        NUL-delimited records (see FileSystemBuilder.feed_chunk).
+
+        Args:
+            volume_name (str): Docker volume name.
+            directory (str): Directory path inside the volume.
+
+        Yields:
+            bytes: Chunks of the raw command output.
+        """
+        path = (
+            f"/mnt/{volume_name}/{directory}"
+            if directory
+            else f"/mnt/{volume_name}"
+        )
         command = [
             "sh",
             "-c",
-            f"find {path} -exec stat -c '%F|%n|%s|%A|%U|%G|%Y' {{}} \\;",
+            self.build_find_command(path, self.scan_mode, "nul"),
         ]
-        output = self._run_in_container(command, volume_name)
-        return output if output else None
+        yield from self._stream_chunks_in_container(command, volume_name)
+
+    def stream_directory_level_with_find(
+        self, volume_name: str, directory: str | None = None
+    ) -> Iterator[bytes]:
+        """
+        Lists only the entries of a directory, with the total disk usage of
+        each subdirectory: the 'du -k -d 1' output of the directory, a NUL
+        byte, then the NUL-delimited records of its entries.
+
+        Args:
+            volume_name (str): Docker volume name.
+            directory (str): Directory path inside the volume.
+
+        Yields:
+            bytes: Chunks of the raw command output.
+        """
+        path = (
+            f"/mnt/{volume_name}/{directory}"
+            if directory
+            else f"/mnt/{volume_name}"
+        )
+        find = self.build_find_command(path, self.scan_mode, "nul", 1)
+        command = [
+            "sh",
+            "-c",
+            f"du -k -d 1 {shlex.quote(path)} 2>/dev/null; "
+            f"printf '\\0'; {find}",
+        ]
+        yield from self._stream_chunks_in_container(command, volume_name)
+
+    def stream_directory_totals_with_du(
+        self, volume_name: str, max_depth: int, directory: str | None = None
+    ) -> Iterator[bytes]:
+        """
+        Measures the total disk usage of the directories of a volume, down
+        to a maximum depth, with 'du -k -d <max_depth>'.
+
+        Args:
+            volume_name (str): Docker volume name.
+            max_depth (int): Depth of the deepest directories measured,
+            relative to the measured directory.
+            directory (str): Directory path inside the volume.
+
+        Yields:
+            bytes: Chunks of the raw 'du' output.
+        """
+        path = (
+            f"/mnt/{volume_name}/{directory}"
+            if directory
+            else f"/mnt/{volume_name}"
+        )
+        command = [
+            "sh",
+            "-c",
+            f"du -k -d {int(max_depth)} {shlex.quote(path)} 2>/dev/null",
+        ]
+        yield from self._stream_chunks_in_container(command, volume_name)
 
     def get_volumes_size(
         self, volumes_name: Union[str, List[str]], human_readable: bool = True
-    ):
+    ) -> Dict[str, str | int | None]:
+        """
+        Gets the size of volumes, using the cache when it is fresh enough.
+
+        Args:
+            volumes_name (str | list): Name(s) of the Docker volume(s).
+            human_readable (bool): Return 'du -h' like sizes instead of
+            bytes.
+
+        Returns:
+            dict: Size of each volume, None when it could not be measured
+            (the reason being available in `size_errors`).
+        """
+        results = {}
+        for sizes in self.iter_volumes_size(volumes_name, human_readable):
+            results.update(sizes)
+        return results
+
+    def iter_volumes_size(
+        self, volumes_name: Union[str, List[str]], human_readable: bool = True
+    ) -> Iterator[Dict[str, str | int | None]]:
+        """
+        Gets the apparent size of volumes, yielding results as soon as they
+        are known, formatted from the exact sizes of iter_exact_volumes_size.
+
+        Args:
+            volumes_name (str | list): Name(s) of the Docker volume(s).
+            human_readable (bool): Return 'du -h' like sizes instead of
+            bytes.
+
+        Yields:
+            dict: Size of some of the volumes, None for the volumes which
+            could not be measured.
+        """
+        for sizes in self.iter_exact_volumes_size(volumes_name):
+            if human_readable:
+                yield {
+                    volume: (
+                        None if size is None else format_size(size.apparent)
+                    )
+                    for volume, size in sizes.items()
+                }
+            else:
+                yield {
+                    volume: None if size is None else size.apparent
+                    for volume, size in sizes.items()
+                }
+
+    def iter_exact_volumes_size(
+        self, volumes_name: Union[str, List[str]]
+    ) -> Iterator[Dict[str, VolumeSize | None]]:
+        """
+        Gets the size of volumes in bytes, yielding results as soon as they
+        are known.
+
+        Sizes are measured and cached as exact byte counts, whatever the
+        unit their callers display them in, so that a single measure
+        serves every caller.
+
+        Cached sizes are yielded first, then the sizes already known by the
+        engine ('system df'), which need no helper container. The remaining
+        volumes are split into shards of similar total size, based on their
+        previously observed size, which are measured concurrently (at most
+        `size_concurrency` at a time). The sizes of each shard are yielded
+        when it finishes.
+
+        Volumes already being measured for another caller are not measured
+        again: their sizes are yielded when that measure ends.
+
+        Args:
+            volumes_name (str | list): Name(s) of the Docker volume(s).
+
+        Yields:
+            dict: Size of the volumes of a shard, None for the volumes which
+            could not be measured.
+        """
         if isinstance(volumes_name, str):
             volumes_name = [volumes_name]
 
@@ -163,40 +800,211 @@ class DockerClient:
         cached_results = {}
         volumes_to_query = []
 
-        for volume in volumes_name:
-            cache_entry = self._volume_size_cache.get(volume)
-            if (
-                cache_entry
-                and current_time - cache_entry["timestamp"]
-                < self._cache_timeout
-            ):
-                cached_results[volume] = cache_entry["size"]
+        with self._cache_lock:
+            for volume in volumes_name:
+                cache_entry = self._volume_size_cache.get(volume)
+                if cache_entry and current_time - cache_entry[
+                    "timestamp"
+                ] < self._size_cache_timeout(volume):
+                    cached_results[volume] = cache_entry["size"]
+                else:
+                    volumes_to_query.append(volume)
+
+        if cached_results:
+            yield cached_results
+        if not volumes_to_query:
+            return
+
+        measured = []
+        in_flight = {}
+        for volume in volumes_to_query:
+            future, leader = self._size_flights.begin(volume)
+            if leader:
+                measured.append(volume)
             else:
-                volumes_to_query.append(volume)
-
-        if volumes_to_query:
-            paths = " ".join(f"/mnt/{v}" for v in volumes_to_query)
-            cmd = ["sh", "-c", f"du -s{'h' if human_readable else ''} {paths}"]
-            output = self._run_in_container(cmd, volumes_to_query)
-
-            results = {}
-            for volume in volumes_to_query:
-                results[volume] = "0"  # Default size is "0"
-            if output:
-                for line, volume in zip(output.splitlines(), volumes_to_query):
-                    parts = line.split(maxsplit=1)
-                    if len(parts) >= 1 and self._SIZE_RE.match(parts[0]):
-                        results[volume] = parts[0]
-
-            for volume, size in results.items():
-                self._volume_size_cache[volume] = {
-                    "size": size,
-                    "timestamp": current_time,
-                }
+                in_flight[future] = volume
+        # Once finished, an uncached volume may be led by another caller,
+        # whose flight must not be finished here.
+        unfinished = set(measured)
+        try:
+            for results in self._measure_volumes_size(measured, current_time):
+                for volume, size in results.items():
+                    self._size_flights.finish(volume, size)
+                    unfinished.discard(volume)
+                yield results
+        finally:
+            # Volumes left unmeasured, e.g. when iteration stopped early
+            for volume in unfinished:
+                self._size_flights.finish(volume)
+        for future in as_completed(in_flight):
+            yield {in_flight[future]: future.result()}
+
+    def _measure_volumes_size(
+        self,
+        volumes_to_query: List[str],
+        current_time: float,
+    ) -> Iterator[Dict[str, VolumeSize | None]]:
+        """
+        Measures the size of volumes, from the engine's data when possible,
+        then by their scan backend, yielding sizes as they are known.
+        """
+        if not volumes_to_query:
+            return
+        if self.use_system_df:
+            df_sizes = self.df_volumes_size(volumes_to_query)
+            if df_sizes:
+                for volume, size in df_sizes.items():
+                    self._record_size(volume, size, "df", current_time)
+                yield df_sizes
+                volumes_to_query = [
+                    v for v in volumes_to_query if v not in df_sizes
+                ]
+
+        backends = {}
+        for volume in volumes_to_query:
+            backends.setdefault(self.backend_for(volume), []).append(volume)
+
+        with ThreadPoolExecutor(max_workers=self.size_concurrency) as pool:
+            futures = {
+                pool.submit(backend.get_volumes_size, shard): (
+                    backend,
+                    shard,
+                )
+                for backend, volumes in backends.items()
+                for shard in self._plan_shards(volumes)
+            }
+            for future in as_completed(futures):
+                backend, shard = futures[future]
+                try:
+                    sizes = future.result()
+                except Exception as e:
+                    sizes = {}
+                    error = f"{backend.name} backend failed: {e}"
+                else:
+                    error = f"size not reported by the {backend.name} backend"
+
+                results = {}
+                for volume in shard:
+                    size = sizes.get(volume)
+                    results[volume] = size
+                    if size is None:
+                        with self._cache_lock:
+                            self.size_errors[volume] = error
+                        continue
+                    self._record_size(volume, size, backend.name, current_time)
+                yield results
+
+    def _record_size(
+        self,
+        volume_name: str,
+        size: VolumeSize,
+        source: str,
+        timestamp: float,
+    ) -> None:
+        """
+        Caches a measured size and remembers where it came from.
+        """
+        with self._cache_lock:
+            self.size_errors.pop(volume_name, None)
+            self.size_sources[volume_name] = source
+            self._size_hints[volume_name] = size.apparent
+            self._volume_size_cache[volume_name] = {
+                "size": size,
+                "source": source,
+                "timestamp": timestamp,
+            }
 
-            cached_results.update(results)
+    def df_volumes_size(
+        self, volumes_name: List[str]
+    ) -> Dict[str, VolumeSize]:
+        """
+        Gets the size of volumes from the engine's 'system df' data,
+        without starting any container.
+
+        The engine reports the apparent size of the volumes only, their
+        allocated size being left unknown, and -1 for the volumes it did
+        not measure (e.g. non local drivers); those are left out.
+
+        Args:
+            volumes_name (list): Names of the Docker volumes.
+
+        Returns:
+            dict: Size of each volume reported by the engine, in bytes.
+        """
+        try:
+            df_volumes = self.client.df().get("Volumes") or []
+        except docker.errors.APIError:
+            return {}
+
+        wanted = set(volumes_name)
+        results = {}
+        for volume in df_volumes:
+            size = (volume.get("UsageData") or {}).get("Size", -1)
+            if volume.get("Name") not in wanted or size is None or size < 0:
+                continue
+            results[volume["Name"]] = VolumeSize(apparent=size)
+        return results
+
+    def _plan_shards(self, volumes_name: List[str]) -> List[List[str]]:
+        """
+        Splits volumes into at most `size_concurrency` shards of similar
+        total size, using the longest-processing-time-first heuristic on
+        the previously observed sizes.
+
+        Args:
+            volumes_name (list): Names of the Docker volumes.
+
+        Returns:
+            list: Non-empty shards of volume names.
+        """
+        known = [
+            self._size_hints[v] for v in volumes_name if v in self._size_hints
+        ]
+        default = sum(known) // len(known) if known else 1
+        weights = {v: self._size_hints.get(v, default) for v in volumes_name}
 
-        return cached_results
+        shards = [
+            (0, i, []) for i in range(min(self.size_concurrency, len(weights)))
+        ]
+        for volume in sorted(weights, key=weights.get, reverse=True):
+            load, i, shard = heapq.heappop(shards)
+            shard.append(volume)
+            heapq.heappush(shards, (load + weights[volume], i, shard))
+        return [shard for _, _, shard in sorted(shards, key=lambda s: s[1])]
+
+    def scan_volumes_size(
+        self, volumes_name: List[str]
+    ) -> Dict[str, VolumeSize]:
+        """
+        Gets the apparent and allocated sizes of volumes in a single helper
+        container, with one 'find' and 'stat' pass over each volume
+        (BusyBox 'du' cannot report apparent sizes).
+
+        Args:
+            volumes_name (list): Names of the Docker volumes.
+
+        Returns:
+            dict: Size of each volume, in bytes. Volumes which could not be
+            measured are missing.
+        """
+        cmd = [
+            "sh",
+            "-c",
+            self.SIZE_SCRIPT,
+            "sh",
+            *(f"/mnt/{v}" for v in volumes_name),
+        ]
+        output = self._run_in_container(cmd, volumes_name)
+
+        results = {}
+        for line in (output or "").splitlines():
+            parts = line.split("\t", 2)
+            if len(parts) != 3 or not all(p.isdigit() for p in parts[:2]):
+                continue
+            volume = parts[2].removeprefix("/mnt/")
+            if volume in volumes_name:
+                results[volume] = VolumeSize(int(parts[1]), disk=int(parts[0]))
+        return results
 
     def delete_volume_file(self, volume_name: str, file_path: str) -> bool:
         """
@@ -212,3 +1020,24 @@ class DockerClient:
         command = ["sh", "-c", f"rm -f /mnt/{volume_name}/{file_path}"]
         output = self._run_in_container(command, volume_name, mode="rw")
         return output is not False
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Splits a stream of byte chunks into decoded lines.
+
+    Args:
+        chunks (Iterable[bytes]): Chunks as read from the container logs.
+
+    Yields:
+        str: Each complete, non-empty line.
+    """
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line:
+                yield line.decode()
+    if pending:
+        yield pending.decode()
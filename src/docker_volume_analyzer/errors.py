@@ -7,3 +7,10 @@ class DockerNotAvailableError(Exception):
         "Please ensure Docker is installed and running.",
     ):
         super().__init__(message)
+
+
+class ScanCancelledError(Exception):
+    """Raised when a volume scan is cancelled before its end."""
+
+    def __init__(self, message="The volume scan was cancelled."):
+        super().__init__(message)
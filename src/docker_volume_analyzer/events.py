@@ -0,0 +1,172 @@
+import copy
+import threading
+from typing import TYPE_CHECKING, Dict, List
+
+from docker_volume_analyzer.helper_pool import HelperContainerPool
+
+if TYPE_CHECKING:  # pragma: no cover
+    from docker_volume_analyzer.docker_client import DockerClient
+
+
+class DockerEventWatcher:
+    """
+    Subscribes to the Docker events stream in a background thread to keep
+    the state of a DockerClient up to date.
+
+    The watcher maintains a live volume to containers index, updated on
+    container create/destroy events, and on start/die events for the
+    running state of the containers, and evicts only the volume size cache
+    entries affected by an event:
+
+    - volume destroy events, and mount/unmount events of read-write mounts,
+      evict the volume,
+    - container die events evict the volumes mounted by the container.
+
+    Events of the analyzer's own helper containers are ignored.
+
+    When the stream is interrupted, events may have been missed: the index
+    is rebuilt and the whole size cache is cleared before resubscribing.
+
+    Attributes:
+        docker_client (DockerClient): The client whose state is maintained.
+        retry_delay (float): Delay in seconds before resubscribing.
+    """
+
+    FILTERS = {"type": ["volume", "container"]}
+
+    def __init__(self, docker_client: "DockerClient", retry_delay: float = 5):
+        self.docker_client = docker_client
+        self.retry_delay = retry_delay
+        self._index = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._stream = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Builds the initial index and starts watching events.
+        """
+        self._stopped.clear()
+        self._subscribe()
+        self._thread = threading.Thread(
+            target=self._run, name="docker-event-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops watching events.
+        """
+        self._stopped.set()
+        if self._stream is not None:
+            self._stream.close()
+
+    def _subscribe(self) -> None:
+        # Subscribe before rebuilding the index so that no change is lost
+        # between both calls.
+        self._stream = self.docker_client.client.events(
+            decode=True, filters=self.FILTERS
+        )
+        index = self.docker_client.build_mounts_index()
+        with self._lock:
+            self._index = index
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                for event in self._stream:
+                    self.handle(event)
+            except Exception:
+                pass
+            if self._stopped.wait(self.retry_delay):
+                break
+            try:
+                self.docker_client.clear_volume_size_cache()
+                self._subscribe()
+            except Exception:
+                continue
+
+    def mounts_index(self) -> Dict[str, List[dict]]:
+        """
+        Returns a copy of the live volume to containers index.
+        """
+        with self._lock:
+            return copy.deepcopy(self._index)
+
+    def is_written(self, volume_name: str) -> bool:
+        """
+        Tells whether a volume is mounted read-write by a running container,
+        which can change its size without emitting any event.
+        """
+        with self._lock:
+            return any(
+                c["rw"] and c["running"]
+                for c in self._index.get(volume_name, ())
+            )
+
+    def handle(self, event: dict) -> None:
+        """
+        Applies a Docker event to the index and the size cache.
+
+        Args:
+            event (dict): A decoded event from the Docker events stream.
+        """
+        actor = event.get("Actor") or {}
+        attributes = actor.get("Attributes") or {}
+        action = event.get("Action", "")
+        if event.get("Type") == "volume":
+            self._handle_volume(action, actor.get("ID"), attributes)
+        elif event.get("Type") == "container":
+            if HelperContainerPool.LABEL in attributes:
+                return
+            self._handle_container(action, actor.get("ID", ""))
+
+    def _handle_volume(
+        self, action: str, volume_name: str, attributes: dict
+    ) -> None:
+        if action == "destroy":
+            with self._lock:
+                self._index.pop(volume_name, None)
+            self.docker_client.invalidate_volume_size(volume_name)
+        elif action in ("mount", "unmount"):
+            # Read-only mounts, such as the helper containers ones,
+            # cannot change the volume size.
+            if attributes.get("read/write", "true") == "false":
+                return
+            self.docker_client.invalidate_volume_size(volume_name)
+
+    def _handle_container(self, action: str, container_id: str) -> None:
+        short_id = container_id[:12]
+        if action == "create":
+            entries = self.docker_client.build_mounts_index(
+                filters={"id": container_id}
+            )
+            with self._lock:
+                for volume_name, containers in entries.items():
+                    self._index.setdefault(volume_name, []).extend(containers)
+        elif action == "destroy":
+            with self._lock:
+                for volume_name in list(self._index):
+                    self._index[volume_name] = [
+                        c
+                        for c in self._index[volume_name]
+                        if c["short_id"] != short_id
+                    ]
+                    if not self._index[volume_name]:
+                        del self._index[volume_name]
+        elif action in ("start", "die"):
+            volumes = []
+            with self._lock:
+                for volume_name, containers in self._index.items():
+                    for container in containers:
+                        if container["short_id"] == short_id:
+                            container["running"] = action == "start"
+                            volumes.append(volume_name)
+            if action == "die":
+                for volume_name in volumes:
+                    self.docker_client.invalidate_volume_size(volume_name)
@@ -1,39 +1,146 @@
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, Optional
+import gc
+import heapq
+import multiprocessing
+import os
+import re
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import filterfalse
+from operator import attrgetter
+from types import MappingProxyType
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
+
+from docker_volume_analyzer.query import NameIndex, NameQuery
+
+_NO_CHILDREN = MappingProxyType({})
+# A 'du' record spans until the next line starting with a size and a tab,
+# so that names containing newlines are kept whole.
+_DU_RECORD = re.compile(r"^(\d+)\t(.*?)\n?(?=^\d+\t|\Z)", re.M | re.S)
 
 
-@dataclass
 class FileNode:
     """
     Represents a file or directory in the file system.
 
+    Nodes are kept compact as volume trees can hold millions of them: they
+    have no instance dictionary, the children mapping is only allocated
+    for directories having children, the modification time is stored as
+    an integer timestamp, and mode and owner strings are interned.
+
     Attributes:
         name (str): The name of the file or directory.
         path (str): The full path of the file or directory.
         size (int): The size of the file in bytes.
-        mtime (datetime): The last modified time of the file or directory.
+        mtime_epoch (int): The last modified time as a Unix timestamp.
         mode (str): The file mode (permissions) as a string.
         user (str): The owner of the file or directory.
         group (str): The group owner of the file or directory.
         is_directory (bool): True if the node is a directory,
         False if it is a file.
-        childrens (Dict[str, "FileNode"]): A dictionary of child nodes
-        where the key is the child's name.
         parent (Optional["FileNode"]): A reference to the parent node
         or None if it is the root.
     """
 
-    name: str
-    path: str
-    size: int
-    mtime: datetime
-    mode: str
-    user: str
-    group: str
-    is_directory: bool
-    childrens: Dict[str, "FileNode"] = field(default_factory=dict)
-    parent: Optional["FileNode"] = None
+    __slots__ = (
+        "name",
+        "path",
+        "size",
+        "mtime_epoch",
+        "mode",
+        "user",
+        "group",
+        "is_directory",
+        "parent",
+        "_childrens",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        size: int,
+        mtime: Union[datetime, int],
+        mode: str,
+        user: str,
+        group: str,
+        is_directory: bool,
+        childrens: Optional[Dict[str, "FileNode"]] = None,
+        parent: Optional["FileNode"] = None,
+    ):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime_epoch = int(
+            mtime.timestamp() if isinstance(mtime, datetime) else mtime
+        )
+        self.mode = sys.intern(mode)
+        self.user = sys.intern(user)
+        self.group = sys.intern(group)
+        self.is_directory = is_directory
+        self.parent = parent
+        self._childrens = dict(childrens) if childrens else None
+
+    @property
+    def mtime(self) -> datetime:
+        """The last modified time of the file or directory."""
+        return datetime.fromtimestamp(self.mtime_epoch)
+
+    @mtime.setter
+    def mtime(self, value: Union[datetime, int]) -> None:
+        if isinstance(value, datetime):
+            value = value.timestamp()
+        self.mtime_epoch = int(value)
+
+    @property
+    def childrens(self) -> Mapping[str, "FileNode"]:
+        """
+        The child nodes where the key is the child's name. Use `add_child`
+        and `remove_child` to modify them.
+        """
+        if self._childrens is None:
+            return _NO_CHILDREN
+        return self._childrens
+
+    def add_child(self, node: "FileNode") -> None:
+        """
+        Adds a child node and makes this node its parent.
+
+        Args:
+            node (FileNode): The child node.
+        """
+        if self._childrens is None:
+            self._childrens = {}
+        self._childrens[node.name] = node
+        node.parent = self
+
+    def remove_child(self, name: str) -> None:
+        """
+        Removes a child node.
+
+        Args:
+            name (str): The name of the child node.
+        """
+        del self._childrens[name]
+        if not self._childrens:
+            self._childrens = None
+
+    def __repr__(self) -> str:
+        kind = "directory" if self.is_directory else "file"
+        return f"FileNode({self.path!r}, {kind}, size={self.size})"
 
 
 class FileSystem:
@@ -45,8 +152,18 @@ class FileSystem:
         root (FileNode): The root node of the file system.
         index (Dict[str, FileNode]): A dictionary mapping relative
         paths to their corresponding FileNode.
+        malformed (int): Number of scan records which could not be parsed.
     """
 
+    # Keys of the sorted children views
+    SORT_KEYS = {
+        "name": attrgetter("name"),
+        "size": attrgetter("size"),
+        "mtime": attrgetter("mtime_epoch"),
+    }
+    # Number of largest files and directories kept by the size index
+    LARGEST_INDEX_SIZE = 1000
+
     def __init__(self):
         self.root = FileNode(
             name="",
@@ -59,30 +176,156 @@ class FileSystem:
             is_directory=True,
         )
         self.index = {"": self.root}
+        self.malformed = 0
+        self._open_directories = [self.root]
+        self._sorted_children = {}
+        self._largest = None
+        self._names = None
 
     def add_node(self, node: FileNode):
-        parts = node.path.strip("/").split("/")
-        current = self.root
-        full_path = ""
-
-        for i, part in enumerate(parts):
-            full_path = "/".join(parts[: i + 1])
-            if full_path not in self.index:
-                is_last = i == len(parts) - 1
-                n = FileNode(
-                    name=part,
-                    path=full_path,
-                    size=node.size if is_last else 0,
-                    mtime=node.mtime,
-                    mode=node.mode,
-                    user=node.user,
-                    group=node.group,
-                    is_directory=node.is_directory if is_last else True,
-                    parent=current,
+        """
+        Adds a node, creating its missing parent directories with the
+        attributes of the node. Nodes whose path is already known are
+        ignored.
+
+        The chain of directories opened last is kept, so that entries
+        listed parents first, as 'find' does, are inserted in constant
+        amortized time instead of looking up every prefix of their path.
+
+        Args:
+            node (FileNode): The node to insert; its name and path are
+            normalized from its path.
+        """
+        path = node.path.strip("/")
+        if path not in self.index:
+            self._forget_views()
+            self._insert(node, path)
+
+    def add_entry(
+        self,
+        path: str,
+        size: int,
+        mtime: int,
+        mode: str,
+        user: str,
+        group: str,
+        is_directory: bool,
+    ) -> None:
+        """
+        Adds an entry from its attributes, as add_node does.
+
+        Args:
+            path (str): The path relative to the root.
+            size (int): The size in bytes.
+            mtime (int): The last modified time as a Unix timestamp.
+            mode (str): The file mode (permissions) as a string.
+            user (str): The owner.
+            group (str): The group owner.
+            is_directory (bool): True if the entry is a directory.
+        """
+        self.add_entries(
+            (
+                (
+                    path.strip("/"),
+                    size,
+                    mtime,
+                    sys.intern(mode),
+                    sys.intern(user),
+                    sys.intern(group),
+                    is_directory,
+                ),
+            )
+        )
+
+    def add_entries(self, entries: Iterable[tuple]) -> None:
+        """
+        Adds entries from their attributes, as add_entry does, with the
+        lowest possible overhead per entry: paths must have no leading or
+        trailing '/', and strings are stored as given, without interning.
+
+        Args:
+            entries (Iterable[tuple]): (path, size, mtime, mode, user,
+            group, is_directory) tuples.
+        """
+        self._forget_views()
+        index = self.index
+        new_node = FileNode.__new__
+        parent = self._open_directories[-1]
+        prefix = f"{parent.path}/" if parent.path else ""
+        for path, size, mtime, mode, user, group, is_directory in entries:
+            if path in index:
+                continue
+            cut = path.rfind("/") + 1
+            if cut != len(prefix) or not path.startswith(prefix):
+                parent = self._parent_directory(
+                    path[: cut - 1] if cut else "", mtime, mode, user, group
+                )
+                prefix = path[:cut]
+            # Same as FileNode(...), without the cost of the call.
+            node = new_node(FileNode)
+            node.name = name = path[cut:]
+            node.path = path
+            node.size = size
+            node.mtime_epoch = mtime
+            node.mode = mode
+            node.user = user
+            node.group = group
+            node.is_directory = is_directory
+            node.parent = parent
+            node._childrens = None
+            if parent._childrens is None:
+                parent._childrens = {name: node}
+            else:
+                parent._childrens[name] = node
+            index[path] = node
+            if is_directory:
+                self._open_directories.append(node)
+
+    def _insert(self, node: FileNode, path: str) -> None:
+        parent = self._parent_directory(
+            path.rpartition("/")[0],
+            node.mtime_epoch,
+            node.mode,
+            node.user,
+            node.group,
+        )
+        node.name = path.rpartition("/")[2]
+        node.path = path
+        parent.add_child(node)
+        self.index[path] = node
+        if node.is_directory:
+            self._open_directories.append(node)
+
+    def _parent_directory(
+        self, parent_path: str, mtime: int, mode: str, user: str, group: str
+    ) -> FileNode:
+        stack = self._open_directories
+        while len(stack) > 1 and not (
+            parent_path == stack[-1].path
+            or parent_path.startswith(f"{stack[-1].path}/")
+        ):
+            stack.pop()
+        current = stack[-1]
+        while current.path != parent_path:
+            remaining = parent_path[len(current.path) :].lstrip("/")
+            name = remaining.split("/", 1)[0]
+            child = current.childrens.get(name)
+            if child is None:
+                child = FileNode(
+                    name=name,
+                    path=f"{current.path}/{name}".lstrip("/"),
+                    size=0,
+                    mtime=mtime,
+                    mode=mode,
+                    user=user,
+                    group=group,
+                    is_directory=True,
                 )
-                current.childrens[part] = n
-                self.index[full_path] = n
-            current = self.index[full_path]
+                current.add_child(child)
+                self.index[child.path] = child
+            stack.append(child)
+            current = child
+        return current
 
     def delete_node(self, path: str) -> "FileSystem":
         """
@@ -106,17 +349,22 @@ class FileSystem:
             for child in list(node.childrens.values()):
                 delete_recursively(child)
             del self.index[node.path]
+            self._sorted_children.pop(node.path, None)
 
         delete_recursively(node_to_delete)
+        self._open_directories = [self.root]
+        self._largest = None
+        self._names = None
 
         if node_to_delete.parent:
             parent = node_to_delete.parent
-            del parent.childrens[node_to_delete.name]
+            parent.remove_child(node_to_delete.name)
 
             size_change = node_to_delete.size
             current = parent
             while current:
                 current.size -= size_change
+                self._sorted_children.pop(current.path, None)
                 current = current.parent
 
         return self
@@ -126,24 +374,605 @@ class FileSystem:
         Compute the total size of each directory by summing the sizes
         of its files, subdirectories,
         and the directory's own size (e.g., 4 KB for metadata).
+
+        Parents are always indexed before their children, so walking the
+        index backwards adds every node to its parent after all of its
+        own descendants, in a single pass.
         """
-        for path in sorted(
-            self.index.keys(), key=lambda x: x.count("/"), reverse=True
-        ):
-            node = self.index[path]
-            if node.is_directory:
-                total_size = node.size
+        for node in reversed(self.index.values()):
+            if node.parent is not None:
+                node.parent.size += node.size
+
+        self._forget_views()
+        return self
+
+    def sorted_children(
+        self, path: str, key: str = "name", reverse: bool = False
+    ) -> List[FileNode]:
+        """
+        Returns the children of a directory sorted by name, size or
+        modification time. Each view is sorted once, then kept until the
+        directory or the sizes change.
+
+        Args:
+            path (str): The path of the directory.
+            key (str): "name", "size" or "mtime".
+            reverse (bool): True to sort in descending order.
+
+        Returns:
+            List[FileNode]: The children, none if the directory does not
+            exist.
+        """
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{key}'.")
+        views = self._sorted_children.setdefault(path, {})
+        view = views.get((key, reverse))
+        if view is None:
+            directory = self.index.get(path)
+            view = views[(key, reverse)] = sorted(
+                directory.childrens.values() if directory else (),
+                key=self.SORT_KEYS[key],
+                reverse=reverse,
+            )
+        return view
+
+    def largest(
+        self, count: int = 50, directories: bool = False
+    ) -> List[FileNode]:
+        """
+        Returns the largest files, or directories, largest first.
+
+        The LARGEST_INDEX_SIZE largest files and directories are indexed
+        by the first query, so that following queries do not walk the
+        tree until it changes. Larger counts always walk it.
+
+        Args:
+            count (int): The number of nodes to return.
+            directories (bool): True to return directories, the root
+            excepted, instead of files.
+
+        Returns:
+            List[FileNode]: The largest nodes.
+        """
+        if count > self.LARGEST_INDEX_SIZE:
+            return self._largest_nodes(count, directories)
+        if self._largest is None:
+            self._largest = (
+                self._largest_nodes(self.LARGEST_INDEX_SIZE, False),
+                self._largest_nodes(self.LARGEST_INDEX_SIZE, True),
+            )
+        return self._largest[directories][:count]
+
+    def _largest_nodes(self, count: int, directories: bool) -> List[FileNode]:
+        return heapq.nlargest(
+            count,
+            (
+                node
+                for node in self.index.values()
+                if node.is_directory == directories and node.parent is not None
+            ),
+            key=attrgetter("size"),
+        )
+
+    def search(
+        self,
+        pattern: str = "*",
+        syntax: str = "glob",
+        min_size: int = 0,
+        older_than: Optional[timedelta] = None,
+        user: Optional[str] = None,
+        under: str = "",
+    ) -> Iterator[FileNode]:
+        """
+        Yields the nodes whose name matches a pattern, as they are found.
+
+        Nodes are indexed by name and suffix by the first search, so that
+        following searches only test each distinct name once, or look up
+        exact names and '*.ext' patterns directly, until the tree changes.
+
+        Args:
+            pattern (str): The name pattern.
+            syntax (str): "glob", "regex" or "suffix" (see NameQuery).
+            min_size (int): The minimum size in bytes.
+            older_than (timedelta | None): Only nodes last modified longer
+            ago than this.
+            user (str | None): Only nodes owned by this user.
+            under (str): Only nodes below this directory.
+
+        Raises:
+            ValueError: If the pattern is invalid.
+        """
+        query = NameQuery(pattern, syntax)
+        if self._names is None:
+            with _paused_gc():
+                self._names = NameIndex(
+                    (node.name, node)
+                    for node in self.index.values()
+                    if node.parent is not None
+                )
+        before = (
+            time.time() - older_than.total_seconds()
+            if older_than is not None
+            else None
+        )
+        under = under.strip("/")
+        prefix = f"{under}/" if under else ""
+        for node in self._names.match(query):
+            if (
+                node.size >= min_size
+                and (before is None or node.mtime_epoch < before)
+                and (user is None or node.user == user)
+                and node.path.startswith(prefix)
+            ):
+                yield node
+
+    def file_columns(self, batch_size: int = 2**20) -> Iterator[tuple]:
+        """
+        Yields the attributes of the files (directories excluded) by
+        batches of columns, for aggregations which do not handle the
+        files one by one.
+
+        Args:
+            batch_size (int): The number of files of each batch.
+
+        Yields:
+            tuple: The sizes, mtimes, users and groups of a batch of files,
+            and their names as a single string, each name followed by NUL.
+        """
+        files = list(
+            filterfalse(attrgetter("is_directory"), self.index.values())
+        )
+        for start in range(0, len(files), batch_size):
+            batch = files[start : start + batch_size]
+            yield (
+                list(map(attrgetter("size"), batch)),
+                list(map(attrgetter("mtime_epoch"), batch)),
+                list(map(attrgetter("user"), batch)),
+                list(map(attrgetter("group"), batch)),
+                "\0".join(map(attrgetter("name"), batch)) + "\0",
+            )
+
+    def _forget_views(self) -> None:
+        self._sorted_children.clear()
+        self._largest = None
+        self._names = None
+
+
+@contextmanager
+def _paused_gc():
+    """
+    Pauses the cyclic garbage collector while a tree is built: the millions
+    of long-lived nodes allocated would otherwise trigger repeated full
+    collections, although none of them is garbage.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _InternedStrings(dict):
+    """
+    Maps raw owner and mode fields to interned strings, decoding each
+    distinct value once.
+    """
+
+    def __missing__(self, value: bytes) -> str:
+        string = self[value] = sys.intern(value.decode())
+        return string
+
+
+class _EntryColumns:
+    """
+    Compact columns of parsed entries, filled through the add_entries
+    interface of FileSystem: the partial result sent back by a parallel
+    parsing worker. Owners and modes are stored as codes of a string table,
+    so that each entry pickles as a few machine integers and its path.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.strings = {}
+        self.codes = array("I")
+        self.is_directory = bytearray()
+        self.malformed = 0
+
+    def add_entries(self, entries: Iterable[tuple]) -> None:
+        add_path, add_size = self.paths.append, self.sizes.append
+        add_mtime, add_code = self.mtimes.append, self.codes.append
+        add_is_directory = self.is_directory.append
+        strings = self.strings
+        for path, size, mtime, mode, user, group, is_directory in entries:
+            add_path(path)
+            add_size(size)
+            add_mtime(mtime)
+            add_code(strings.setdefault(mode, len(strings)))
+            add_code(strings.setdefault(user, len(strings)))
+            add_code(strings.setdefault(group, len(strings)))
+            add_is_directory(is_directory)
+
+    def entries(self) -> Iterator[tuple]:
+        """
+        Yields the entries back, with interned strings.
+        """
+        table = [sys.intern(string) for string in self.strings]
+        # Mode, user and group are consecutive codes: zip takes them in
+        # order from the same iterator.
+        strings = map(table.__getitem__, self.codes)
+        return zip(
+            self.paths,
+            self.sizes,
+            self.mtimes,
+            strings,
+            strings,
+            strings,
+            map(bool, self.is_directory),
+        )
+
 
-                for child in node.childrens.values():
-                    total_size += child.size
+def _parse_piece(piece: Union[str, bytes], strip_prefix: str) -> _EntryColumns:
+    """
+    Parses a piece of output made of whole lines (str) or whole record
+    batches (bytes), in a worker process.
+    """
+    builder = FileSystemBuilder(strip_prefix, _EntryColumns)
+    if isinstance(piece, str):
+        builder.feed(piece.split("\n"))
+    else:
+        builder.feed_records((piece,))
+    return builder.fs
 
-                node.size = total_size
 
+def _split_pieces(
+    data: Union[str, bytes], separator: Union[str, bytes], size: int
+) -> Iterator[Union[str, bytes]]:
+    """
+    Splits data into pieces of about `size`, each one ending with a
+    separator (except the last one).
+    """
+    start = 0
+    while start < len(data):
+        end = data.find(separator, start + size)
+        end = len(data) if end < 0 else end + len(separator)
+        yield data[start:end]
+        start = end
+
+
+class _ParallelParser:
+    """
+    Parses pieces of output in a pool of processes, and adds their entries
+    to the file system of a builder in order, as soon as they are parsed.
+    At most two pieces per worker are queued, bounding the memory used.
+
+    Workers are started by a fork server rather than forked from the
+    caller, which runs other threads (the TUI, the web server): forking a
+    threaded process can deadlock on a lock held at fork time.
+    """
+
+    def __init__(self, builder: "FileSystemBuilder", workers: int):
+        self.builder = builder
+        self.pool = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("forkserver")
+        )
+        self.max_pending = 2 * workers
+        self.pending = deque()
+
+    def __enter__(self) -> "_ParallelParser":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        try:
+            if exc_type is None:
+                while self.pending:
+                    self._merge_next()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+    def submit(self, piece: Union[str, bytes]) -> None:
+        if len(self.pending) >= self.max_pending:
+            self._merge_next()
+        self.pending.append(
+            self.pool.submit(_parse_piece, piece, self.builder.strip_prefix)
+        )
+        while self.pending and self.pending[0].done():
+            self._merge_next()
+
+    def _merge_next(self) -> None:
+        columns = self.pending.popleft().result()
+        fs = self.builder.fs
+        fs.add_entries(columns.entries())
+        fs.malformed += columns.malformed
+
+
+class FileSystemBuilder:
+    """
+    Incrementally builds a FileSystem from the output of a 'find' scan.
+
+    Two formats are understood:
+
+    - lines of '%F|%n|%s|%A|%U|%G|%Y' stat records (`feed_line`, `feed`),
+    - NUL-delimited record batches (`feed_chunk`, `feed_records`), as
+      written by DockerClient.NUL_BATCH_SCRIPT: the number of entries of
+      the batch, their paths, then six stat fields per entry ('%F', '%s',
+      '%A', '%U', '%G', '%Y'), each field being terminated by a NUL byte,
+      and an empty field ending the batch. As NUL cannot appear in a file
+      name, any path is supported, and the records are parsed from bytes
+      without decoding anything but paths.
+
+    Output can be fed as soon as it is produced by the helper container;
+    the partially built file system is available through the `fs` attribute
+    while the scan is still running. Records which cannot be parsed are
+    counted in `fs.malformed`.
+
+    Parsing is bound to a single core: once `parallel_threshold` bytes of
+    records have been fed, the rest of the output is split into pieces of
+    whole batches (of about PIECE_SIZE bytes) parsed by a pool of
+    `workers` processes, while the main process only merges their compact
+    results. Small volumes never pay the start-up cost of the pool.
+
+    Attributes:
+        fs (FileSystem): The file system being built, created by
+        `fs_factory` (FileSystem, or ColumnarFileSystem for large volumes).
+        strip_prefix (str): The prefix stripped from each path.
+        parallel_threshold (int | None): Size of output above which it is
+        parsed in parallel, or None (or a single worker) to always parse it
+        in this process.
+        workers (int): Number of parsing processes, defaults to the number
+        of CPUs.
+    """
+
+    PIECE_SIZE = 4 * 2**20
+
+    def __init__(
+        self,
+        strip_prefix: str = "/mnt/docker_volume",
+        fs_factory: Callable[[], FileSystem] = FileSystem,
+        parallel_threshold: Optional[int] = None,
+        workers: Optional[int] = None,
+    ):
+        self.fs = fs_factory()
+        self.strip_prefix = strip_prefix
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = (
+            parallel_threshold if self.workers > 1 else None
+        )
+        self._prefix = strip_prefix.encode()
+        self._strings = _InternedStrings()
+        self._buffer = bytearray()
+
+    def feed_line(self, line: str) -> None:
+        """
+        Parses one line of 'find' output and adds it to the file system.
+
+        Args:
+            line (str): A '%F|%n|%s|%A|%U|%G|%Y' stat record.
+        """
+        self.fs.add_entries(self._parse_lines((line,)))
+
+    def feed(self, lines: Iterable[str]) -> "FileSystemBuilder":
+        """
+        Parses every line of an iterable, consuming it lazily.
+
+        Args:
+            lines (Iterable[str]): Lines of 'find' output.
+
+        Returns:
+            FileSystemBuilder: The builder itself.
+        """
+        with _paused_gc():
+            self.fs.add_entries(self._parse_lines(lines))
         return self
 
+    def _parse_lines(self, lines: Iterable[str]) -> Iterator[tuple]:
+        prefix, prefix_length = self.strip_prefix, len(self.strip_prefix)
+        intern = sys.intern
+        for line in lines:
+            if not line:
+                continue
+            try:
+                type_str, path, size, mode, user, group, mtime = line.split(
+                    "|"
+                )
+                entry = (
+                    (
+                        path[prefix_length:]
+                        if path.startswith(prefix)
+                        else path
+                    ).strip("/"),
+                    int(size),
+                    int(mtime),
+                    intern(mode),
+                    intern(user),
+                    intern(group),
+                    type_str == "directory",
+                )
+            except ValueError:
+                self.fs.malformed += 1
+                continue
+            yield entry
+
+    def feed_chunk(self, chunk: Union[bytes, memoryview]) -> None:
+        """
+        Parses the NUL-delimited batches completed by a chunk of output.
+        Incomplete batches are kept until the next chunks.
+
+        Batches are found in place in the buffer, where no field is empty
+        and two NUL bytes end a batch, and each one is copied out once.
+
+        Args:
+            chunk (bytes | memoryview): A chunk of output, of any size.
+        """
+        buffer = self._buffer
+        # The end of a batch may straddle the previous chunk.
+        end = max(len(buffer) - 1, 0)
+        buffer += chunk
+        end = buffer.find(b"\0\0", end)
+        if end < 0:
+            return
+        position = 0
+        with memoryview(buffer) as view:
+            while end >= 0:
+                self._feed_batch(bytes(view[position:end]))
+                position = end + 2
+                end = buffer.find(b"\0\0", position)
+        del buffer[:position]
+
+    def feed_records(self, chunks: Iterable[bytes]) -> "FileSystemBuilder":
+        """
+        Parses NUL-delimited batches from an iterable of chunks, consuming
+        it lazily.
+
+        Args:
+            chunks (Iterable[bytes]): Chunks of output.
+
+        Returns:
+            FileSystemBuilder: The builder itself.
+        """
+        chunks = iter(chunks)
+        received = 0
+        with _paused_gc():
+            for chunk in chunks:
+                self.feed_chunk(chunk)
+                received += len(chunk)
+                if (
+                    self.parallel_threshold is not None
+                    and received >= self.parallel_threshold
+                ):
+                    self._feed_records_in_parallel(chunks)
+                    break
+        if self._buffer:
+            # Truncated output.
+            self.fs.malformed += 1
+            self._buffer.clear()
+        return self
+
+    def _feed_records_in_parallel(self, chunks: Iterator[bytes]) -> None:
+        """
+        Parses the remaining chunks in pieces of whole batches, ending with
+        the empty field terminating each batch. The incomplete batch
+        left in the buffer by feed_chunk starts the first piece.
+        """
+        buffer = self._buffer
+        with _ParallelParser(self, self.workers) as parser:
+            for chunk in chunks:
+                buffer += chunk
+                if len(buffer) < self.PIECE_SIZE:
+                    continue
+                # No field is empty: two NUL bytes end a batch.
+                cut = buffer.rfind(b"\0\0") + 2
+                if cut > 1:
+                    parser.submit(bytes(buffer[:cut]))
+                    del buffer[:cut]
+            if buffer:
+                parser.submit(bytes(buffer))
+                buffer.clear()
+
+    def feed_pieces(
+        self, pieces: Iterable[Union[str, bytes]]
+    ) -> "FileSystemBuilder":
+        """
+        Parses pieces of output in a pool of processes.
+
+        Args:
+            pieces (Iterable[str | bytes]): Pieces made of whole lines (str)
+            or whole NUL-delimited batches (bytes).
+
+        Returns:
+            FileSystemBuilder: The builder itself.
+        """
+        with _paused_gc(), _ParallelParser(self, self.workers) as parser:
+            for piece in pieces:
+                parser.submit(piece)
+        return self
+
+    def _feed_batch(self, batch: bytes) -> None:
+        """
+        Adds the entries of a batch, without its terminating NUL bytes.
+        Columns are converted at once rather than record by record: the
+        stat fields are split from the end of the batch, leaving the paths
+        joined by NUL bytes, as they are decoded.
+        """
+        header = batch.find(b"\0")
+        try:
+            count = int(batch[:header]) if header > 0 else 0
+        except ValueError:
+            count = 0
+        if count <= 0:
+            # Not a batch header: the batch is dropped.
+            self.fs.malformed += 1
+            return
+        stats = batch.rsplit(b"\0", 6 * count)
+        paths = stats.pop(0)[header + 1 :]
+        if len(stats) != 6 * count or paths.count(b"\0") != count - 1:
+            self.fs.malformed += 1
+            return
+        # Strip the prefix and the leading '/' of every path at once. Only
+        # the scanned directory itself is left with its full path.
+        paths = (
+            (b"\0" + paths)
+            .replace(b"\0" + self._prefix.rstrip(b"/") + b"/", b"\0")[1:]
+            .decode("utf-8", "surrogateescape")
+            .split("\0")
+        )
+        if paths[0] == self.strip_prefix.rstrip("/"):
+            paths[0] = ""
+        strings = self._strings
+        try:
+            sizes = list(map(int, stats[1::6]))
+            mtimes = list(map(int, stats[5::6]))
+            valid = True
+        except ValueError:
+            sizes, mtimes = self._parse_integers(stats)
+            valid = False
+        entries = zip(
+            paths,
+            sizes,
+            mtimes,
+            map(strings.__getitem__, stats[2::6]),
+            map(strings.__getitem__, stats[3::6]),
+            map(strings.__getitem__, stats[4::6]),
+            map(b"directory".__eq__, stats[0::6]),
+        )
+        if not valid:
+            entries = (entry for entry in entries if entry[1] is not None)
+        self.fs.add_entries(entries)
+
+    def _parse_integers(self, stats: List[bytes]):
+        """
+        Slow path of _feed_batch for batches with malformed records, which
+        are counted and get a None size.
+        """
+        sizes, mtimes = [], []
+        for size, mtime in zip(stats[1::6], stats[5::6]):
+            try:
+                size, mtime = int(size), int(mtime)
+            except ValueError:
+                self.fs.malformed += 1
+                size = mtime = None
+            sizes.append(size)
+            mtimes.append(mtime)
+        return sizes, mtimes
+
+    def build(self) -> FileSystem:
+        """
+        Returns the file system built so far.
+
+        Returns:
+            FileSystem: The built file system.
+        """
+        return self.fs
+
 
 def parse_find_output(
-    output: str, strip_prefix: str = "/mnt/docker_volume"
+    output: str,
+    strip_prefix: str = "/mnt/docker_volume",
+    parallel_threshold: Optional[int] = None,
+    workers: Optional[int] = None,
 ) -> FileSystem:
     """
     Parses the output of the 'find' command with stat
@@ -153,32 +982,100 @@ def parse_find_output(
         output (str): The output string from the 'find' command,
         strip_prefix (str): A prefix to strip from the path in the output
         default is '/mnt/docker_volume'.
+        parallel_threshold (int | None): Length of output from which it is
+        parsed by a pool of processes (never by default).
+        workers (int | None): Number of processes of the pool.
 
     Returns:
         FileSystem: An instance of FileSystem containing the parsed file nodes.
     """
-    fs = FileSystem()
-    for line in output.strip().split("\n"):
-        try:
-            type_str, path, size, mode, user, group, mtime = line.split("|")
+    builder = FileSystemBuilder(
+        strip_prefix, parallel_threshold=parallel_threshold, workers=workers
+    )
+    threshold = builder.parallel_threshold
+    if threshold is not None and len(output) >= threshold:
+        builder.feed_pieces(_split_pieces(output, "\n", builder.PIECE_SIZE))
+    else:
+        builder.feed(output.strip().split("\n"))
+    return builder.build()
 
-            path = (
-                path[len(strip_prefix) :].lstrip("/")
-                if path.startswith(strip_prefix)
-                else path.lstrip("/")
-            )
 
-            node = FileNode(
-                name=path.split("/")[-1],
-                path=path,
-                size=int(size),
-                mtime=datetime.fromtimestamp(int(mtime)),
-                mode=mode,
-                user=user,
-                group=group,
-                is_directory=(type_str == "directory"),
-            )
-            fs.add_node(node)
-        except Exception as e:
-            print(f"Skipping malformed line: {line} ({e})")
+def parse_find_records(
+    data: Union[bytes, memoryview],
+    strip_prefix: str = "/mnt/docker_volume",
+    fs_factory: Callable[[], FileSystem] = FileSystem,
+    parallel_threshold: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> FileSystem:
+    """
+    Parses NUL-delimited 'find' record batches and builds a FileSystem.
+
+    Args:
+        data (bytes | memoryview): The complete output of the scan.
+        strip_prefix (str): A prefix to strip from the paths.
+        fs_factory (Callable): Creates the file system.
+        parallel_threshold (int | None): Size of output from which it is
+        parsed by a pool of processes (never by default).
+        workers (int | None): Number of processes of the pool.
+
+    Returns:
+        FileSystem: The parsed file system.
+    """
+    builder = FileSystemBuilder(
+        strip_prefix, fs_factory, parallel_threshold, workers
+    )
+    threshold = builder.parallel_threshold
+    if threshold is not None and len(data) >= threshold:
+        builder.feed_pieces(
+            _split_pieces(bytes(data), b"\0\0", builder.PIECE_SIZE)
+        )
+    else:
+        builder.feed_records([data])
+    return builder.build()
+
+
+def parse_du_output(
+    output: str, strip_prefix: str = "/mnt/docker_volume"
+) -> Dict[str, int]:
+    """
+    Parses the output of 'du -k' into directory totals.
+
+    Args:
+        output (str): Lines of '<KiB>\\t<path>' records.
+        strip_prefix (str): A prefix to strip from the paths.
+
+    Returns:
+        dict: Disk usage in bytes of each directory, by relative path.
+    """
+    prefix = strip_prefix.rstrip("/")
+    totals = {}
+    for size, path in _DU_RECORD.findall(output):
+        if path == prefix or path.startswith(f"{prefix}/"):
+            path = path[len(prefix) :]
+        totals[path.strip("/")] = int(size) * 1024
+    return totals
+
+
+def add_directory_totals(
+    totals: Mapping[str, int], fs: Optional[FileSystem] = None
+) -> FileSystem:
+    """
+    Adds directories with their total size, as parsed by parse_du_output,
+    to a file system. Directories have no metadata but their size, which
+    must not be computed again.
+
+    Args:
+        totals (Mapping): Total size of each directory, by relative path.
+        fs (FileSystem | None): File system to add the directories to,
+        a new one by default.
+
+    Returns:
+        FileSystem: The file system the directories were added to.
+    """
+    fs = fs if fs is not None else FileSystem()
+    fs.add_entries(
+        (path, size, 0, "", "", "", True) for path, size in totals.items()
+    )
+    for path, size in totals.items():
+        fs.index[path].size = size
     return fs
@@ -0,0 +1,385 @@
+import fcntl
+import os
+import shlex
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Generator,
+    Iterator,
+    List,
+    Tuple,
+    Union,
+)
+
+import docker
+from docker.models.containers import Container
+
+
+class HelperContainerPool:
+    """
+    Pool of long-lived Alpine helper containers reused through 'exec_run'.
+
+    Mounts cannot be changed once a container is created, so one warm
+    container is started on demand for each distinct set of mounted
+    volumes. Containers left idle for longer than `idle_timeout` seconds
+    are torn down by a background reaper, and a container found dead when
+    a command is executed is transparently replaced.
+
+    A container is busy from the start of each command until it returns,
+    or until its output stream is exhausted or closed, and is never
+    reaped while busy: a scan may run for longer than the idle timeout.
+
+    Warm containers are labelled with the pool owning them, which holds an
+    flock on an owner file of the temporary directory while it lives. A
+    new pool removes the warm containers of the pools of this host whose
+    owner file is no longer locked, left running by a process which
+    crashed, without touching those of live processes, such as the other
+    Gunicorn workers.
+
+    Attributes:
+        client (docker.DockerClient): The Docker SDK client.
+        idle_timeout (float): Idle time in seconds before a helper
+        container is removed.
+        image (str): Image used by the helper containers.
+    """
+
+    LABEL = "docker-volume-analyzer.helper"
+    OWNER_LABEL = "docker-volume-analyzer.helper-pool"
+
+    def __init__(
+        self,
+        client: docker.DockerClient,
+        idle_timeout: float = 300,
+        image: str = "alpine",
+    ):
+        self.client = client
+        self.idle_timeout = idle_timeout
+        self.image = image
+        self._containers = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._reaper = None
+        self._token = uuid.uuid4().hex
+        self._owner_file = self._lock_owner(self._token)
+        self._remove_orphans()
+
+    @staticmethod
+    def _owner_path(token: str) -> str:
+        return os.path.join(
+            tempfile.gettempdir(), f"docker-volume-analyzer-helpers-{token}"
+        )
+
+    def _lock_owner(self, token: str) -> IO:
+        """
+        Creates the owner file of a pool, locked until it is closed. The
+        file is locked before being moved in place, so that it is never
+        seen unlocked.
+        """
+        fd, temp_path = tempfile.mkstemp(
+            dir=tempfile.gettempdir(), suffix=".tmp"
+        )
+        owner_file = os.fdopen(fd, "w")
+        fcntl.flock(owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.replace(temp_path, self._owner_path(token))
+        return owner_file
+
+    def _remove_orphans(self) -> None:
+        """
+        Removes the warm containers of the dead pools of this host.
+        """
+        try:
+            containers = self.client.containers.list(
+                filters={"label": self.OWNER_LABEL}
+            )
+        except docker.errors.APIError:
+            return
+        hostname = socket.gethostname()
+        for container in containers:
+            host, _, token = container.labels.get(
+                self.OWNER_LABEL, ""
+            ).partition("/")
+            if host == hostname and token and not self._owner_alive(token):
+                self._remove(container)
+
+    def _owner_alive(self, token: str) -> bool:
+        """
+        Tells whether the pool owning a token still holds its owner file,
+        removing the file of a dead pool.
+        """
+        path = self._owner_path(token)
+        try:
+            owner_file = open(path)
+        except FileNotFoundError:
+            return False
+        with owner_file:
+            try:
+                fcntl.flock(owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return False
+
+    @staticmethod
+    def _key(volumes_binding: dict) -> Tuple:
+        return tuple(
+            sorted(
+                (name, bind["mode"]) for name, bind in volumes_binding.items()
+            )
+        )
+
+    def _start(self, volumes_binding: dict) -> Container:
+        return self.client.containers.run(
+            image=self.image,
+            command=["tail", "-f", "/dev/null"],
+            volumes=volumes_binding,
+            labels={
+                self.LABEL: "true",
+                self.OWNER_LABEL: f"{socket.gethostname()}/{self._token}",
+            },
+            auto_remove=True,
+            detach=True,
+        )
+
+    def _acquire(self, volumes_binding: dict) -> dict:
+        """
+        Returns the entry of the warm container for a set of volumes,
+        starting it if needed, marked busy until released.
+
+        The container is started outside of the pool lock, which a slow
+        start (pulling the image) would hold for every other set of
+        volumes: its entry is a busy placeholder until it is started, for
+        which the callers of the same set of volumes wait.
+        """
+        key = self._key(volumes_binding)
+        while True:
+            with self._lock:
+                entry = self._containers.get(key)
+                if entry is None:
+                    entry = self._containers[key] = {
+                        "container": None,
+                        "busy": 1,
+                        "last_used": time.monotonic(),
+                        "started": threading.Event(),
+                    }
+                    break
+                entry["busy"] += 1
+                entry["last_used"] = time.monotonic()
+            entry["started"].wait()
+            if entry["container"] is not None:
+                return entry
+            # Its start failed: start it again.
+            self._release(entry)
+        try:
+            entry["container"] = self._start(volumes_binding)
+        except BaseException:
+            with self._lock:
+                if self._containers.get(key) is entry:
+                    del self._containers[key]
+            raise
+        finally:
+            entry["started"].set()
+        with self._lock:
+            self._ensure_reaper()
+        return entry
+
+    def _release(self, entry: dict) -> None:
+        with self._lock:
+            entry["busy"] -= 1
+            entry["last_used"] = time.monotonic()
+
+    def _discard(self, volumes_binding: dict, entry: dict) -> None:
+        """
+        Removes a dead container, unless another caller already replaced it.
+        """
+        key = self._key(volumes_binding)
+        with self._lock:
+            if self._containers.get(key) is entry:
+                del self._containers[key]
+        self._remove(entry["container"])
+
+    @staticmethod
+    def _remove(container: Container) -> None:
+        try:
+            container.remove(force=True)
+        except docker.errors.APIError:
+            pass
+
+    def _exec(
+        self, volumes_binding: dict, execute: Callable[[Container], Any]
+    ) -> Tuple[dict, Any]:
+        """
+        Executes a command in the warm container, replacing it once
+        if it is no longer running.
+
+        Args:
+            volumes_binding (dict): Volumes mapping of the helper container.
+            execute (Callable): Starts the command in a container.
+
+        Returns:
+            tuple: The entry of the container, busy until released, and
+            the result of `execute`.
+        """
+        for retry in (True, False):
+            entry = self._acquire(volumes_binding)
+            try:
+                return entry, execute(entry["container"])
+            except docker.errors.APIError:
+                self._release(entry)
+                if not retry:
+                    raise
+                self._discard(volumes_binding, entry)
+            except BaseException:
+                self._release(entry)
+                raise
+
+    def exec_run(
+        self, command: Union[str, List[str]], volumes_binding: dict
+    ) -> Tuple[int, bytes]:
+        """
+        Runs a command in a warm helper container.
+
+        Args:
+            command (str | list): Command to execute.
+            volumes_binding (dict): Volumes mapping of the helper container.
+
+        Returns:
+            tuple: The exit code and the stdout of the command.
+        """
+        entry, result = self._exec(
+            volumes_binding,
+            lambda container: container.exec_run(
+                cmd=command, stdout=True, stderr=False
+            ),
+        )
+        self._release(entry)
+        return result.exit_code, result.output
+
+    def exec_stream(
+        self, command: Union[str, List[str]], volumes_binding: dict
+    ) -> Generator[bytes, None, int]:
+        """
+        Runs a command in a warm helper container and streams its stdout.
+
+        The command is started by a shell recording its PID, so that the
+        command and its children can be killed if the stream is closed
+        before its end, instead of running on in the warm container.
+
+        Args:
+            command (str | list): Command to execute.
+            volumes_binding (dict): Volumes mapping of the helper container.
+
+        Yields:
+            bytes: Chunks of the command output.
+
+        Returns:
+            int: The exit code of the command, once its output is exhausted.
+        """
+        if isinstance(command, str):
+            command = shlex.split(command)
+        pid_file = f"/tmp/{uuid.uuid4().hex}.pid"
+        cmd = [
+            "sh",
+            "-c",
+            f'echo $$ > {pid_file}; "$@"; status=$?; '
+            f"rm -f {pid_file}; exit $status",
+            "sh",
+            *command,
+        ]
+
+        def execute(container: Container) -> Tuple[str, Iterator[bytes]]:
+            # The low-level API keeps the exec ID, to read the exit code.
+            api = container.client.api
+            exec_id = api.exec_create(
+                container.id, cmd, stdout=True, stderr=False
+            )["Id"]
+            return exec_id, api.exec_start(exec_id, stream=True)
+
+        entry, (exec_id, output) = self._exec(volumes_binding, execute)
+        finished = False
+        try:
+            yield from output
+            finished = True
+            return entry["container"].client.api.exec_inspect(exec_id)[
+                "ExitCode"
+            ]
+        finally:
+            if not finished:
+                self._kill(entry["container"], pid_file)
+            self._release(entry)
+
+    @staticmethod
+    def _kill(container: Container, pid_file: str) -> None:
+        """
+        Kills the command started with a PID file, and its descendants.
+        """
+        try:
+            container.exec_run(
+                cmd=[
+                    "sh",
+                    "-c",
+                    'kill_tree() { for child in $(pgrep -P "$1"); do '
+                    'kill_tree "$child"; done; kill "$1" 2>/dev/null; }; '
+                    f"[ -f {pid_file} ] && kill_tree $(cat {pid_file}); "
+                    f"rm -f {pid_file}",
+                ],
+                stdout=False,
+                stderr=False,
+            )
+        except docker.errors.APIError:
+            pass
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(
+                target=self._reap_loop, name="helper-pool-reaper", daemon=True
+            )
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while not self._closed.wait(self.idle_timeout / 2):
+            self.reap_idle()
+
+    def reap_idle(self) -> None:
+        """
+        Removes the helper containers idle for longer than `idle_timeout`,
+        keeping those running a command.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [
+                key
+                for key, entry in self._containers.items()
+                if not entry["busy"] and entry["last_used"] < deadline
+            ]
+            entries = [self._containers.pop(key) for key in idle]
+        for entry in entries:
+            self._remove(entry["container"])
+
+    def close(self) -> None:
+        """
+        Stops the reaper and removes every helper container, then the
+        owner file of the pool.
+        """
+        self._closed.set()
+        with self._lock:
+            entries = list(self._containers.values())
+            self._containers.clear()
+        for entry in entries:
+            entry["started"].wait()
+            if entry["container"] is not None:
+                self._remove(entry["container"])
+        if not self._owner_file.closed:
+            try:
+                os.unlink(self._owner_path(self._token))
+            except FileNotFoundError:
+                pass
+            self._owner_file.close()
@@ -0,0 +1,49 @@
+from typing import Iterator
+
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from docker_volume_analyzer.snapshots import SnapshotRefresher
+
+
+class VolumeCollector(Collector):
+    """
+    Prometheus collector exporting the latest volume snapshot.
+
+    Metric families are built from the snapshot on each scrape instead of
+    being kept in gauges, so that the series of removed volumes disappear
+    as soon as a snapshot no longer lists them, and nothing is shared
+    between scrapes. The snapshot is read once per scrape: all the
+    families describe the same measurements.
+
+    Attributes:
+        refresher (SnapshotRefresher): Source of the snapshots.
+    """
+
+    def __init__(self, refresher: SnapshotRefresher):
+        self.refresher = refresher
+
+    def collect(self) -> Iterator[Metric]:
+        snapshot = self.refresher.snapshot
+        if snapshot is None:
+            return
+        volumes_total = GaugeMetricFamily(
+            "docker_volumes_total", "Total number of Docker volumes"
+        )
+        volume_size = GaugeMetricFamily(
+            "docker_volume_size_bytes",
+            "Apparent size of individual Docker volumes in bytes",
+            labels=["name"],
+        )
+        for volume_name, size in snapshot.sizes.items():
+            if size is not None:
+                volume_size.add_metric([volume_name], float(size))
+        volumes_total.add_metric([], len(snapshot.sizes))
+        snapshot_age = GaugeMetricFamily(
+            "docker_volume_analyzer_snapshot_age_seconds",
+            "Seconds since the volume metrics were last refreshed",
+            value=snapshot.age(),
+        )
+        yield volumes_total
+        yield volume_size
+        yield snapshot_age
@@ -0,0 +1,120 @@
+import fnmatch
+import re
+from typing import Dict, Generic, Iterable, Iterator, List, TypeVar
+
+Ref = TypeVar("Ref")
+
+# Pattern syntaxes understood by NameQuery
+SYNTAXES = ("glob", "regex", "suffix")
+_GLOB_SPECIAL = re.compile(r"[*?[]")
+
+
+class NameIndex(Generic[Ref]):
+    """
+    Index of the nodes of a tree by name, and of their names by suffix.
+
+    Queries only test each distinct name once, and are served directly by
+    the index for exact names and '*.ext' patterns. A name shared by
+    several nodes maps to a list of their references, a unique name to
+    its only reference, which must not be a list itself.
+
+    Attributes:
+        nodes (Dict[str, Any]): Reference(s) of the nodes of each name.
+        suffixes (Dict[str, List[str]]): Names by suffix, from their last
+        dot: every name ending with a dot-less suffix such as ".log" is
+        filed under it, hidden files included.
+    """
+
+    def __init__(self, names: Iterable[tuple]):
+        """
+        Args:
+            names (Iterable[tuple]): (name, node reference) pairs.
+        """
+        nodes = self.nodes = {}
+        for name, ref in names:
+            known = nodes.setdefault(name, ref)
+            if known is not ref:
+                if type(known) is list:
+                    known.append(ref)
+                else:
+                    nodes[name] = [known, ref]
+        self.suffixes: Dict[str, List[str]] = {}
+        for name in nodes:
+            dot = name.rfind(".")
+            suffix = name[dot:] if dot >= 0 else ""
+            names = self.suffixes.get(suffix)
+            if names is None:
+                self.suffixes[suffix] = [name]
+            else:
+                names.append(name)
+
+    def match(self, query: "NameQuery") -> Iterator[Ref]:
+        """Yields the references of the nodes whose name matches."""
+        nodes = self.nodes
+        for name in query.names(self):
+            refs = nodes[name]
+            if type(refs) is list:
+                yield from refs
+            else:
+                yield refs
+
+
+class NameQuery:
+    """
+    A compiled name pattern.
+
+    Globs ('core.*', '*.log') and suffixes ('.log') match whole names,
+    case-sensitively, as 'find -name' does; regular expressions match any
+    part of the name, as 'grep' does.
+
+    Args:
+        pattern (str): The pattern.
+        syntax (str): "glob", "regex" or "suffix".
+
+    Raises:
+        ValueError: If the syntax or the regular expression is invalid.
+    """
+
+    def __init__(self, pattern: str, syntax: str = "glob"):
+        self.pattern = pattern
+        self.syntax = syntax
+        # Name matched as is, or suffix whose names all match
+        self.exact = None
+        self.suffix = None
+        if syntax == "glob":
+            if not _GLOB_SPECIAL.search(pattern):
+                self.exact = pattern
+            elif _is_suffix(pattern[1:]) and pattern[0] == "*":
+                self.suffix = pattern[1:]
+            self._match = re.compile(fnmatch.translate(pattern), re.S).match
+        elif syntax == "regex":
+            try:
+                self._match = re.compile(pattern).search
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression: {e}") from e
+        elif syntax == "suffix":
+            if _is_suffix(pattern):
+                self.suffix = pattern
+            self._match = self._ends_with
+        else:
+            raise ValueError(f"Unknown pattern syntax '{syntax}'.")
+
+    def _ends_with(self, name: str) -> bool:
+        return name.endswith(self.pattern)
+
+    def names(self, index: NameIndex) -> Iterable[str]:
+        """Returns the names of an index matching the pattern."""
+        if self.exact is not None:
+            return [self.exact] if self.exact in index.nodes else []
+        if self.suffix is not None:
+            return index.suffixes.get(self.suffix, [])
+        return filter(self._match, index.nodes)
+
+
+def _is_suffix(pattern: str) -> bool:
+    return (
+        pattern.startswith(".")
+        and "." not in pattern[1:]
+        and "/" not in pattern
+        and not _GLOB_SPECIAL.search(pattern)
+    )
@@ -0,0 +1,146 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from docker_volume_analyzer.reports import VolumeReport
+
+
+class ReportJobs:
+    """
+    Computes volume reports in background threads, so that the requests
+    asking for a report never wait for the scan of the volume.
+
+    Reports are files of a directory shared by the processes of the host,
+    such as the Gunicorn workers, so that a report computed by a worker is
+    served by all of them. The process computing a report holds an
+    exclusive flock on its lock file until the report is written: a volume
+    is scanned by a single process at a time, whichever workers the next
+    requests reach, and the lock is released by the kernel if the process
+    exits. Reports are written to a temporary file which then atomically
+    replaces the previous one, so that readers always see a whole report.
+
+    A failed report is served once, as an error, then computed again by
+    the next request.
+
+    Attributes:
+        compute (Callable): Computes the report of a volume.
+        directory (str): Directory of the reports and of their lock files,
+        created when the first report is computed.
+        ttl (float): Delay in seconds during which a report is served,
+        before being computed again.
+    """
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        compute: Callable[[str], VolumeReport],
+        directory: str,
+        ttl: float = 300,
+    ):
+        self.compute = compute
+        self.directory = directory
+        self.ttl = ttl
+
+    def get(self, volume_name: str) -> Tuple[str, Optional[object]]:
+        """
+        Returns the latest report of a volume, starting to compute it in
+        the background when there is none, or when it expired.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+
+        Returns:
+            tuple: The status of the report, PENDING while it is computed,
+            DONE or FAILED, and the report as a dictionary when done, or
+            the error message when failed.
+        """
+        result = self._read(volume_name)
+        if result is None:
+            result = self._start(volume_name)
+        if result is None:
+            return self.PENDING, None
+        if "error" in result:
+            self._discard(volume_name)
+            return self.FAILED, result["error"]
+        return self.DONE, result["report"]
+
+    def _path(self, volume_name: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{volume_name}{suffix}")
+
+    def _read(self, volume_name: str) -> Optional[dict]:
+        """
+        Returns the result of the latest job of a volume, None if there is
+        none or if it expired.
+        """
+        try:
+            with open(self._path(volume_name, ".json")) as result_file:
+                result = json.load(result_file)
+        except FileNotFoundError:
+            return None
+        if time.time() - result["taken_at"] >= self.ttl:
+            return None
+        return result
+
+    def _discard(self, volume_name: str) -> None:
+        try:
+            os.unlink(self._path(volume_name, ".json"))
+        except FileNotFoundError:
+            pass
+
+    def _start(self, volume_name: str) -> Optional[dict]:
+        """
+        Starts computing the report of a volume, unless a process is
+        already computing it.
+
+        Returns:
+            dict | None: The result written by another process since it
+            was last read, if any.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(self._path(volume_name, ".lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        # Another process may have written the report before releasing
+        # the lock, after it was read.
+        result = self._read(volume_name)
+        if result is not None:
+            lock_file.close()
+            return result
+        threading.Thread(
+            target=self._run,
+            args=(volume_name, lock_file),
+            name=f"volume-report-{volume_name}",
+            daemon=True,
+        ).start()
+        return None
+
+    def _run(self, volume_name: str, lock_file) -> None:
+        try:
+            try:
+                result = {"report": self.compute(volume_name).to_dict()}
+            except Exception as e:
+                result = {"error": str(e)}
+            result["taken_at"] = time.time()
+            self._write(volume_name, result)
+        finally:
+            lock_file.close()
+
+    def _write(self, volume_name: str, result: dict) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as temp_file:
+                json.dump(result, temp_file)
+            os.replace(temp_path, self._path(volume_name, ".json"))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -0,0 +1,482 @@
+import errno
+import grp
+import itertools
+import os
+import pwd
+import stat
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List
+
+from docker_volume_analyzer.filesystem import (
+    FileNode,
+    FileSystem,
+    FileSystemBuilder,
+    add_directory_totals,
+    parse_du_output,
+)
+from docker_volume_analyzer.units import VolumeSize
+
+if TYPE_CHECKING:  # pragma: no cover
+    from docker_volume_analyzer.docker_client import DockerClient
+
+Progress = Callable[[FileSystem], None]
+
+
+def _reporting(
+    items: Iterable, fs: FileSystem, progress: Progress, every: int = 1
+) -> Iterator:
+    """
+    Yields items, passing the file system being built to `progress` each
+    time `every` items have been consumed.
+    """
+    for count, item in enumerate(items, 1):
+        yield item
+        if count % every == 0:
+            progress(fs)
+
+
+class ScanBackend(ABC):
+    """
+    Base class of the backends used to scan the content of volumes.
+
+    Attributes:
+        name (str): Name of the backend.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def get_volume_tree(
+        self,
+        volume_name: str,
+        directory: str | None = None,
+        progress: Progress | None = None,
+    ) -> FileSystem:
+        """
+        Builds the file tree of a volume (without directory sizes).
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+            directory (str | None): Directory to scan inside the volume.
+            progress (Callable | None): Called regularly with the file
+            system being built; an exception it raises stops the scan.
+
+        Returns:
+            FileSystem: The file tree, paths being relative to the volume.
+        """
+
+    @abstractmethod
+    def get_directory_level(
+        self,
+        volume_name: str,
+        directory: str | None = None,
+        fs: FileSystem | None = None,
+    ) -> FileSystem:
+        """
+        Lists only the entries of a directory, without walking the files
+        of its subdirectories into the tree. Subdirectories (and the
+        directory itself) get their total disk usage as size, as measured
+        by 'du', so the sizes must not be computed again.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+            directory (str | None): Directory to list inside the volume.
+            fs (FileSystem | None): File system to add the entries to,
+            a new one by default.
+
+        Returns:
+            FileSystem: The file system the entries were added to.
+        """
+
+    @abstractmethod
+    def get_directory_totals(
+        self,
+        volume_name: str,
+        max_depth: int,
+        directory: str | None = None,
+        fs: FileSystem | None = None,
+    ) -> FileSystem:
+        """
+        Measures the total disk usage of directories, following 'du -d'
+        conventions, without listing any file. Directories deeper than
+        `max_depth` below `directory` are counted but left out of the tree.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+            max_depth (int): Depth of the deepest directories added.
+            directory (str | None): Directory to measure inside the volume.
+            fs (FileSystem | None): File system to add the directories to,
+            a new one by default.
+
+        Returns:
+            FileSystem: The file system the directories were added to.
+        """
+
+    @abstractmethod
+    def get_volumes_size(
+        self, volumes_name: List[str]
+    ) -> Dict[str, VolumeSize]:
+        """
+        Computes the apparent size of volumes in bytes, along with their
+        allocated size when available (see VolumeSize).
+
+        Args:
+            volumes_name (list): Names of the Docker volumes.
+
+        Returns:
+            dict: Size of each volume which could be measured.
+        """
+
+
+class HelperContainerBackend(ScanBackend):
+    """
+    Scans volumes by mounting them in an Alpine helper container.
+    """
+
+    name = "container"
+
+    def __init__(self, docker_client: "DockerClient"):
+        self.docker_client = docker_client
+
+    def get_volume_tree(
+        self,
+        volume_name: str,
+        directory: str | None = None,
+        progress: Progress | None = None,
+    ) -> FileSystem:
+        builder = FileSystemBuilder(
+            f"/mnt/{volume_name}",
+            self.docker_client.fs_factory,
+            self.docker_client.parallel_parse_threshold,
+            self.docker_client.parse_workers,
+        )
+        if self.docker_client.record_format == "nul":
+            chunks = self.docker_client.stream_directory_records_with_find(
+                volume_name, directory=directory
+            )
+            if progress is not None:
+                chunks = _reporting(chunks, builder.fs, progress)
+            builder.feed_records(chunks)
+        else:
+            lines = self.docker_client.stream_directory_informations_with_find(
+                volume_name, directory=directory
+            )
+            if progress is not None:
+                lines = _reporting(lines, builder.fs, progress, 10000)
+            builder.feed(lines)
+        return builder.build()
+
+    def get_directory_level(
+        self,
+        volume_name: str,
+        directory: str | None = None,
+        fs: FileSystem | None = None,
+    ) -> FileSystem:
+        fs = fs if fs is not None else FileSystem()
+        prefix = f"/mnt/{volume_name}"
+        chunks = iter(
+            self.docker_client.stream_directory_level_with_find(
+                volume_name, directory=directory
+            )
+        )
+        du_output = bytearray()
+        for chunk in chunks:
+            end = chunk.find(b"\0")
+            if end < 0:
+                du_output += chunk
+                continue
+            du_output += chunk[:end]
+            FileSystemBuilder(prefix, lambda: fs).feed_records(
+                itertools.chain([chunk[end + 1 :]], chunks)
+            )
+            break
+        totals = parse_du_output(
+            du_output.decode("utf-8", "surrogateescape"), prefix
+        )
+        for path, size in totals.items():
+            node = fs.index.get(path)
+            if node is not None and node.is_directory:
+                node.size = size
+        return fs
+
+    def get_directory_totals(
+        self,
+        volume_name: str,
+        max_depth: int,
+        directory: str | None = None,
+        fs: FileSystem | None = None,
+    ) -> FileSystem:
+        output = b"".join(
+            self.docker_client.stream_directory_totals_with_du(
+                volume_name, max_depth, directory=directory
+            )
+        )
+        totals = parse_du_output(
+            output.decode("utf-8", "surrogateescape"), f"/mnt/{volume_name}"
+        )
+        return add_directory_totals(totals, fs)
+
+    def get_volumes_size(
+        self, volumes_name: List[str]
+    ) -> Dict[str, VolumeSize]:
+        return self.docker_client.scan_volumes_size(volumes_name)
+
+
+class HostDirectBackend(ScanBackend):
+    """
+    Scans volumes by walking their mountpoint directly with os.scandir.
+
+    Only usable when the analyzer runs on the Docker host, or has the
+    volumes directory bind-mounted at the same path.
+
+    Attributes:
+        mountpoint_of (Callable): Returns the mountpoint of a volume.
+        fs_factory (Callable): Creates the file systems being built.
+    """
+
+    name = "host"
+
+    def __init__(
+        self,
+        mountpoint_of: Callable[[str], str | None],
+        fs_factory: Callable[[], FileSystem] = FileSystem,
+    ):
+        self.mountpoint_of = mountpoint_of
+        self.fs_factory = fs_factory
+        self._users = {}
+        self._groups = {}
+
+    @staticmethod
+    def is_readable(mountpoint: str | None) -> bool:
+        """
+        Tells whether a mountpoint can be walked from this process.
+
+        Args:
+            mountpoint (str | None): Mountpoint of a volume.
+
+        Returns:
+            bool: True if the directory exists and is readable.
+        """
+        return (
+            isinstance(mountpoint, str)
+            and os.path.isdir(mountpoint)
+            and os.access(mountpoint, os.R_OK | os.X_OK)
+        )
+
+    def _mountpoint(self, volume_name: str) -> str:
+        """
+        Returns the mountpoint of a volume.
+
+        Raises:
+            FileNotFoundError: If the mountpoint of the volume is unknown.
+        """
+        mountpoint = self.mountpoint_of(volume_name)
+        if mountpoint is None:
+            raise FileNotFoundError(
+                errno.ENOENT,
+                f"Mountpoint of volume '{volume_name}' is unknown",
+            )
+        return mountpoint
+
+    def _user(self, uid: int) -> str:
+        if uid not in self._users:
+            try:
+                self._users[uid] = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                self._users[uid] = str(uid)
+        return self._users[uid]
+
+    def _group(self, gid: int) -> str:
+        if gid not in self._groups:
+            try:
+                self._groups[gid] = grp.getgrgid(gid).gr_name
+            except KeyError:
+                self._groups[gid] = str(gid)
+        return self._groups[gid]
+
+    @staticmethod
+    def _walk(root: str):
+        """
+        Yields the relative path and stat result of every entry under root,
+        parents before their children. Unreadable entries are skipped.
+        """
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            try:
+                with os.scandir(os.path.join(root, relative)) as entries:
+                    for entry in entries:
+                        path = (
+                            f"{relative}/{entry.name}"
+                            if relative
+                            else entry.name
+                        )
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        yield path, st
+                        if stat.S_ISDIR(st.st_mode):
+                            stack.append(path)
+            except OSError:
+                continue
+
+    def _node(self, path: str, st: os.stat_result) -> FileNode:
+        return FileNode(
+            name=os.path.basename(path),
+            path=path,
+            size=st.st_size,
+            mtime=int(st.st_mtime),
+            mode=stat.filemode(st.st_mode),
+            user=self._user(st.st_uid),
+            group=self._group(st.st_gid),
+            is_directory=stat.S_ISDIR(st.st_mode),
+        )
+
+    def get_volume_tree(
+        self,
+        volume_name: str,
+        directory: str | None = None,
+        progress: Progress | None = None,
+    ) -> FileSystem:
+        fs = self.fs_factory()
+        prefix = directory.strip("/") if directory else ""
+        root = os.path.join(self._mountpoint(volume_name), prefix)
+        entries = self._walk(root)
+        if progress is not None:
+            entries = _reporting(entries, fs, progress, 10000)
+        for path, st in entries:
+            if prefix:
+                path = f"{prefix}/{path}"
+            fs.add_node(self._node(path, st))
+        return fs
+
+    def get_directory_level(
+        self,
+        volume_name: str,
+        directory: str | None = None,
+        fs: FileSystem | None = None,
+    ) -> FileSystem:
+        fs = fs if fs is not None else FileSystem()
+        prefix = directory.strip("/") if directory else ""
+        root = os.path.join(self._mountpoint(volume_name), prefix)
+        root_stat = os.lstat(root)
+        if prefix and prefix not in fs.index:
+            fs.add_node(self._node(prefix, root_stat))
+        # The total of the directory is summed from its entries, like
+        # 'du -d 1' does, so that each subdirectory is only walked once.
+        blocks = root_stat.st_blocks
+        seen = set()
+        with os.scandir(root) as entries:
+            for entry in entries:
+                path = f"{prefix}/{entry.name}" if prefix else entry.name
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    node = self._node(path, st)
+                    if node.is_directory:
+                        entry_blocks = self._allocated_blocks(entry.path, seen)
+                        node.size = entry_blocks * 512
+                    elif self._first_link(st, seen):
+                        entry_blocks = st.st_blocks
+                    else:
+                        entry_blocks = 0
+                except OSError:
+                    continue
+                blocks += entry_blocks
+                fs.add_node(node)
+        fs.index[prefix].size = blocks * 512
+        return fs
+
+    @staticmethod
+    def _first_link(st: os.stat_result, seen: set) -> bool:
+        """
+        Tells whether a file is met for the first time, remembering the
+        hard linked ones in `seen`.
+        """
+        if st.st_nlink > 1 and not stat.S_ISDIR(st.st_mode):
+            if (st.st_dev, st.st_ino) in seen:
+                return False
+            seen.add((st.st_dev, st.st_ino))
+        return True
+
+    def _allocated_blocks(self, path: str, seen: set) -> int:
+        """
+        Counts the 512 bytes blocks allocated to a directory and to its
+        entries, skipping the hard linked files already in `seen`.
+        """
+        blocks = os.lstat(path).st_blocks
+        for _, st in self._walk(path):
+            if self._first_link(st, seen):
+                blocks += st.st_blocks
+        return blocks
+
+    def disk_usage(self, path: str) -> int:
+        """
+        Computes the disk usage of a directory in bytes, counting hard
+        linked files once, like 'du -s'.
+
+        Args:
+            path (str): Directory to measure.
+
+        Returns:
+            int: Allocated size in bytes.
+        """
+        return self._allocated_blocks(path, set()) * 512
+
+    def volume_size(self, path: str) -> VolumeSize:
+        """
+        Computes the apparent and allocated sizes of a directory in bytes,
+        in a single walk, counting hard linked files once.
+
+        Args:
+            path (str): Directory to measure.
+
+        Returns:
+            VolumeSize: Both sizes.
+        """
+        blocks, apparent = os.lstat(path).st_blocks, 0
+        seen = set()
+        for _, st in self._walk(path):
+            if self._first_link(st, seen):
+                blocks += st.st_blocks
+                if not stat.S_ISDIR(st.st_mode):
+                    apparent += st.st_size
+        return VolumeSize(apparent, disk=blocks * 512)
+
+    def get_directory_totals(
+        self,
+        volume_name: str,
+        max_depth: int,
+        directory: str | None = None,
+        fs: FileSystem | None = None,
+    ) -> FileSystem:
+        prefix = directory.strip("/") if directory else ""
+        root = os.path.join(self._mountpoint(volume_name), prefix)
+        totals = {prefix: os.lstat(root).st_blocks}
+        seen = set()
+        for path, st in self._walk(root):
+            if not self._first_link(st, seen):
+                continue
+            is_directory = stat.S_ISDIR(st.st_mode)
+            parts = path.split("/")
+            depth = len(parts) if is_directory else len(parts) - 1
+            # Count the entry in each measured directory containing it.
+            for i in range(1, min(depth, max_depth) + 1):
+                ancestor = "/".join(parts[:i])
+                ancestor = f"{prefix}/{ancestor}" if prefix else ancestor
+                totals[ancestor] = totals.get(ancestor, 0) + st.st_blocks
+            totals[prefix] += st.st_blocks
+        return add_directory_totals(
+            {path: blocks * 512 for path, blocks in totals.items()}, fs
+        )
+
+    def get_volumes_size(
+        self, volumes_name: List[str]
+    ) -> Dict[str, VolumeSize]:
+        results = {}
+        for volume in volumes_name:
+            try:
+                results[volume] = self.volume_size(self._mountpoint(volume))
+            except OSError:
+                continue
+        return results
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key: the first caller
+    computes the result, the callers arriving while it is in flight wait
+    for it and share its result, or its exception. Nothing is cached once
+    the computation ends.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+
+    def begin(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Joins the computation of a key, starting it if none is in flight.
+
+        Args:
+            key (Hashable): The computation key.
+
+        Returns:
+            tuple: The future of the result, and whether the caller
+            started the computation, and must then finish it.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                return future, False
+            future = self._flights[key] = Future()
+            return future, True
+
+    def finish(
+        self, key: Hashable, result: Any = None, error: BaseException = None
+    ) -> None:
+        """
+        Ends the computation of a key started by begin, waking up the
+        callers waiting for it. Does nothing if it already ended.
+        """
+        with self._lock:
+            future = self._flights.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        """
+        Returns function(*args, **kwargs), computed once for the callers
+        asking for the same key at the same time.
+        """
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result
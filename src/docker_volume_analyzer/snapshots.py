@@ -0,0 +1,251 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from docker_volume_analyzer.volume_manager import VolumeManager
+
+
+class VolumeSnapshot:
+    """
+    The volumes of the host and their sizes at a point in time.
+
+    Attributes:
+        sizes (Dict[str, int | None]): Apparent size of each volume in
+        bytes (see VolumeSize), None for the volumes which could not be
+        measured.
+        taken_at (float): Timestamp of the end of the refresh.
+        duration (float): Duration of the refresh, in seconds.
+    """
+
+    def __init__(
+        self,
+        sizes: Dict[str, Optional[int]],
+        taken_at: float,
+        duration: float = 0.0,
+    ):
+        self.sizes = sizes
+        self.taken_at = taken_at
+        self.duration = duration
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Returns the number of seconds since the snapshot was taken."""
+        return (time.time() if now is None else now) - self.taken_at
+
+    def to_dict(self) -> dict:
+        return {
+            "sizes": self.sizes,
+            "taken_at": self.taken_at,
+            "duration": self.duration,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VolumeSnapshot":
+        return cls(data["sizes"], data["taken_at"], data["duration"])
+
+
+class SnapshotStore:
+    """
+    A snapshot file shared by the processes of a host, such as the
+    Gunicorn workers, with a lock file electing the process refreshing it.
+
+    Snapshots are written to a temporary file which then atomically
+    replaces the shared one, so that readers always see a whole snapshot.
+    Readers only parse the file again when it was replaced.
+
+    The refresher is elected by an exclusive flock on the lock file: the
+    lock is released by the kernel when its process exits, another
+    process then taking over at its next attempt.
+
+    Attributes:
+        path (str): Path of the snapshot file, next to its lock file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_file = None
+        self._cached = (None, None)
+
+    def write(self, snapshot: VolumeSnapshot) -> None:
+        """
+        Replaces the shared snapshot.
+        """
+        directory = os.path.dirname(self.path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as temp_file:
+                json.dump(snapshot.to_dict(), temp_file)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def read(self) -> Optional[VolumeSnapshot]:
+        """
+        Returns the shared snapshot, None if there is none yet.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # Every write replaces the file, with a new inode
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached_version, snapshot = self._cached
+        if version != cached_version:
+            try:
+                with open(self.path) as snapshot_file:
+                    snapshot = VolumeSnapshot.from_dict(
+                        json.load(snapshot_file)
+                    )
+            except FileNotFoundError:
+                return snapshot
+            self._cached = (version, snapshot)
+        return snapshot
+
+    def try_lock(self) -> bool:
+        """
+        Tries to become the refreshing process, without waiting.
+
+        Returns:
+            bool: True if this process holds the lock.
+        """
+        if self._lock_file is not None:
+            return True
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def unlock(self) -> None:
+        """
+        Lets another process refresh the snapshot.
+        """
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+class SnapshotRefresher:
+    """
+    Recomputes the volume snapshot in a background thread, every
+    `interval` seconds, so that readers such as the /metrics endpoint
+    never wait on Docker nor on helper containers.
+
+    A failed refresh keeps the previous snapshot, whose age then keeps
+    growing until the next successful one.
+
+    With a store, the snapshot is shared by the processes of the host:
+    only the process holding the store lock measures the volumes, the
+    others read its snapshots and try to take over at each interval.
+
+    Attributes:
+        volume_manager (VolumeManager): The manager measuring the volumes.
+        interval (float): Delay in seconds between two refreshes.
+        store (SnapshotStore | None): Store shared with other processes.
+    """
+
+    def __init__(
+        self,
+        volume_manager: VolumeManager,
+        interval: float = 60,
+        store: Optional[SnapshotStore] = None,
+    ):
+        self.volume_manager = volume_manager
+        self.interval = interval
+        self.store = store
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._refreshed = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def snapshot(self) -> Optional[VolumeSnapshot]:
+        """The latest snapshot, None until the first refresh succeeds."""
+        if self.store is not None:
+            return self.store.read()
+        return self._snapshot
+
+    def start(self) -> None:
+        """
+        Starts refreshing the snapshot, unless already started.
+        """
+        with self._lock:
+            if self.running:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="volume-snapshot-refresher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops refreshing the snapshot after the refresh in progress.
+        """
+        self._stopped.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the first snapshot.
+
+        Returns:
+            bool: True if a snapshot is available.
+        """
+        if self.store is None:
+            return self._refreshed.wait(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.snapshot is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def refresh(self) -> VolumeSnapshot:
+        """
+        Measures the volumes and replaces the snapshot.
+
+        Only the volumes and their sizes are fetched: the containers of
+        the volumes are not needed by the snapshot readers.
+
+        Returns:
+            VolumeSnapshot: The new snapshot.
+        """
+        start = time.monotonic()
+        volumes = self.volume_manager.list_volumes()
+        sizes = self.volume_manager.get_volumes_size(
+            list(volumes), human_readable=False
+        )
+        snapshot = VolumeSnapshot(
+            {name: sizes.get(name) for name in volumes},
+            time.time(),
+            time.monotonic() - start,
+        )
+        if self.store is not None:
+            self.store.write(snapshot)
+        self._snapshot = snapshot
+        self._refreshed.set()
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if self.store is None or self.store.try_lock():
+                    self.refresh()
+            except Exception:
+                pass
+            if self._stopped.wait(self.interval):
+                break
+        if self.store is not None:
+            self.store.unlock()
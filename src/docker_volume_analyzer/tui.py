@@ -1,19 +1,46 @@
 import os
+import time
+from datetime import timedelta
 
+from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import Container, Horizontal, Vertical
 from textual.events import Key
 from textual.screen import ModalScreen
-from textual.widgets import Button, DataTable, Footer, Header, Static
-
-from docker_volume_analyzer.volume_manager import VolumeManager
+from textual.widgets import (
+    Button,
+    DataTable,
+    Footer,
+    Header,
+    Input,
+    ProgressBar,
+    Select,
+    Static,
+    TabbedContent,
+    TabPane,
+)
+from textual.worker import get_current_worker
+
+from docker_volume_analyzer.errors import ScanCancelledError
+from docker_volume_analyzer.filesystem import FileNode, FileSystem
+from docker_volume_analyzer.query import SYNTAXES
+from docker_volume_analyzer.reports import VolumeReport
+from docker_volume_analyzer.units import format_size
+from docker_volume_analyzer.volume_manager import LazyVolumeTree, VolumeManager
+
+# Placeholder of the cells still being measured.
+PENDING = "…"
 
 
 class DockerTUI(App):
     """
     DockerTUI is a Textual UI application for managing Docker volumes.
     It provides a graphical interface to view and interact with Docker volumes.
+
+    Docker and helper container calls run in thread workers: the volumes
+    are shown as soon as they are listed, their containers and sizes being
+    filled in as they are measured.
     """
 
     BINDINGS = [
@@ -22,8 +49,12 @@ class DockerTUI(App):
         ("i", "information", "Show information"),
         ("d", "delete_volume", "Delete volume"),
         ("b", "browse", "Browse volume"),
+        ("l", "browse_lazy", "Browse lazily"),
+        ("u", "browse_totals", "Browse directory sizes"),
+        ("r", "report", "Volume report"),
     ]
     CSS_PATH = "tui.tcss"
+    TOTALS_DEPTH = 2
 
     def __init__(self):
         super().__init__()
@@ -34,7 +65,8 @@ class DockerTUI(App):
             else "Docker Volume Analyzer"
         )
         self.manager = VolumeManager()
-        self.volumes = None
+        self.volumes = {}
+        self.columns = []
 
     def compose(self) -> ComposeResult:
         """Genearate the UI components for the app.
@@ -48,26 +80,78 @@ class DockerTUI(App):
         yield Header()
         with Horizontal(id="top"):
             yield DataTable(cursor_type="row", id="volumes_table")
+        yield ProgressBar(id="sizes_progress", show_eta=False)
 
         yield Footer()
 
     def on_mount(self) -> None:
-        """Load the data into the table and tree when the app is mounted.
+        """Start loading the volumes when the app is mounted.
 
         Returns:
             None: No return value.
         """
         table = self.query_one(DataTable)
-        table.add_columns("Name", "Size", "Containers", "Created at")
+        self.columns = table.add_columns(
+            "Name", "Apparent size", "Containers", "Created at"
+        )
+        self.load_volumes()
+
+    @work(thread=True, exclusive=True, group="volumes")
+    def load_volumes(self) -> None:
+        """
+        Lists the volumes, then looks for their containers and measures
+        their sizes, showing each result as soon as it is known.
+        """
+        worker = get_current_worker()
+        volumes = self.manager.list_volumes()
+        self.call_from_thread(self.show_volumes, volumes)
 
-        self.volumes = self.manager.get_volumes()
-        for volume in self.volumes.values():
+        containers = self.manager.get_containers_by_volume()
+        if worker.is_cancelled:
+            return
+        self.call_from_thread(self.show_containers, containers)
+
+        for sizes in self.manager.iter_volumes_size(list(volumes)):
+            if worker.is_cancelled:
+                return
+            self.call_from_thread(self.show_sizes, sizes)
+        self.call_from_thread(self.show_sizes, {})
+
+    def show_volumes(self, volumes: dict) -> None:
+        """Adds the listed volumes, their size and containers pending."""
+        table = self.query_one(DataTable)
+        self.volumes = volumes
+        for name, volume in volumes.items():
             table.add_row(
-                volume.get("name"),
-                volume.get("size"),
-                len(volume.get("containers", [])),
-                volume.get("created_at"),
+                name, PENDING, PENDING, volume.get("created_at"), key=name
             )
+        self.query_one(ProgressBar).update(total=len(volumes), progress=0)
+
+    def show_containers(self, containers: dict) -> None:
+        """Fills in the number of containers of each volume."""
+        table = self.query_one(DataTable)
+        for name, volume in self.volumes.items():
+            volume["containers"] = containers.get(name, [])
+            table.update_cell(name, self.columns[2], len(volume["containers"]))
+
+    def show_sizes(self, sizes: dict) -> None:
+        """
+        Fills in the measured sizes, an empty dict meaning that all the
+        sizes have been measured.
+        """
+        table = self.query_one(DataTable)
+        progress = self.query_one(ProgressBar)
+        for name, size in sizes.items():
+            if name not in self.volumes:
+                continue
+            self.volumes[name]["size"] = size
+            table.update_cell(name, self.columns[1], size or "N/A")
+            progress.advance(1)
+        if not sizes:
+            for name, volume in self.volumes.items():
+                if volume["size"] is None:
+                    table.update_cell(name, self.columns[1], "N/A")
+            progress.display = False
 
     def action_toggle_dark(self) -> None:
         """An action to toggle dark mode.
@@ -104,6 +188,11 @@ class DockerTUI(App):
         if selected_row is None:
             return
         volume_row = table.get_row_at(selected_row)
+        if volume_row[2] == PENDING:
+            self.push_screen(
+                ErrorScreen("The volume containers are still being listed.")
+            )
+            return
         if volume_row[2] != 0:
             self.push_screen(
                 ErrorScreen("Cannot delete volume with attached containers.")
@@ -118,22 +207,9 @@ class DockerTUI(App):
                 confirmed (bool): True if the user confirmed deletion
                 False otherwise.
             """
+            self.pop_screen()
             if confirmed:
-                try:
-                    self.manager.delete_volume(volume_row[0])
-                    row_key, _ = table.coordinate_to_cell_key(
-                        table.cursor_coordinate
-                    )
-                    table.remove_row(row_key)
-                    self.pop_screen()
-                    self.refresh()
-                except Exception as e:
-                    self.pop_screen()
-                    self.push_screen(
-                        ErrorScreen(f"Error deleting volume: {e}")
-                    )
-            else:
-                self.pop_screen()
+                self.delete_volume(volume_row[0])
 
         self.push_screen(
             ConfirmationScreen(
@@ -142,6 +218,29 @@ class DockerTUI(App):
             )
         )
 
+    @work(thread=True, group="delete")
+    def delete_volume(self, volume_name: str) -> None:
+        """
+        Deletes a volume, then removes it from the table.
+
+        Args:
+            volume_name (str): Name of the volume.
+        """
+        try:
+            self.manager.delete_volume(volume_name)
+        except Exception as e:
+            self.call_from_thread(
+                self.push_screen, ErrorScreen(f"Error deleting volume: {e}")
+            )
+            return
+        self.call_from_thread(self.volume_deleted, volume_name)
+
+    def volume_deleted(self, volume_name: str) -> None:
+        """Removes a deleted volume from the table."""
+        self.volumes.pop(volume_name, None)
+        self.query_one(DataTable).remove_row(volume_name)
+        self.refresh()
+
     def action_browse(self):
         """
         An action to browse the contents of the selected volume.
@@ -154,6 +253,44 @@ class DockerTUI(App):
 
         self.push_screen(VolumeBrowserScreen(self.app.manager, volume_row[0]))
 
+    def action_browse_lazy(self):
+        """
+        An action to browse the selected volume one directory at a time,
+        listing each directory only when it is opened.
+        """
+        table = self.query_one(DataTable)
+        volume_row = table.get_row_at(table.cursor_row)
+
+        self.push_screen(
+            VolumeBrowserScreen(self.app.manager, volume_row[0], lazy=True)
+        )
+
+    def action_browse_totals(self):
+        """
+        An action to browse the directories of the selected volume with
+        their 'du' totals only, TOTALS_DEPTH levels at a time.
+        """
+        table = self.query_one(DataTable)
+        volume_row = table.get_row_at(table.cursor_row)
+
+        self.push_screen(
+            VolumeBrowserScreen(
+                self.app.manager,
+                volume_row[0],
+                totals_depth=self.TOTALS_DEPTH,
+            )
+        )
+
+    def action_report(self):
+        """
+        An action to show the files of the selected volume by extension,
+        owner, group and age.
+        """
+        table = self.query_one(DataTable)
+        volume_row = table.get_row_at(table.cursor_row)
+
+        self.push_screen(ReportScreen(self.app.manager, volume_row[0]))
+
 
 class VolumeDetailScreen(ModalScreen):
     """
@@ -202,7 +339,8 @@ class VolumeDetailScreen(ModalScreen):
                     f"[b]Name[/b]: {self.volume_info.get('name', 'N/A')}"
                 )
                 yield Static(
-                    f"[b]Size[/b]: {self.volume_info.get('size', 'N/A')}"
+                    "[b]Apparent size[/b]: "
+                    f"{self.volume_info.get('size', 'N/A')}"
                 )
                 yield Static(
                     f"[b]Created[/b]: "
@@ -270,22 +408,67 @@ class ConfirmationScreen(ModalScreen):
 class VolumeBrowserScreen(ModalScreen):
     """
     A modal screen to browse the contents of a Docker volume.
+
+    The whole volume is scanned upfront, unless `lazy` is set: each
+    directory is then listed when it is opened, with the total size of
+    its subdirectories. With `totals_depth`, only directories are shown,
+    with their 'du' totals fetched `totals_depth` levels at a time.
+
+    Files show their apparent size. The directory totals of the lazy
+    modes are their disk usage, as measured by 'du', and labelled so.
+
+    Scans run in a thread worker, cancelled when the screen is left.
+
+    Rows are formatted and rendered a page at a time, the next page being
+    added when the cursor gets close to the last rendered row. The rows of
+    each directory and the formatted cells of each node are cached, so
+    that opening a directory again does not list nor format it again.
+
+    Children are shown in scan order until they are sorted by size,
+    modification time or name, using the sorted views of the file system;
+    pressing the same sort key again reverses the order.
+
+    Files can be searched by name below the current directory; the
+    directory of the selected match is then opened.
     """
 
     BINDINGS = [
         ("escape", "back", "Back"),
         Binding("enter", "select_cursor", "Select", show=True),
+        ("s", "sort('size')", "Sort by size"),
+        ("m", "sort('mtime')", "Sort by date"),
+        ("n", "sort('name')", "Sort by name"),
+        ("slash", "search", "Search"),
     ]
 
     ICON_DIRECTORY = "📁 "
     ICON_FILE = "📄 "
 
-    def __init__(self, volume_manager: VolumeManager, volume_name: str):
+    # Number of rows rendered at once
+    PAGE_SIZE = 500
+
+    def __init__(
+        self,
+        volume_manager: VolumeManager,
+        volume_name: str,
+        lazy: bool = False,
+        totals_depth: int | None = None,
+    ):
         super().__init__()
         self.volume_name = volume_name
         self.volume_manager = volume_manager
-        self.volume_tree = self.volume_manager.get_volume_tree(volume_name)
+        self.lazy = lazy or totals_depth is not None
+        self.totals_depth = totals_depth
+        self.lazy_tree = None
+        self.volume_tree = None
         self.current_path = ""
+        # Rows of the current directory, the first `shown` being rendered
+        self.rows = []
+        self.shown = 0
+        # (key, reverse) of the sorted views shown, None for scan order
+        self.sort = None
+        self._cells = {}
+        self._rows = {}
 
     def compose(self) -> ComposeResult:
         with Container(id="dialog"):
@@ -298,6 +481,7 @@ class VolumeBrowserScreen(ModalScreen):
                 f"[b]Current path:[/b] {self.current_path}",
                 id="current_path",
             )
+            yield Static("Scanning volume...", id="scan_status")
             yield DataTable(
                 id="file_tree",
                 cursor_type="row",
@@ -321,6 +505,12 @@ class VolumeBrowserScreen(ModalScreen):
                 yield Static(
                     "Delete selected file", classes="shortcut shortcut-desc"
                 )
+                yield Static("[b]S/M/N:[/b]", classes="shortcut shortcut-key")
+                yield Static(
+                    "Sort by size/date/name", classes="shortcut shortcut-desc"
+                )
+                yield Static("[b]/:[/b]", classes="shortcut shortcut-key")
+                yield Static("Search", classes="shortcut shortcut-desc")
                 yield Static("[b]Echap:[/b]", classes="shortcut shortcut-key")
                 yield Static(
                     "Back the volume list", classes="shortcut shortcut-desc"
@@ -330,9 +520,75 @@ class VolumeBrowserScreen(ModalScreen):
         """Load the file tree when the screen is mounted."""
         table = self.query_one(DataTable)
         table.add_columns("", "Name", "Size", "Last Modified")
+        self.scan_volume()
+
+    @work(thread=True, exclusive=True, group="scan")
+    def scan_volume(self) -> None:
+        """
+        Builds the volume tree (or lists its root in lazy mode), reporting
+        the number of entries found so far.
+        """
+        worker = get_current_worker()
+        if self.lazy:
+            lazy_tree = self.volume_manager.get_lazy_volume_tree(
+                self.volume_name, self.totals_depth
+            )
+            if not worker.is_cancelled:
+                self.app.call_from_thread(
+                    self.show_tree, lazy_tree.fs, lazy_tree
+                )
+            return
+
+        reported = time.monotonic()
+
+        def progress(fs: FileSystem) -> None:
+            nonlocal reported
+            if worker.is_cancelled:
+                raise ScanCancelledError()
+            if time.monotonic() - reported >= 0.2:
+                reported = time.monotonic()
+                self.app.call_from_thread(self.show_progress, len(fs.index))
+
+        try:
+            tree = self.volume_manager.get_volume_tree(
+                self.volume_name, progress=progress
+            )
+        except ScanCancelledError:
+            return
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.show_tree, tree)
+
+    def show_progress(self, entries: int) -> None:
+        """Shows the number of entries scanned so far."""
+        self.query_one("#scan_status").update(
+            f"Scanning volume... {entries:,} entries"
+        )
+
+    def show_tree(
+        self, tree: FileSystem, lazy_tree: LazyVolumeTree | None = None
+    ) -> None:
+        """Shows the scanned volume tree."""
+        self.volume_tree = tree
+        self.lazy_tree = lazy_tree
+        self.query_one("#scan_status").display = False
         self.load_data()
 
+    @work(thread=True, exclusive=True, group="scan")
+    def load_directory(self, path: str) -> None:
+        """Lists a directory of a lazy tree, then shows it."""
+        self.lazy_tree.load(path)
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self.load_data)
+
     def load_data(self) -> None:
+        if self.volume_tree is None:
+            return
+        if (
+            self.lazy_tree is not None
+            and self.current_path not in self.lazy_tree.loaded
+        ):
+            self.load_directory(self.current_path)
+            return
 
         table = self.query_one(DataTable)
         table.clear()
@@ -340,33 +596,160 @@ class VolumeBrowserScreen(ModalScreen):
             self.current_path, {}
         )
         if not directory_informations:
+            self.rows = []
             self.query_one(DataTable).add_row(
                 "No files found in this directory."
             )
             return ()
 
-        for name, node in directory_informations.childrens.items():
-            table.add_row(
+        self.rows = self.rows_of(self.current_path, directory_informations)
+        self.shown = 0
+        self.show_more_rows()
+
+        order = ""
+        if self.sort is not None:
+            key, reverse = self.sort
+            order = f" (by {key}, {'des' if reverse else 'as'}cending)"
+        self.query_one("#current_path").update(
+            f"[b]Current path:[/b] {self.current_path}/{order}"
+        )
+
+    def rows_of(self, path: str, directory: FileNode) -> list:
+        """
+        Returns the (path, name, node) rows of a directory in the current
+        order, cached by path and order.
+        """
+        rows = self._rows.setdefault(path, {}).get(self.sort)
+        if rows is None:
+            if self.sort is None:
+                children = directory.childrens.items()
+            else:
+                children = (
+                    (node.name, node)
+                    for node in self.volume_tree.sorted_children(
+                        path, *self.sort
+                    )
+                )
+            prefix = f"{path}/" if path else ""
+            rows = self._rows[path][self.sort] = [
+                (f"{prefix}{name}", name, node) for name, node in children
+            ]
+        return rows
+
+    def action_sort(self, key: str) -> None:
+        """
+        Sorts the rows by `key`, largest, newest or first name first,
+        reversing the order if they are already sorted by `key`.
+        """
+        if self.sort is not None and self.sort[0] == key:
+            self.sort = (key, not self.sort[1])
+        else:
+            self.sort = (key, key != "name")
+        self.load_data()
+
+    def cells_of(self, path: str, name: str, node: FileNode) -> tuple:
+        """Returns the formatted cells of a node, cached by path."""
+        cells = self._cells.get(path)
+        if cells is None:
+            cells = self._cells[path] = (
                 (
                     f"{self.ICON_DIRECTORY}"
                     if node.is_directory
                     else f"{self.ICON_FILE}"
                 ),
                 name,
-                f"{node.size} bytes",
-                node.mtime.strftime("%Y-%m-%d %H:%M:%S"),
+                (
+                    f"{node.size} bytes on disk"
+                    if self.lazy and node.is_directory
+                    else f"{node.size} bytes"
+                ),
+                (
+                    node.mtime.strftime("%Y-%m-%d %H:%M:%S")
+                    if self.totals_depth is None
+                    else ""
+                ),
             )
+        return cells
 
-        self.query_one("#current_path").update(
-            f"[b]Current path:[/b] {self.current_path}/"
+    def show_more_rows(self) -> None:
+        """Renders the next page of rows of the current directory."""
+        table = self.query_one(DataTable)
+        page = self.rows[self.shown : self.shown + self.PAGE_SIZE]
+        for path, name, node in page:
+            table.add_row(*self.cells_of(path, name, node))
+        self.shown += len(page)
+
+    def on_data_table_row_highlighted(
+        self, event: DataTable.RowHighlighted
+    ) -> None:
+        """Renders the next page when the cursor nears the last row."""
+        if (
+            event.cursor_row >= self.shown - self.PAGE_SIZE // 5
+            and self.shown < len(self.rows)
+        ):
+            self.show_more_rows()
+
+    def forget(self, path: str) -> None:
+        """
+        Drops the cached cells of a node and of its parent directories,
+        whose size changed, and the cached rows of the directories
+        holding them.
+        """
+        while True:
+            self._cells.pop(path, None)
+            path = os.path.dirname(path)
+            self._rows.pop(path, None)
+            if not path:
+                return
+
+    def action_search(self) -> None:
+        """An action to search the tree below the current directory."""
+        if self.volume_tree is None:
+            return
+        self.app.push_screen(
+            SearchScreen(self.volume_tree, self.current_path), self.show_path
         )
 
+    def show_path(self, path: str | None) -> None:
+        """Opens the directory of a path, the cursor on its row."""
+        if path is None:
+            return
+        self.current_path = os.path.dirname(path)
+        self.load_data()
+        for row, (row_path, _, _) in enumerate(self.rows):
+            if row_path == path:
+                while self.shown <= row:
+                    self.show_more_rows()
+                self.query_one(DataTable).move_cursor(row=row)
+                return
+
     def action_back(self) -> None:
         """An action to go back to the previous screen."""
+        self.workers.cancel_node(self)
         self.app.pop_screen()
         self.app.refresh()
 
+    @work(thread=True, group="delete")
+    def delete_file(self, node: FileNode) -> None:
+        """Deletes a file of the volume, then removes it from the tree."""
+        try:
+            self.volume_manager.delete_volume_file(self.volume_name, node.path)
+        except Exception as e:
+            self.app.call_from_thread(
+                self.app.push_screen, ErrorScreen(f"Error deleting file: {e}")
+            )
+            return
+        self.app.call_from_thread(self.file_deleted, node.path)
+
+    def file_deleted(self, path: str) -> None:
+        """Removes a deleted file from the tree."""
+        self.volume_tree.delete_node(path)
+        self.forget(path)
+        self.load_data()
+
     def on_key(self, event: Key) -> None:
+        if self.volume_tree is None:
+            return
         table = self.query_one(DataTable)
         if event.key == "enter":
             selected = table.cursor_row
@@ -394,16 +777,260 @@ class VolumeBrowserScreen(ModalScreen):
             ).childrens.get(selected_name)
 
             if selected_node:
-                try:
-                    self.volume_manager.delete_volume_file(
-                        self.volume_name, selected_node.path
+                self.delete_file(selected_node)
+
+
+class SearchScreen(ModalScreen):
+    """
+    A modal screen to search a volume tree by name, with size, age and
+    owner filters. Matches are shown as they are found, by a thread
+    worker; selecting one dismisses the screen with its path.
+    """
+
+    BINDINGS = [
+        ("escape", "back", "Back"),
+    ]
+
+    # Number of matches sent to the table at once, and shown at most
+    BATCH_SIZE = 200
+    MAX_RESULTS = 1000
+
+    def __init__(self, volume_tree: FileSystem, under: str = ""):
+        super().__init__()
+        self.volume_tree = volume_tree
+        self.under = under
+
+    def compose(self) -> ComposeResult:
+        with Container(id="dialog"):
+            yield Static(
+                f"[b]Searching in:[/b] {self.under}/", classes="title"
+            )
+            with Horizontal(id="search_form"):
+                yield Input(placeholder="Name, e.g. *.log", id="pattern")
+                yield Select(
+                    [(syntax, syntax) for syntax in SYNTAXES],
+                    value="glob",
+                    allow_blank=False,
+                    id="syntax",
+                )
+                yield Input(
+                    placeholder="Min size (bytes)",
+                    type="integer",
+                    id="min_size",
+                )
+                yield Input(
+                    placeholder="Older than (days)",
+                    type="integer",
+                    id="older_than",
+                )
+                yield Input(placeholder="Owner", id="user")
+            yield Static("", id="search_status")
+            yield DataTable(
+                id="search_results",
+                cursor_type="row",
+                zebra_stripes=True,
+            )
+
+    def on_mount(self) -> None:
+        self.query_one(DataTable).add_columns(
+            "Path", "Size", "Last Modified", "Owner"
+        )
+        self.query_one("#pattern").focus()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Starts a search with the values of the form."""
+        min_size = self.query_one("#min_size").value
+        older_than = self.query_one("#older_than").value
+        self.query_one(DataTable).clear()
+        self.search_tree(
+            self.query_one("#pattern").value or "*",
+            self.query_one("#syntax").value,
+            int(min_size) if min_size else 0,
+            timedelta(days=int(older_than)) if older_than else None,
+            self.query_one("#user").value or None,
+        )
+
+    @work(thread=True, exclusive=True, group="search")
+    def search_tree(
+        self,
+        pattern: str,
+        syntax: str,
+        min_size: int,
+        older_than: timedelta | None,
+        user: str | None,
+    ) -> None:
+        """Searches the tree, sending the matches by batches."""
+        worker = get_current_worker()
+        matches = 0
+        rows = []
+        try:
+            for node in self.volume_tree.search(
+                pattern, syntax, min_size, older_than, user, self.under
+            ):
+                if worker.is_cancelled:
+                    return
+                matches += 1
+                if matches <= self.MAX_RESULTS:
+                    rows.append(
+                        (
+                            node.path,
+                            f"{node.size} bytes",
+                            node.mtime.strftime("%Y-%m-%d %H:%M:%S"),
+                            node.user,
+                        )
                     )
-                    self.volume_tree.delete_node(selected_node.path)
-                    self.load_data()
-                except Exception as e:
-                    self.app.push_screen(
-                        ErrorScreen(f"Error deleting file: {e}")
+                if matches % self.BATCH_SIZE == 0:
+                    self.app.call_from_thread(self.show_matches, rows, matches)
+                    rows = []
+        except ValueError as e:
+            self.app.call_from_thread(self.show_status, str(e))
+            return
+        self.app.call_from_thread(self.show_matches, rows, matches, True)
+
+    def show_matches(
+        self, rows: list, matches: int, done: bool = False
+    ) -> None:
+        """Adds a batch of matches and updates their count."""
+        table = self.query_one(DataTable)
+        for row in rows:
+            table.add_row(*row, key=row[0])
+        status = f"{matches:,} matches"
+        if matches > self.MAX_RESULTS:
+            status += f", the first {self.MAX_RESULTS:,} shown"
+        self.show_status(status if done else f"{status}...")
+
+    def show_status(self, status: str) -> None:
+        self.query_one("#search_status").update(status)
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        """Dismisses the screen with the path of the selected match."""
+        self.workers.cancel_node(self)
+        self.dismiss(event.row_key.value)
+
+    def action_back(self) -> None:
+        """An action to go back to the browser."""
+        self.workers.cancel_node(self)
+        self.dismiss(None)
+
+
+class ReportScreen(ModalScreen):
+    """
+    A modal screen showing the number and total size of the files of a
+    volume by extension, owner, group and age, with the share of the
+    volume size of each. The volume is scanned and the report computed by
+    a thread worker, cancelled when the screen is left.
+    """
+
+    BINDINGS = [
+        ("escape", "back", "Back"),
+    ]
+
+    # Number of rows shown in each table, the others being summed up
+    TOP = 50
+    TABLES = (
+        ("extensions", "Extensions", "Extension"),
+        ("users", "Owners", "Owner"),
+        ("groups", "Groups", "Group"),
+        ("ages", "Ages", "Age"),
+    )
+
+    def __init__(self, volume_manager: VolumeManager, volume_name: str):
+        super().__init__()
+        self.volume_manager = volume_manager
+        self.volume_name = volume_name
+
+    def compose(self) -> ComposeResult:
+        with Container(id="dialog"):
+            yield Static(
+                f"[b]Report of volume:[/b] {self.volume_name}",
+                classes="title",
+            )
+            yield Static("Scanning volume...", id="report_status")
+            with TabbedContent(id="report"):
+                for name, title, _ in self.TABLES:
+                    with TabPane(title, id=f"tab_{name}"):
+                        yield DataTable(
+                            id=f"report_{name}",
+                            cursor_type="row",
+                            zebra_stripes=True,
+                        )
+
+    def on_mount(self) -> None:
+        for name, _, column in self.TABLES:
+            self.query_one(f"#report_{name}", DataTable).add_columns(
+                column, "Files", "Size", "Share"
+            )
+        self.build_report()
+
+    @work(thread=True, exclusive=True, group="report")
+    def build_report(self) -> None:
+        """Scans the volume and computes its report."""
+        worker = get_current_worker()
+        reported = time.monotonic()
+
+        def progress(fs: FileSystem) -> None:
+            nonlocal reported
+            if worker.is_cancelled:
+                raise ScanCancelledError()
+            if time.monotonic() - reported >= 0.2:
+                reported = time.monotonic()
+                self.app.call_from_thread(
+                    self.show_status,
+                    f"Scanning volume... {len(fs.index):,} entries",
+                )
+
+        try:
+            report = self.volume_manager.get_volume_report(
+                self.volume_name, progress=progress
+            )
+        except ScanCancelledError:
+            return
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.show_report, report)
+
+    def show_report(self, report: VolumeReport) -> None:
+        """Fills the tables of the report."""
+        for name, _, _ in self.TABLES:
+            totals = getattr(report, name)
+            items = list(totals.items())
+            if name != "ages":
+                items.sort(key=lambda item: -item[1][1])
+            if len(items) > self.TOP:
+                others = items[self.TOP :]
+                items = items[: self.TOP]
+                items.append(
+                    (
+                        f"({len(others):,} others)",
+                        (
+                            sum(files for _, (files, _) in others),
+                            sum(size for _, (_, size) in others),
+                        ),
                     )
+                )
+            table = self.query_one(f"#report_{name}", DataTable)
+            for label, (files, size) in items:
+                share = size / report.bytes if report.bytes else 0
+                table.add_row(
+                    label or "(none)",
+                    f"{files:,}",
+                    format_size(size),
+                    f"{share:.1%}",
+                )
+        timings = ", ".join(
+            f"{step} {seconds:.2f}s"
+            for step, seconds in report.timings.items()
+        )
+        self.show_status(
+            f"{report.files:,} files, {format_size(report.bytes)} ({timings})"
+        )
+
+    def show_status(self, status: str) -> None:
+        self.query_one("#report_status").update(status)
+
+    def action_back(self) -> None:
+        """An action to go back to the volume list."""
+        self.workers.cancel_node(self)
+        self.app.pop_screen()
 
 
 if __name__ == "__main__":  # pragma: no cover
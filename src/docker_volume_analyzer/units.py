@@ -0,0 +1,42 @@
+import math
+from typing import NamedTuple, Optional
+
+
+class VolumeSize(NamedTuple):
+    """
+    Exact size of a volume, in bytes.
+
+    The apparent size is the size of a volume reported to the users, as it
+    is the one every source can measure, the engine included.
+
+    Attributes:
+        apparent (int): Total size of its files, the way the engine's
+        'system df' counts it: directories are left out, and hard linked
+        files counted once.
+        disk (int | None): Allocated size of its entries, as counted by
+        'du -s', None when the source does not report it.
+    """
+
+    apparent: int
+    disk: Optional[int] = None
+
+
+def format_size(num_bytes: int) -> str:
+    """
+    Formats a size in bytes the way 'du -h' does (e.g. '512', '4.0K',
+    '12M', '1.3G'): values are rounded up, with one decimal below 10.
+
+    Args:
+        num_bytes (int): Size in bytes.
+
+    Returns:
+        str: Human-readable size.
+    """
+    if num_bytes < 1024:
+        return str(num_bytes)
+    for exponent, unit in enumerate("KMGTPE", start=1):
+        value = num_bytes / 1024**exponent
+        if value < 10 and math.ceil(value * 10) < 100:
+            return f"{math.ceil(value * 10) / 10:.1f}{unit}"
+        if math.ceil(value) < 1024 or unit == "E":
+            return f"{math.ceil(value)}{unit}"
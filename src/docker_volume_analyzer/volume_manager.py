@@ -1,13 +1,96 @@
-from typing import List
+import time
+from typing import Callable, Dict, Iterator, List
 
 from docker_volume_analyzer.docker_client import DockerClient
-from docker_volume_analyzer.filesystem import FileSystem, parse_find_output
+from docker_volume_analyzer.errors import ScanCancelledError
+from docker_volume_analyzer.filesystem import FileNode, FileSystem
+from docker_volume_analyzer.reports import VolumeReport, build_report
+from docker_volume_analyzer.scan_backends import ScanBackend
+from docker_volume_analyzer.singleflight import SingleFlight
+
+
+class LazyVolumeTree:
+    """
+    File tree of a volume fetched one directory at a time, when it is
+    browsed, instead of scanning the whole volume upfront.
+
+    Each directory is listed once by the scan backend, with the total
+    size of its subdirectories; listed directories are kept in the tree.
+
+    With `totals_depth`, only directories are fetched, with 'du -d'
+    totals `totals_depth` levels deep: the directories at the last level
+    are left unexpanded until they are loaded.
+
+    Attributes:
+        backend (ScanBackend): Backend listing the directories.
+        volume_name (str): Name of the Docker volume.
+        totals_depth (int | None): Depth of the directory totals fetched
+        at once, None to list directories with their files.
+        fs (FileSystem): The directories listed so far.
+        loaded (set): Paths of the directories listed so far.
+    """
+
+    def __init__(
+        self,
+        backend: ScanBackend,
+        volume_name: str,
+        totals_depth: int | None = None,
+    ):
+        self.backend = backend
+        self.volume_name = volume_name
+        self.totals_depth = totals_depth
+        self.fs = FileSystem()
+        self.loaded = set()
+
+    def load(self, directory: str = "") -> FileNode | None:
+        """
+        Lists a directory unless it was already listed.
+
+        Args:
+            directory (str): Path of the directory inside the volume.
+
+        Returns:
+            FileNode | None: The directory node, None if it does not exist.
+        """
+        if directory in self.loaded:
+            return self.fs.index.get(directory)
+        if self.totals_depth is None:
+            self.backend.get_directory_level(
+                self.volume_name, directory or None, self.fs
+            )
+            self.loaded.add(directory)
+            return self.fs.index.get(directory)
+
+        known = set(self.fs.index)
+        self.backend.get_directory_totals(
+            self.volume_name, self.totals_depth, directory or None, self.fs
+        )
+        self.loaded.add(directory)
+        # Every subdirectory above the last level was fetched.
+        base = directory.count("/") + 1 if directory else 0
+        self.loaded.update(
+            path
+            for path in self.fs.index.keys() - known
+            if path.count("/") + 1 - base < self.totals_depth
+        )
+        return self.fs.index.get(directory)
 
 
 class VolumeManager:
+    # Volume scans in flight, shared by every manager since the web app
+    # creates one per request
+    _tree_flights = SingleFlight()
+
     def __init__(self, docker_client: DockerClient | None = None):
         self.client = docker_client or DockerClient()
 
+    def watch_events(self) -> None:
+        """
+        Keep the container index and the size cache up to date from the
+        Docker events stream instead of rebuilding and expiring them.
+        """
+        self.client.start_event_watcher()
+
     def get_volumes(self, human_readable: bool = True) -> dict:
         """
         Return all Docker volumes name and mountpoint
@@ -17,55 +100,52 @@ class VolumeManager:
                     and mount points as values.
         """
 
-        volumes = self.client.list_volumes()
+        volumes = self.list_volumes()
 
         # Fetch containers associated with volumes
         containers_by_volumes = self.get_containers_by_volume()
 
         # Fetch sizes for all volumes in a single call
-        volume_sizes = self.get_volumes_size(
-            [volume.name for volume in volumes], human_readable
-        )
+        volume_sizes = self.get_volumes_size(list(volumes), human_readable)
+
+        for name, volume in volumes.items():
+            # Pre-fetched size, None when it could not be measured
+            volume["size"] = volume_sizes.get(name)
+            volume["containers"] = containers_by_volumes.get(name, [])
+        return volumes
+
+    def list_volumes(self) -> dict:
+        """
+        Return all Docker volumes, without measuring their size nor
+        looking for their containers.
 
-        # Build the result dictionary
+        Returns:
+            dict: Same dictionary as get_volumes, with None sizes and
+                    empty container lists.
+        """
         return {
             volume.name: {
                 "name": volume.name,
                 "mountpoint": volume.attrs.get("Mountpoint", ""),
-                "size": volume_sizes.get(
-                    volume.name, "0"
-                ),  # Use pre-fetched sizes
+                "size": None,
                 "created_at": volume.attrs.get("CreatedAt", ""),
-                "containers": containers_by_volumes.get(volume.name, []),
+                "containers": [],
             }
-            for volume in volumes
+            for volume in self.client.list_volumes()
         }
 
     def get_containers_by_volume(self) -> dict:
         """
         Return all Docker containers and their volumes.
 
+        The mapping is built from a single container list call, without
+        inspecting each container.
+
         Returns:
-            dict: Dictionary with volume names as keys and parse_find_output
+            dict: Dictionary with volume names as keys and
                     container information (name, mountpoint, etc.) as values.
         """
-        containers_by_volumes = {}
-        for container in self.client.list_containers():
-            for volume in container.attrs.get("Mounts", []):
-                volume_name = volume.get("Name")
-                if volume_name not in containers_by_volumes:
-                    containers_by_volumes[volume_name] = []
-                containers_by_volumes[volume_name].append(
-                    {
-                        "short_id": container.short_id,
-                        "container_name": container.name,
-                        "mountpoint": volume.get("Destination", ""),
-                        "driver": volume.get("Driver", ""),
-                        "mode": volume.get("Mode", ""),
-                        "rw": volume.get("RW", False),
-                    }
-                )
-        return containers_by_volumes
+        return self.client.get_mounts_index()
 
     def delete_volume(self, volume_name: str) -> bool:
         """
@@ -83,31 +163,141 @@ class VolumeManager:
         except Exception:
             return False
 
-    def get_volume_tree(self, volume_name: str) -> "FileSystem":
+    def get_volume_tree(
+        self,
+        volume_name: str,
+        progress: Callable[[FileSystem], None] | None = None,
+    ) -> "FileSystem":
         """
         Get a tree structure of the files in a Docker volume.
 
+        The volume is scanned by the backend selected by the Docker client:
+        its mountpoint is walked directly when readable, otherwise the
+        output of a helper container is streamed and parsed line by line.
+
+        Callers asking for the tree of a volume already being scanned for
+        another caller of the same client wait for that scan and get the
+        same tree, without their progress being reported. They scan the
+        volume themselves if that scan is cancelled.
+
         Args:
             volume_name (str): Name of the Docker volume.
+            progress (Callable | None): Called regularly with the file
+            system being built; an exception it raises stops the scan.
 
         Returns:
-            dict: A dictionary representing the file tree structure.
+            FileSystem: The file tree with computed directory sizes.
         """
-        find_result = self.client.get_directory_informations_with_find(
-            volume_name, directory=None
+        scanned = False
+
+        def scan() -> FileSystem:
+            nonlocal scanned
+            scanned = True
+            backend = self.client.backend_for(volume_name)
+            return backend.get_volume_tree(
+                volume_name, directory=None, progress=progress
+            ).compute_directory_sizes()
+
+        while True:
+            try:
+                return self._tree_flights.do((self.client, volume_name), scan)
+            except ScanCancelledError:
+                if scanned:
+                    raise
+
+    def get_lazy_volume_tree(
+        self, volume_name: str, totals_depth: int | None = None
+    ) -> LazyVolumeTree:
+        """
+        Get a tree of a Docker volume whose directories are listed on
+        demand, with only the volume root listed.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+            totals_depth (int | None): Fetch only directory totals, this
+            number of levels at a time.
+
+        Returns:
+            LazyVolumeTree: The tree, directory sizes being totals.
+        """
+        tree = LazyVolumeTree(
+            self.client.backend_for(volume_name), volume_name, totals_depth
+        )
+        tree.load()
+        return tree
+
+    def get_directory_totals(
+        self,
+        volume_name: str,
+        max_depth: int = 2,
+        directory: str | None = None,
+    ) -> FileSystem:
+        """
+        Get the total size of the directories of a Docker volume, down to
+        a maximum depth, without listing files: the cost of the scan
+        output only depends on the number of directories returned.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+            max_depth (int): Depth of the deepest directories returned,
+            whose subdirectories are left unexpanded.
+            directory (str | None): Directory to measure inside the volume.
+
+        Returns:
+            FileSystem: The directories, with their total disk usage.
+        """
+        backend = self.client.backend_for(volume_name)
+        return backend.get_directory_totals(
+            volume_name, max_depth, directory=directory
         )
-        if not find_result:
-            return FileSystem()
 
-        return parse_find_output(
-            find_result, f"/mnt/{volume_name}"
-        ).compute_directory_sizes()
+    def get_volume_report(
+        self,
+        volume_name: str,
+        progress: Callable[[FileSystem], None] | None = None,
+    ) -> VolumeReport:
+        """
+        Get the number and total size of the files of a Docker volume by
+        extension, owner, group and age, computed in a single pass over
+        the scanned files.
+
+        Args:
+            volume_name (str): Name of the Docker volume.
+            progress (Callable | None): Called regularly during the scan,
+            as in get_volume_tree.
+
+        Returns:
+            VolumeReport: The report, with the "scan" and "report" timings.
+        """
+        start = time.perf_counter()
+        fs = self.get_volume_tree(volume_name, progress=progress)
+        scanned = time.perf_counter() - start
+        report = build_report(fs)
+        report.timings["scan"] = scanned
+        return report
 
     def get_volumes_size(
         self, volume_names=List[str], human_readable: bool = True
     ) -> dict:
         return self.client.get_volumes_size(volume_names, human_readable)
 
+    def iter_volumes_size(
+        self, volume_names: List[str], human_readable: bool = True
+    ) -> Iterator[Dict[str, str | int | None]]:
+        """
+        Yield the sizes of volumes as soon as they are measured.
+
+        Args:
+            volume_names (list): Names of the Docker volumes.
+            human_readable (bool): Return 'du -h' like sizes instead of
+            bytes.
+
+        Yields:
+            dict: Sizes of some of the volumes, None for the volumes
+                    which could not be measured.
+        """
+        return self.client.iter_volumes_size(volume_names, human_readable)
+
     def delete_volume_file(self, volume_name: str, file_path: str) -> bool:
         """
         Delete a specific file in a Docker volume.
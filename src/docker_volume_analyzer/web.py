@@ -1,24 +1,44 @@
-from flask import Flask, Response
-from prometheus_client import CollectorRegistry, Gauge, generate_latest
+import os
+import tempfile
+
+from flask import Flask, Response, jsonify
+from prometheus_client import CollectorRegistry, generate_latest
 
 from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.metrics import VolumeCollector
+from docker_volume_analyzer.report_jobs import ReportJobs
+from docker_volume_analyzer.snapshots import SnapshotRefresher
 from docker_volume_analyzer.volume_manager import VolumeManager
 
 app = Flask(__name__)
 
-registry = CollectorRegistry()
+docker_client = DockerClient()
 
-docker_volumes_total = Gauge(
-    "docker_volumes_total", "Total number of Docker volumes", registry=registry
-)
-docker_volume_size_bytes = Gauge(
-    "docker_volume_size_bytes",
-    "Size of individual Docker volumes in bytes",
-    ["name"],
-    registry=registry,
+# Volume sizes are measured in the background, every
+# METRICS_REFRESH_INTERVAL seconds, and scrapes only read the latest ones.
+refresher = SnapshotRefresher(
+    VolumeManager(docker_client=docker_client),
+    interval=float(os.getenv("METRICS_REFRESH_INTERVAL", "60")),
 )
 
-docker_client = DockerClient()
+registry = CollectorRegistry()
+registry.register(VolumeCollector(refresher))
+
+
+def compute_report(volume_name: str):
+    return VolumeManager(docker_client=docker_client).get_volume_report(
+        volume_name
+    )
+
+
+# Reports are computed in the background, a scan outlasting the request
+# timeouts of the servers, and shared by the Gunicorn workers.
+report_jobs = ReportJobs(
+    compute_report,
+    os.getenv("REPORTS_PATH")
+    or os.path.join(tempfile.gettempdir(), "docker-volume-analyzer-reports"),
+    ttl=float(os.getenv("REPORT_TTL", "300")),
+)
 
 
 @app.route("/")
@@ -31,17 +51,39 @@ def index():
 
 @app.route("/metrics")
 def metrics():
-    volume_manager = VolumeManager(docker_client=docker_client)
-    volumes = volume_manager.get_volumes(human_readable=False)
-    docker_volumes_total.set(len(volumes))
-    for volume_name, volume_info in volumes.items():
-        docker_volume_size_bytes.labels(name=volume_name).set(
-            volume_info["size"]
+    refresher.start()
+    if refresher.snapshot is None:
+        return Response(
+            "Volume metrics are not measured yet.\n",
+            status=503,
+            mimetype="text/plain",
         )
 
     # Return metrics in Prometheus format
     return Response(generate_latest(registry), mimetype="text/plain")
 
 
+REPORT_RETRY_AFTER = 5
+
+
+@app.route("/volumes/<volume_name>/report")
+def volume_report(volume_name: str):
+    volume_manager = VolumeManager(docker_client=docker_client)
+    # Scanning a missing volume would create it
+    if volume_name not in volume_manager.list_volumes():
+        return jsonify({"error": f"Volume '{volume_name}' not found."}), 404
+    status, result = report_jobs.get(volume_name)
+    if status == ReportJobs.PENDING:
+        return (
+            jsonify({"status": "pending"}),
+            202,
+            {"Retry-After": str(REPORT_RETRY_AFTER)},
+        )
+    if status == ReportJobs.FAILED:
+        return jsonify({"error": result}), 500
+    return jsonify(result)
+
+
 def main():
+    refresher.start()  # pragma: no cover
     app.run(host="0.0.0.0", port=8000)  # pragma: no cover
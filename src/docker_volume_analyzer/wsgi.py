@@ -1,5 +1,21 @@
 # pragma: no cover
-from docker_volume_analyzer.web import app
+import os
+import tempfile
+
+from docker_volume_analyzer.snapshots import SnapshotStore
+from docker_volume_analyzer.web import app, docker_client, refresher
+
+if os.environ.get("WATCH_EVENTS", "").lower() in ("1", "true", "yes"):
+    docker_client.start_event_watcher()
+
+# Gunicorn workers share a single snapshot, refreshed by one of them
+refresher.store = SnapshotStore(
+    os.getenv("SNAPSHOT_PATH")
+    or os.path.join(
+        tempfile.gettempdir(), "docker-volume-analyzer-snapshot.json"
+    )
+)
+refresher.start()
 
 application = app
 
@@ -0,0 +1,250 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from docker_volume_analyzer.columnar import ColumnarFileSystem, ColumnarNode
+from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.filesystem import (
+    FileNode,
+    FileSystem,
+    FileSystemBuilder,
+)
+
+FIND_OUTPUT = [
+    "directory|/mnt/docker_volume/dir1|4096|drwxr-xr-x|root|root|1633024800",
+    "file|/mnt/docker_volume/dir1/file1.txt|1024|-rw-r--r--|app|app|16330248",
+    "directory|/mnt/docker_volume/dir1/sub|4096|drwxr-xr-x|root|root|16330248",
+    "file|/mnt/docker_volume/dir1/sub/é.txt|2048|-rw-------|app|app|16330248",
+    "file|/mnt/docker_volume/dir1/file2.txt|10|-rw-r--r--|app|app|1633024804",
+    "file|/mnt/docker_volume/dir2/deep/file3.txt|5|-rw-r--r--|app|app|1",
+    "file|/mnt/docker_volume/top.txt|7|-rw-r--r--|root|root|1633024805",
+]
+
+
+def build(fs_factory):
+    return FileSystemBuilder(fs_factory=fs_factory).feed(FIND_OUTPUT).build()
+
+
+def snapshot(fs):
+    return {
+        path: (
+            node.name,
+            node.path,
+            node.size,
+            node.mtime,
+            node.mode,
+            node.user,
+            node.group,
+            node.is_directory,
+            list(node.childrens),
+            node.parent.path if node.parent else None,
+        )
+        for path, node in ((path, fs.index[path]) for path in fs.index)
+        if path
+    }
+
+
+@pytest.fixture
+def fs():
+    """Fixture for a columnar file system built from 'find' output."""
+    return build(ColumnarFileSystem)
+
+
+def test_same_tree_as_file_system(fs):
+    """Test that both engines expose the same tree."""
+    expected = build(FileSystem)
+
+    assert snapshot(fs) == snapshot(expected)
+    assert set(fs.index) == set(expected.index)
+    assert len(fs.index) == len(expected.index) == 10
+
+
+def test_compute_directory_sizes(fs):
+    """Test that directory totals are accumulated in a single pass."""
+    fs.compute_directory_sizes()
+
+    assert fs.index["dir1/sub"].size == 4096 + 2048
+    assert fs.index["dir1"].size == 4096 + 1024 + 4096 + 2048 + 10
+    assert fs.index["dir2"].size == 5
+    assert fs.index[""].size == 4096 + 1024 + 4096 + 2048 + 10 + 5 + 7
+
+
+def test_delete_node(fs):
+    """Test that deleting a node removes its subtree and updates sizes."""
+    fs.compute_directory_sizes()
+
+    fs.delete_node("dir1/sub")
+
+    assert "dir1/sub" not in fs.index
+    assert "dir1/sub/é.txt" not in fs.index
+    assert list(fs.index["dir1"].childrens) == ["file1.txt", "file2.txt"]
+    assert fs.index["dir1"].size == 4096 + 1024 + 10
+    assert fs.index[""].size == 4096 + 1024 + 10 + 5 + 7
+    assert len(fs.index) == 8
+
+    fs.add_node(
+        FileNode("new", "dir1/sub/new", 1, 0, "-rw-r--r--", "a", "a", False)
+    )
+    assert fs.index["dir1/sub/new"].size == 1
+    assert fs.index["dir1/sub"].is_directory
+
+
+def test_delete_node_not_found(fs):
+    """Test that deleting an unknown path raises a ValueError."""
+    with pytest.raises(ValueError, match="does not exist"):
+        fs.delete_node("missing")
+
+
+def test_lookups(fs):
+    """Test missing paths and paths below files."""
+    assert fs.index.get("dir1/missing") is None
+    assert "top.txt/below" not in fs.index
+    assert fs.index["dir1"].childrens.get("missing") is None
+    assert fs.index["dir1"].childrens["file2.txt"].size == 10
+    assert len(fs.index["dir1"].childrens) == 3
+
+
+def test_duplicate_entries_are_ignored(fs):
+    """Test that paths of looked up directories are not added twice."""
+    assert "dir1/file1.txt" in fs.index
+    fs.add_node(
+        FileNode("file1.txt", "dir1/file1.txt", 1, 0, "", "", "", False)
+    )
+
+    assert fs.index["dir1/file1.txt"].size == 1024
+    assert len(fs.index["dir1"].childrens) == 3
+
+
+def test_node_view(fs):
+    """Test the node facade."""
+    node = fs.index["dir1/file1.txt"]
+
+    assert node == ColumnarNode(fs, node.id)
+    assert node != fs.index["dir1"]
+    assert node.mtime == datetime.fromtimestamp(16330248)
+    assert node.mtime_epoch == 16330248
+    assert node.parent == fs.index["dir1"]
+    assert fs.root.parent is None
+    assert repr(node) == "ColumnarNode('dir1/file1.txt', file, size=1024)"
+
+    node.size = 1
+    assert fs.index["dir1/file1.txt"].size == 1
+
+
+def test_strings_are_stored_once(fs):
+    """Test that modes and owners are stored as codes."""
+    assert fs.users.strings == ["", "root", "app"]
+    assert len(fs.mode_codes) == len(fs)
+
+
+@pytest.mark.parametrize("key", ["name", "size", "mtime"])
+@pytest.mark.parametrize("reverse", [False, True])
+def test_sorted_children(fs, key, reverse):
+    """Test that both engines sort children the same way."""
+    expected = build(FileSystem).compute_directory_sizes()
+    fs.compute_directory_sizes()
+
+    for path in ("", "dir1", "missing"):
+        assert [
+            node.path for node in fs.sorted_children(path, key, reverse)
+        ] == [
+            node.path for node in expected.sorted_children(path, key, reverse)
+        ]
+    with pytest.raises(ValueError, match="Unknown sort key"):
+        fs.sorted_children("", "owner")
+
+
+def test_sorted_children_are_cached_until_changed(fs):
+    """Test that views are dropped when their directory changes."""
+    fs.compute_directory_sizes()
+    fs.sorted_children("dir1", "size")
+
+    fs.delete_node("dir1/sub")
+
+    assert [node.name for node in fs.sorted_children("dir1", "size")] == [
+        "file2.txt",
+        "file1.txt",
+    ]
+
+
+@pytest.mark.parametrize("directories", [False, True])
+def test_largest(fs, directories):
+    """Test that both engines return the same largest nodes."""
+    expected = build(FileSystem).compute_directory_sizes()
+    fs.compute_directory_sizes()
+
+    for count in (1, 3, FileSystem.LARGEST_INDEX_SIZE + 1):
+        assert [node.path for node in fs.largest(count, directories)] == [
+            node.path for node in expected.largest(count, directories)
+        ]
+
+    fs.delete_node("dir1/sub")
+    assert "dir1/sub/é.txt" not in [node.path for node in fs.largest(10)]
+
+
+@pytest.mark.parametrize(
+    "args, kwargs",
+    [
+        (("*.txt",), {}),
+        (("file?.txt",), {"min_size": 10}),
+        (("*",), {"older_than": timedelta(days=1)}),
+        (("*",), {"user": "app"}),
+        (("*",), {"user": "nobody"}),
+        (("^[a-z]+$", "regex"), {"under": "dir1"}),
+        (("*",), {"under": "missing"}),
+    ],
+)
+def test_search(fs, args, kwargs):
+    """Test that both engines find the same nodes."""
+    expected = build(FileSystem)
+
+    assert sorted(node.path for node in fs.search(*args, **kwargs)) == sorted(
+        node.path for node in expected.search(*args, **kwargs)
+    )
+
+
+def test_search_after_delete(fs):
+    """Test that deleted nodes are not found anymore."""
+    assert len(list(fs.search("*.txt"))) == 5
+
+    fs.delete_node("dir1/sub")
+
+    assert len(list(fs.search("*.txt"))) == 4
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 100])
+def test_file_columns(fs, batch_size):
+    """Test that both engines yield the same file columns."""
+    expected = build(FileSystem)
+
+    def rows(fs):
+        return sorted(
+            row
+            for sizes, mtimes, users, groups, names in fs.file_columns(
+                batch_size
+            )
+            for row in zip(
+                sizes, mtimes, users, groups, names[:-1].split("\0")
+            )
+        )
+
+    assert rows(fs) == rows(expected)
+    assert len(rows(fs)) == 5
+    assert "é.txt" in [row[-1] for row in rows(fs)]
+
+    fs.delete_node("dir1/sub")
+
+    assert len(rows(fs)) == 4
+
+
+def test_docker_client_tree_engine(monkeypatch):
+    """Test selecting the tree engine."""
+    monkeypatch.setenv("TREE_ENGINE", "columnar")
+
+    docker_client = DockerClient()
+
+    assert docker_client.fs_factory is ColumnarFileSystem
+    assert docker_client.host_backend.fs_factory is ColumnarFileSystem
+    assert DockerClient(tree_engine="objects").fs_factory is FileSystem
+    with pytest.raises(ValueError, match="tree_engine must be one of"):
+        DockerClient(tree_engine="numpy")
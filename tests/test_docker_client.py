@@ -1,11 +1,15 @@
+import shlex
+import threading
 import time
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import docker
 import pytest
 
-from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.docker_client import DockerClient, iter_lines
 from docker_volume_analyzer.errors import DockerNotAvailableError
+from docker_volume_analyzer.helper_pool import HelperContainerPool
+from docker_volume_analyzer.units import VolumeSize
 
 
 def test_list_volumes():
@@ -49,6 +53,83 @@ def test_list_containers():
     assert len(containers) == 2
 
 
+def test_get_mounts_index():
+    """
+    Test that the volume to containers mapping is built from the container
+    summaries, without inspecting each container.
+    """
+    mock_client = MagicMock()
+    mock_client.api.containers.return_value = [
+        {
+            "Id": "0123456789abcdef",
+            "Names": ["/web"],
+            "State": "running",
+            "Mounts": [
+                {
+                    "Type": "volume",
+                    "Name": "volume1",
+                    "Destination": "/data",
+                    "Driver": "local",
+                    "Mode": "z",
+                    "RW": True,
+                },
+                {"Type": "bind", "Source": "/etc", "Destination": "/etc"},
+            ],
+        },
+        {
+            "Id": "fedcba9876543210",
+            "Names": ["/db"],
+            "Mounts": [
+                {
+                    "Type": "volume",
+                    "Name": "volume1",
+                    "Destination": "/backup",
+                    "Driver": "local",
+                    "Mode": "ro",
+                    "RW": False,
+                }
+            ],
+        },
+        {"Id": "aaaaaaaaaaaaaaaa", "Names": ["/idle"], "Mounts": None},
+        {
+            "Id": "bbbbbbbbbbbbbbbb",
+            "Names": ["/helper"],
+            "Labels": {HelperContainerPool.LABEL: "true"},
+            "Mounts": [{"Type": "volume", "Name": "volume1"}],
+        },
+    ]
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    index = docker_client.get_mounts_index()
+
+    assert index == {
+        "volume1": [
+            {
+                "short_id": "0123456789ab",
+                "container_name": "web",
+                "mountpoint": "/data",
+                "driver": "local",
+                "mode": "z",
+                "rw": True,
+                "running": True,
+            },
+            {
+                "short_id": "fedcba987654",
+                "container_name": "db",
+                "mountpoint": "/backup",
+                "driver": "local",
+                "mode": "ro",
+                "rw": False,
+                "running": False,
+            },
+        ]
+    }
+    mock_client.api.containers.assert_called_once_with(all=True, filters=None)
+    mock_client.containers.get.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "volumes_input, mode, expected_volumes",
     [
@@ -98,6 +179,7 @@ def test_run_in_container(volumes_input, mode, expected_volumes):
         image="alpine",
         command="ls",
         volumes=expected_volumes,
+        labels={HelperContainerPool.LABEL: "true"},
         remove=True,
         stdout=True,
         stderr=False,
@@ -234,9 +316,10 @@ def test_get_directory_informations_with_find():
             "sh",
             "-c",
             "find /mnt/test_volume/test_dir -exec stat "
-            "-c '%F|%n|%s|%A|%U|%G|%Y' {} \\;",
+            "-c '%F|%n|%s|%A|%U|%G|%Y' {} +",
         ],
         volumes={"test_volume": {"bind": "/mnt/test_volume", "mode": "ro"}},
+        labels={HelperContainerPool.LABEL: "true"},
         remove=True,
         stdout=True,
         stderr=False,
@@ -274,9 +357,10 @@ def test_get_directory_informations_with_find_no_directory():
             "sh",
             "-c",
             "find /mnt/test_volume -exec stat "
-            "-c '%F|%n|%s|%A|%U|%G|%Y' {} \\;",
+            "-c '%F|%n|%s|%A|%U|%G|%Y' {} +",
         ],
         volumes={"test_volume": {"bind": "/mnt/test_volume", "mode": "ro"}},
+        labels={HelperContainerPool.LABEL: "true"},
         remove=True,
         stdout=True,
         stderr=False,
@@ -317,9 +401,10 @@ def test_get_directory_informations_with_find_error():
             "sh",
             "-c",
             "find /mnt/test_volume/test_dir -exec stat "
-            "-c '%F|%n|%s|%A|%U|%G|%Y' {} \\;",
+            "-c '%F|%n|%s|%A|%U|%G|%Y' {} +",
         ],
         volumes={"test_volume": {"bind": "/mnt/test_volume", "mode": "ro"}},
+        labels={HelperContainerPool.LABEL: "true"},
         remove=True,
         stdout=True,
         stderr=False,
@@ -328,6 +413,61 @@ def test_get_directory_informations_with_find_error():
     assert output is None
 
 
+def test_get_directory_informations_with_find_per_file_mode():
+    """
+    Test that the per-file scan mode forks one stat per entry.
+    """
+    mock_client = MagicMock()
+    mock_client.containers.run.return_value = b"output"
+
+    docker_client = DockerClient(scan_mode="per-file")
+    docker_client.client = mock_client
+
+    docker_client.get_directory_informations_with_find("test_volume")
+
+    assert docker_client.client.containers.run.call_args.kwargs["command"] == [
+        "sh",
+        "-c",
+        "find /mnt/test_volume -exec stat " "-c '%F|%n|%s|%A|%U|%G|%Y' {} \\;",
+    ]
+
+
+def test_invalid_scan_mode():
+    """
+    Test that an unknown scan mode is rejected.
+    """
+    with pytest.raises(ValueError, match="scan_mode must be one of"):
+        DockerClient(scan_mode="unknown")
+
+
+def test_invalid_record_format():
+    """
+    Test that an unknown record format is rejected.
+    """
+    with pytest.raises(ValueError, match="record_format must be one of"):
+        DockerClient(record_format="unknown")
+
+
+def test_build_find_command_nul_records():
+    """
+    Test that the NUL record format runs the batch script once per batch
+    of paths found.
+    """
+    command = DockerClient.build_find_command("/mnt/v", record_format="nul")
+
+    assert shlex.split(command) == [
+        "find",
+        "/mnt/v",
+        "-exec",
+        "sh",
+        "-c",
+        DockerClient.NUL_BATCH_SCRIPT,
+        "sh",
+        "{}",
+        "+",
+    ]
+
+
 def test_list_containers_not_found():
     """
     Test the list_containers method of DockerClient
@@ -360,23 +500,22 @@ def test_list_containers_not_found():
         (
             ["volume1", "volume2"],
             False,
-            {"volume1": "10240", "volume2": "20480"},
+            {"volume1": 10 * 2**20, "volume2": 20 * 2**20},
         ),
     ],
 )
 def test_get_volumes_size(volumes_input, human_readable, expected_output):
     """
     Test the get_volumes_size method of DockerClient
-    for single and multiple volumes.
+    for single and multiple volumes, in both units.
     """
     mock_client = MagicMock()
     mock_client.containers.run.return_value = (
-        b"10M\tdirectory-path\n20M\tdirectory-path"
-        if human_readable
-        else b"10240\tdirectory-path\n20480\tdirectory-path"
+        b"10489856\t10485760\t/mnt/volume1\n"
+        b"20975616\t20971520\t/mnt/volume2"
     )
 
-    docker_client = DockerClient()
+    docker_client = DockerClient(size_concurrency=1)
     docker_client.client = mock_client
 
     result = docker_client.get_volumes_size(volumes_input, human_readable)
@@ -386,17 +525,16 @@ def test_get_volumes_size(volumes_input, human_readable, expected_output):
         command=[
             "sh",
             "-c",
-            f"du -s{'h' if human_readable else ''} "
-            + " ".join(
-                [
-                    f"/mnt/{vol}"
-                    for vol in (
-                        volumes_input
-                        if isinstance(volumes_input, list)
-                        else [volumes_input]
-                    )
-                ]
-            ),
+            DockerClient.SIZE_SCRIPT,
+            "sh",
+            *[
+                f"/mnt/{vol}"
+                for vol in (
+                    volumes_input
+                    if isinstance(volumes_input, list)
+                    else [volumes_input]
+                )
+            ],
         ],
         volumes={
             vol: {"bind": f"/mnt/{vol}", "mode": "ro"}
@@ -406,12 +544,99 @@ def test_get_volumes_size(volumes_input, human_readable, expected_output):
                 else [volumes_input]
             )
         },
+        labels={HelperContainerPool.LABEL: "true"},
         remove=True,
         stdout=True,
         stderr=False,
     )
 
     assert result == expected_output
+    assert docker_client.size_errors == {}
+
+
+def test_get_volumes_size_coalesces_concurrent_calls():
+    """
+    Test that a volume being measured for a caller is not measured again
+    for concurrent callers, which get the same size.
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(**kwargs):
+        started.set()
+        release.wait(5)
+        return b"10489856\t10485760\t/mnt/volume1"
+
+    mock_client = MagicMock()
+    mock_client.containers.run.side_effect = run
+    docker_client = DockerClient(use_system_df=False)
+    docker_client.client = mock_client
+
+    results = []
+    callers = [
+        threading.Thread(
+            target=lambda: results.append(
+                docker_client.get_volumes_size(["volume1"], False)
+            )
+        )
+        for _ in range(3)
+    ]
+    callers[0].start()
+    started.wait(5)
+    for caller in callers[1:]:
+        caller.start()
+    time.sleep(0.1)
+    release.set()
+    for caller in callers:
+        caller.join(5)
+
+    assert results == [{"volume1": 10 * 2**20}] * 3
+    mock_client.containers.run.assert_called_once()
+
+
+def test_get_volumes_size_stopped_early():
+    """
+    Test that volumes left unmeasured by a caller which stopped iterating
+    are reported as unknown to the callers waiting for them.
+    """
+    mock_client = MagicMock()
+    mock_client.df.return_value = {
+        "Volumes": [{"Name": "volume1", "UsageData": {"Size": 10240}}]
+    }
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    sizes = docker_client.iter_volumes_size(["volume1", "volume2"], False)
+    assert next(sizes) == {"volume1": 10240}
+    future, first = docker_client._size_flights.begin("volume2")
+    sizes.close()
+
+    assert not first
+    assert future.result(0) is None
+    mock_client.containers.run.assert_not_called()
+
+
+def test_get_volumes_size_failure_not_finished_twice():
+    """
+    Test that a caller stopping after a volume failed to be measured does
+    not finish the measure started for it by a second caller, which a
+    third caller waits for.
+    """
+    mock_client = MagicMock()
+    mock_client.containers.run.return_value = b""
+    docker_client = DockerClient(use_system_df=False)
+    docker_client.client = mock_client
+
+    sizes = docker_client.iter_volumes_size(["volume1"], False)
+    assert next(sizes) == {"volume1": None}
+    second, second_leads = docker_client._size_flights.begin("volume1")
+    third, third_leads = docker_client._size_flights.begin("volume1")
+    sizes.close()
+
+    assert second_leads and not third_leads
+    assert not third.done()
+    docker_client._size_flights.finish("volume1", VolumeSize(1024))
+    assert third.result(0) == VolumeSize(1024)
 
 
 def test_get_volumes_size_no_output():
@@ -427,12 +652,14 @@ def test_get_volumes_size_no_output():
 
     result = docker_client.get_volumes_size(["volume1", "volume2"])
 
-    assert result == {"volume1": "0", "volume2": "0"}
+    assert result == {"volume1": None, "volume2": None}
+    assert set(docker_client.size_errors) == {"volume1", "volume2"}
+    assert docker_client._volume_size_cache == {}
 
 
 def test_get_volumes_size_index_error():
     """
-    Test the get_volumes_size method of DockerClient when IndexError occurs.
+    Test the get_volumes_size method of DockerClient with unparsable output.
     """
     mock_client = MagicMock()
     mock_client.containers.run.return_value = b"invalid_output"
@@ -442,7 +669,126 @@ def test_get_volumes_size_index_error():
 
     result = docker_client.get_volumes_size(["volume1", "volume2"])
 
-    assert result == {"volume1": "0", "volume2": "0"}
+    assert result == {"volume1": None, "volume2": None}
+
+
+def test_get_volumes_size_reports_failures_per_volume():
+    """
+    Test that one volume failing does not affect the others.
+    """
+    mock_client = MagicMock()
+    mock_client.containers.run.return_value = (
+        b"10489856\t10485760\t/mnt/volume1"
+    )
+
+    docker_client = DockerClient(size_concurrency=1)
+    docker_client.client = mock_client
+    docker_client.size_errors = {"volume1": "previous failure"}
+
+    result = docker_client.get_volumes_size(["volume1", "volume2"])
+
+    assert result == {"volume1": "10M", "volume2": None}
+    assert docker_client.size_errors == {
+        "volume2": "size not reported by the container backend"
+    }
+
+
+def test_get_volumes_size_backend_exception():
+    """
+    Test that a failing shard reports its volumes as failed.
+    """
+    docker_client = DockerClient()
+    docker_client.container_backend = MagicMock()
+    docker_client.container_backend.name = "container"
+    docker_client.container_backend.get_volumes_size.side_effect = (
+        RuntimeError("boom")
+    )
+
+    result = docker_client.get_volumes_size(["volume1"])
+
+    assert result == {"volume1": None}
+    assert docker_client.size_errors == {
+        "volume1": "container backend failed: boom"
+    }
+
+
+def test_get_volumes_size_runs_shards_concurrently():
+    """
+    Test that volumes are split across concurrent helper runs.
+    """
+    mock_client = MagicMock()
+
+    def run(command, **kwargs):
+        return "\n".join(
+            f"4096\t1024\t{path}" for path in command[4:]
+        ).encode()
+
+    mock_client.containers.run.side_effect = run
+
+    docker_client = DockerClient(size_concurrency=3)
+    docker_client.client = mock_client
+
+    volumes = [f"volume{i}" for i in range(7)]
+    chunks = list(docker_client.iter_volumes_size(volumes))
+
+    assert mock_client.containers.run.call_count == 3
+    assert len(chunks) == 3
+    assert {v: s for chunk in chunks for v, s in chunk.items()} == {
+        v: "1.0K" for v in volumes
+    }
+
+
+def test_iter_volumes_size_yields_cached_sizes_first():
+    """
+    Test that cached sizes are available before any helper run.
+    """
+    docker_client = DockerClient()
+    docker_client.client = MagicMock()
+    docker_client.client.containers.run.return_value = (
+        b"4096\t2048\t/mnt/volume2"
+    )
+    docker_client._volume_size_cache = {
+        "volume1": {"size": VolumeSize(1024), "timestamp": time.time()}
+    }
+
+    sizes = docker_client.iter_volumes_size(["volume1", "volume2"])
+
+    assert next(sizes) == {"volume1": "1.0K"}
+    docker_client.client.containers.run.assert_not_called()
+    assert list(sizes) == [{"volume2": "2.0K"}]
+
+
+def test_plan_shards_balances_observed_sizes():
+    """
+    Test that shards are balanced using the previously observed sizes.
+    """
+    docker_client = DockerClient(size_concurrency=2)
+    docker_client._size_hints = {"big": 100, "a": 40, "b": 30, "c": 30}
+
+    shards = docker_client._plan_shards(["a", "b", "c", "big"])
+
+    assert sorted(map(sorted, shards)) == [["a", "b", "c"], ["big"]]
+
+
+def test_plan_shards_unknown_volumes_weigh_the_average():
+    """
+    Test that volumes never measured weigh the average observed size.
+    """
+    docker_client = DockerClient(size_concurrency=2)
+    docker_client._size_hints = {"big": 100, "small": 10}
+
+    shards = docker_client._plan_shards(["big", "small", "new"])
+
+    assert sorted(map(sorted, shards)) == [["big"], ["new", "small"]]
+
+
+def test_plan_shards_bounded_by_volume_count():
+    """
+    Test that no empty shard is planned.
+    """
+    docker_client = DockerClient(size_concurrency=8)
+
+    assert docker_client._plan_shards(["a", "b"]) == [["a"], ["b"]]
 
 
 def test_run_in_container_invalid_volumes_name():
@@ -464,8 +810,8 @@ def test_run_in_container_invalid_volumes_name():
         # Case where all requested volumes are cached
         (
             {
-                "volume1": {"size": "10M", "timestamp": time.time()},
-                "volume2": {"size": "20M", "timestamp": time.time()},
+                "volume1": {"size": VolumeSize(10 * 2**20), "timestamp": 0},
+                "volume2": {"size": VolumeSize(20 * 2**20), "timestamp": 0},
             },
             ["volume1", "volume2"],
             {"volume1": "10M", "volume2": "20M"},
@@ -473,8 +819,8 @@ def test_run_in_container_invalid_volumes_name():
         # Case where some volumes are cached, and one needs to be queried
         (
             {
-                "volume1": {"size": "10M", "timestamp": time.time()},
-                "volume2": {"size": "20M", "timestamp": time.time() - 30},
+                "volume1": {"size": VolumeSize(10 * 2**20), "timestamp": 0},
+                "volume2": {"size": VolumeSize(20 * 2**20), "timestamp": -30},
             },
             ["volume1", "volume2", "volume3"],
             {"volume1": "10M", "volume2": "20M", "volume3": "30M"},
@@ -492,10 +838,15 @@ def test_get_volumes_size_with_cache(
     docker_client = DockerClient()
     docker_client.client = mock_client
 
-    docker_client._volume_size_cache = cached_volumes
+    docker_client._volume_size_cache = {
+        volume: {**entry, "timestamp": time.time() + entry["timestamp"]}
+        for volume, entry in cached_volumes.items()
+    }
     docker_client._cache_timeout = 60
 
-    mock_client.containers.run.return_value = b"30M\tdirectory-path"
+    mock_client.containers.run.return_value = (
+        b"31461376\t31457280\t/mnt/volume3"
+    )
 
     result = docker_client.get_volumes_size(requested_volumes)
 
@@ -507,9 +858,12 @@ def test_get_volumes_size_with_cache(
             command=[
                 "sh",
                 "-c",
-                "du -sh /mnt/volume3",
+                DockerClient.SIZE_SCRIPT,
+                "sh",
+                "/mnt/volume3",
             ],
             volumes={"volume3": {"bind": "/mnt/volume3", "mode": "ro"}},
+            labels={HelperContainerPool.LABEL: "true"},
             remove=True,
             stdout=True,
             stderr=False,
@@ -535,6 +889,7 @@ def test_delete_volume_file_success():
         image="alpine",
         command=["sh", "-c", "rm -f /mnt/test_volume/test_file.txt"],
         volumes={"test_volume": {"bind": "/mnt/test_volume", "mode": "rw"}},
+        labels={HelperContainerPool.LABEL: "true"},
         remove=True,
         stdout=True,
         stderr=False,
@@ -566,9 +921,374 @@ def test_delete_volume_file_failure():
         image="alpine",
         command=["sh", "-c", "rm -f /mnt/test_volume/test_file.txt"],
         volumes={"test_volume": {"bind": "/mnt/test_volume", "mode": "rw"}},
+        labels={HelperContainerPool.LABEL: "true"},
         remove=True,
         stdout=True,
         stderr=False,
     )
 
     assert result is False
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        ([b"a\nb\n"], ["a", "b"]),
+        ([b"fir", b"st\nsec", b"ond"], ["first", "second"]),
+        ([b"a\n\n", b"\nb"], ["a", "b"]),
+        ([], []),
+    ],
+)
+def test_iter_lines(chunks, expected):
+    """
+    Test that iter_lines rebuilds lines split across chunks.
+    """
+    assert list(iter_lines(iter(chunks))) == expected
+
+
+def test_stream_directory_informations_with_find():
+    """
+    Test that the find output is streamed from a detached container
+    which is removed once consumed.
+    """
+    mock_client = MagicMock()
+    container = mock_client.containers.run.return_value
+    container.logs.return_value = iter(
+        [
+            b"directory|/mnt/test_volume|4096|drwxr-xr-x|u|g|1633024800\nfi",
+            b"le|/mnt/test_volume/a.txt|1|-rw-r--r--|u|g|1633024800\n",
+        ]
+    )
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    lines = docker_client.stream_directory_informations_with_find(
+        "test_volume"
+    )
+
+    assert next(lines) == (
+        "directory|/mnt/test_volume|4096|drwxr-xr-x|u|g|1633024800"
+    )
+    container.remove.assert_not_called()
+    assert list(lines) == [
+        "file|/mnt/test_volume/a.txt|1|-rw-r--r--|u|g|1633024800"
+    ]
+
+    mock_client.containers.run.assert_called_once_with(
+        image="alpine",
+        command=[
+            "sh",
+            "-c",
+            "find /mnt/test_volume -exec stat "
+            "-c '%F|%n|%s|%A|%U|%G|%Y' {} +",
+        ],
+        volumes={"test_volume": {"bind": "/mnt/test_volume", "mode": "ro"}},
+        labels={HelperContainerPool.LABEL: "true"},
+        detach=True,
+    )
+    container.logs.assert_called_once_with(
+        stream=True, follow=True, stdout=True, stderr=False
+    )
+    container.wait.assert_called_once()
+    container.remove.assert_called_once_with(force=True)
+
+
+def test_stream_directory_records_with_find():
+    """
+    Test that NUL-delimited records are streamed as raw chunks.
+    """
+    mock_client = MagicMock()
+    container = mock_client.containers.run.return_value
+    container.logs.return_value = iter([b"1\0/mnt/v\0dir", b"ectory\0"])
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    chunks = docker_client.stream_directory_records_with_find("v", "d")
+
+    assert list(chunks) == [b"1\0/mnt/v\0dir", b"ectory\0"]
+    command = mock_client.containers.run.call_args.kwargs["command"]
+    assert command[:2] == ["sh", "-c"]
+    assert command[2] == DockerClient.build_find_command(
+        "/mnt/v/d", record_format="nul"
+    )
+    container.remove.assert_called_once_with(force=True)
+
+
+def test_stream_directory_level_with_find():
+    """
+    Test that a directory level is listed with the totals of its
+    subdirectories, then the records of its entries only.
+    """
+    mock_client = MagicMock()
+    container = mock_client.containers.run.return_value
+    container.logs.return_value = iter([b"4\t/mnt/v/my dir\n\0"])
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    chunks = docker_client.stream_directory_level_with_find("v", "my dir")
+
+    assert list(chunks) == [b"4\t/mnt/v/my dir\n\0"]
+    command = mock_client.containers.run.call_args.kwargs["command"][2]
+    assert command.startswith(
+        "du -k -d 1 '/mnt/v/my dir' 2>/dev/null; printf '\\0'; "
+        "find '/mnt/v/my dir' -maxdepth 1 -exec sh -c "
+    )
+
+
+def test_stream_directory_totals_with_du():
+    """
+    Test that directory totals are measured with a depth-bounded 'du'.
+    """
+    mock_client = MagicMock()
+    container = mock_client.containers.run.return_value
+    container.logs.return_value = iter([b"4\t/mnt/v\n"])
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    chunks = docker_client.stream_directory_totals_with_du("v", 2, "a b")
+
+    assert list(chunks) == [b"4\t/mnt/v\n"]
+    assert mock_client.containers.run.call_args.kwargs["command"] == [
+        "sh",
+        "-c",
+        "du -k -d 2 '/mnt/v/a b' 2>/dev/null",
+    ]
+
+
+def test_stream_in_container_removes_container_on_close():
+    """
+    Test that the helper container is removed when the consumer
+    stops reading early.
+    """
+    mock_client = MagicMock()
+    container = mock_client.containers.run.return_value
+    container.logs.return_value = iter([b"a\nb\nc\n"])
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    lines = docker_client._stream_in_container("ls", "test_volume")
+    assert next(lines) == "a"
+    lines.close()
+
+    container.wait.assert_not_called()
+    container.remove.assert_called_once_with(force=True)
+
+
+def test_stream_in_container_logs_failed_command(caplog):
+    """
+    Test that a streamed command exiting with an error is logged once its
+    output is exhausted.
+    """
+    mock_client = MagicMock()
+    container = mock_client.containers.run.return_value
+    container.logs.return_value = iter([b"a\n"])
+    container.wait.return_value = {"StatusCode": 1}
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    assert list(docker_client._stream_in_container("ls", "volume1")) == ["a"]
+    assert "Command failed: exit code 1" in caplog.text
+    container.remove.assert_called_once_with(force=True)
+
+
+def test_run_in_container_with_helper_pool():
+    """
+    Test that commands go through the warm helper pool when enabled.
+    """
+    docker_client = DockerClient(use_helper_pool=True)
+    docker_client._helper_pool = MagicMock()
+    docker_client._helper_pool.exec_run.return_value = (0, b"output\n")
+
+    output = docker_client._run_in_container("ls", "volume1")
+
+    assert output == "output"
+    docker_client._helper_pool.exec_run.assert_called_once_with(
+        "ls", {"volume1": {"bind": "/mnt/volume1", "mode": "ro"}}
+    )
+
+
+def test_run_in_container_with_helper_pool_error(caplog, capsys):
+    """
+    Test that a non-zero exit code from the helper pool is a failure,
+    logged without writing to stdout.
+    """
+    docker_client = DockerClient(use_helper_pool=True)
+    docker_client._helper_pool = MagicMock()
+    docker_client._helper_pool.exec_run.return_value = (1, b"")
+
+    assert docker_client._run_in_container("ls", "volume1") is False
+    assert "exit code 1" in caplog.text
+    assert capsys.readouterr().out == ""
+
+
+def test_stream_in_container_with_helper_pool():
+    """
+    Test that streamed commands go through the warm helper pool.
+    """
+    docker_client = DockerClient(use_helper_pool=True)
+    docker_client.client = MagicMock()
+    docker_client._helper_pool = MagicMock()
+    docker_client._helper_pool.exec_stream.return_value = iter([b"a\nb"])
+
+    assert list(docker_client._stream_in_container("ls", "volume1")) == [
+        "a",
+        "b",
+    ]
+    docker_client.client.containers.run.assert_not_called()
+
+
+def test_stream_in_container_with_helper_pool_error(caplog):
+    """
+    Test that the exit code of a command streamed by the helper pool is
+    checked once its output is exhausted.
+    """
+
+    def exec_stream(command, volumes_binding):
+        yield b"a\n"
+        return 1
+
+    docker_client = DockerClient(use_helper_pool=True)
+    docker_client._helper_pool = MagicMock()
+    docker_client._helper_pool.exec_stream.side_effect = exec_stream
+
+    assert list(docker_client._stream_in_container("ls", "volume1")) == ["a"]
+    assert "Command failed: exit code 1" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "env, expected", [("1", True), ("true", True), ("", False), ("0", False)]
+)
+def test_helper_pool_enabled_from_environment(monkeypatch, env, expected):
+    """
+    Test that the helper pool is opt-in through HELPER_POOL.
+    """
+    monkeypatch.setenv("HELPER_POOL", env)
+
+    docker_client = DockerClient()
+
+    assert docker_client.use_helper_pool is expected
+    assert (docker_client.helper_pool is not None) is expected
+    if expected:
+        docker_client.helper_pool.close()
+
+
+def test_get_volumes_size_from_system_df():
+    """
+    Test that sizes known by the engine are used without any container,
+    as apparent sizes, the others being measured in a helper container.
+    """
+    mock_client = MagicMock()
+    mock_client.df.return_value = {
+        "Volumes": [
+            {"Name": "volume1", "UsageData": {"Size": 2048, "RefCount": 1}},
+            {"Name": "volume2", "UsageData": {"Size": -1, "RefCount": 0}},
+            {"Name": "other", "UsageData": {"Size": 10, "RefCount": 0}},
+        ]
+    }
+    mock_client.containers.run.return_value = b"8192\t5000\t/mnt/volume2"
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    result = docker_client.get_volumes_size(
+        ["volume1", "volume2"], human_readable=False
+    )
+
+    assert result == {"volume1": 2048, "volume2": 5000}
+    assert docker_client.size_sources == {
+        "volume1": "df",
+        "volume2": "container",
+    }
+    assert docker_client._volume_size_cache["volume1"] == {
+        "size": VolumeSize(apparent=2048, disk=None),
+        "source": "df",
+        "timestamp": ANY,
+    }
+    assert docker_client._volume_size_cache["volume2"]["size"] == (
+        VolumeSize(apparent=5000, disk=8192)
+    )
+    assert mock_client.containers.run.call_args.kwargs["volumes"] == {
+        "volume2": {"bind": "/mnt/volume2", "mode": "ro"}
+    }
+
+
+def test_get_volumes_size_cached_in_bytes():
+    """
+    Test that a size measured for a caller is served from the cache to
+    callers asking for the other unit, in exact bytes.
+    """
+    mock_client = MagicMock()
+    mock_client.containers.run.return_value = b"1267712\t1263616\t/mnt/volume1"
+    docker_client = DockerClient(use_system_df=False)
+    docker_client.client = mock_client
+
+    assert docker_client.get_volumes_size("volume1") == {"volume1": "1.3M"}
+    assert docker_client.get_volumes_size("volume1", False) == {
+        "volume1": 1234 * 1024
+    }
+    assert list(docker_client.iter_exact_volumes_size("volume1")) == [
+        {"volume1": VolumeSize(1234 * 1024, disk=1267712)}
+    ]
+    mock_client.containers.run.assert_called_once()
+    assert docker_client._size_hints == {"volume1": 1234 * 1024}
+
+
+def test_get_volumes_size_from_system_df_only():
+    """
+    Test that no helper container is started when the engine knows
+    every size.
+    """
+    mock_client = MagicMock()
+    mock_client.df.return_value = {
+        "Volumes": [{"Name": "volume1", "UsageData": {"Size": 1536}}]
+    }
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    assert docker_client.get_volumes_size("volume1") == {"volume1": "1.5K"}
+    mock_client.containers.run.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "df",
+    [
+        docker.errors.APIError("not supported"),
+        {"Volumes": None},
+        {"Volumes": [{"Name": "volume1", "UsageData": None}]},
+    ],
+)
+def test_df_volumes_size_unavailable(df):
+    """
+    Test that missing 'system df' data yields no size.
+    """
+    mock_client = MagicMock()
+    if isinstance(df, Exception):
+        mock_client.df.side_effect = df
+    else:
+        mock_client.df.return_value = df
+
+    docker_client = DockerClient()
+    docker_client.client = mock_client
+
+    assert docker_client.df_volumes_size(["volume1"]) == {}
+
+
+def test_get_volumes_size_without_system_df():
+    """
+    Test that 'system df' can be disabled.
+    """
+    mock_client = MagicMock()
+    mock_client.containers.run.return_value = b"4096\t1024\t/mnt/volume1"
+
+    docker_client = DockerClient(use_system_df=False)
+    docker_client.client = mock_client
+
+    assert docker_client.get_volumes_size("volume1") == {"volume1": "1.0K"}
+    mock_client.df.assert_not_called()
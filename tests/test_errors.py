@@ -1,6 +1,9 @@
 import pytest
 
-from docker_volume_analyzer.errors import DockerNotAvailableError
+from docker_volume_analyzer.errors import (
+    DockerNotAvailableError,
+    ScanCancelledError,
+)
 
 EXCEPTIONS = [
     (
@@ -8,6 +11,7 @@ EXCEPTIONS = [
         "Docker is not available. "
         "Please ensure Docker is installed and running.",
     ),
+    (ScanCancelledError, "The volume scan was cancelled."),
 ]
 
 
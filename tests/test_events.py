@@ -0,0 +1,224 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.events import DockerEventWatcher
+from docker_volume_analyzer.helper_pool import HelperContainerPool
+from docker_volume_analyzer.units import VolumeSize
+
+
+def summary(container_id, volume_name, name="web", rw=False, state=""):
+    return {
+        "Id": container_id,
+        "Names": [f"/{name}"],
+        "State": state,
+        "Mounts": [{"Type": "volume", "Name": volume_name, "RW": rw}],
+    }
+
+
+def event(type_, action, actor_id, **attributes):
+    return {
+        "Type": type_,
+        "Action": action,
+        "Actor": {"ID": actor_id, "Attributes": attributes},
+    }
+
+
+@pytest.fixture
+def docker_client():
+    """Fixture for a DockerClient with cached sizes and two containers."""
+    docker_client = DockerClient()
+    docker_client.client = MagicMock()
+    docker_client.client.api.containers.return_value = [
+        summary("c1" * 8, "volume1"),
+        summary("c2" * 8, "volume2", name="db"),
+    ]
+    docker_client._volume_size_cache = {
+        name: {"size": "1K", "timestamp": time.time()}
+        for name in ("volume1", "volume2", "volume3")
+    }
+    return docker_client
+
+
+@pytest.fixture
+def watcher(docker_client):
+    """Fixture for a watcher with its initial index built."""
+    watcher = DockerEventWatcher(docker_client)
+    watcher._subscribe()
+    return watcher
+
+
+@pytest.mark.parametrize(
+    "attributes, evicted",
+    [
+        ({"container": "c3", "read/write": "true"}, True),
+        ({"container": "c3", "read/write": "false"}, False),
+    ],
+)
+@pytest.mark.parametrize("action", ["mount", "unmount"])
+def test_volume_mount_evicts_only_read_write_mounts(
+    docker_client, watcher, action, attributes, evicted
+):
+    """Test that only read-write mounts evict the volume size."""
+    watcher.handle(event("volume", action, "volume3", **attributes))
+
+    assert ("volume3" not in docker_client._volume_size_cache) is evicted
+    assert "volume1" in docker_client._volume_size_cache
+
+
+def test_volume_destroy(docker_client, watcher):
+    """Test that a destroyed volume leaves the cache and the index."""
+    watcher.handle(event("volume", "destroy", "volume1"))
+
+    assert "volume1" not in docker_client._volume_size_cache
+    assert "volume1" not in watcher.mounts_index()
+    assert "volume2" in docker_client._volume_size_cache
+
+
+def test_container_create_adds_mounts(docker_client, watcher):
+    """Test that a created container is added to the index."""
+    docker_client.client.api.containers.return_value = [
+        summary("c3" * 8, "volume1", name="worker")
+    ]
+
+    watcher.handle(event("container", "create", "c3" * 8))
+
+    docker_client.client.api.containers.assert_called_with(
+        all=True, filters={"id": "c3" * 8}
+    )
+    assert [
+        c["container_name"] for c in watcher.mounts_index()["volume1"]
+    ] == [
+        "web",
+        "worker",
+    ]
+
+
+def test_container_destroy_removes_mounts(watcher):
+    """Test that a destroyed container leaves the index."""
+    watcher.handle(event("container", "destroy", "c2" * 8))
+
+    assert set(watcher.mounts_index()) == {"volume1"}
+
+
+def test_container_die_evicts_its_volumes(docker_client, watcher):
+    """Test that a stopped container evicts the volumes it mounted."""
+    watcher.handle(event("container", "die", "c2" * 8))
+
+    assert set(docker_client._volume_size_cache) == {"volume1", "volume3"}
+
+
+def test_container_start_and_die_track_written_volumes(docker_client, watcher):
+    """
+    Test that volumes mounted read-write by running containers are known,
+    from the initial index then from start and die events.
+    """
+    docker_client.client.api.containers.return_value = [
+        summary("c1" * 8, "volume1", rw=True, state="running"),
+        summary("c2" * 8, "volume2", name="db", rw=True, state="exited"),
+        summary("c3" * 8, "volume3", name="ro", state="running"),
+    ]
+    watcher._subscribe()
+
+    assert [watcher.is_written(v) for v in ("volume1", "volume2")] == [
+        True,
+        False,
+    ]
+    assert not watcher.is_written("volume3")
+    assert not watcher.is_written("unknown")
+
+    watcher.handle(event("container", "start", "c2" * 8))
+    watcher.handle(event("container", "die", "c1" * 8))
+
+    assert not watcher.is_written("volume1")
+    assert watcher.is_written("volume2")
+    assert "volume1" not in docker_client._volume_size_cache
+    assert "volume2" in docker_client._volume_size_cache
+
+
+def test_written_volumes_keep_default_cache_timeout(docker_client, watcher):
+    """
+    Test that while watching events, sizes stay cached longer except for
+    the volumes which running containers can write to.
+    """
+    docker_client.client.api.containers.return_value = [
+        summary("c1" * 8, "volume1", rw=True, state="running"),
+    ]
+    watcher._subscribe()
+    watcher._thread = MagicMock(is_alive=lambda: True)
+    docker_client._event_watcher = watcher
+    docker_client._cache_timeout = 3600
+    docker_client._volume_size_cache = {
+        name: {"size": VolumeSize(1024), "timestamp": time.time() - 120}
+        for name in ("volume1", "volume2")
+    }
+    docker_client.client.df.return_value = {
+        "Volumes": [{"Name": "volume1", "UsageData": {"Size": 2048}}]
+    }
+
+    sizes = docker_client.get_volumes_size(["volume1", "volume2"], False)
+
+    assert sizes == {"volume1": 2048, "volume2": 1024}
+
+
+def test_helper_container_events_are_ignored(docker_client, watcher):
+    """Test that the analyzer's own helper containers are ignored."""
+    attributes = {HelperContainerPool.LABEL: "true"}
+    watcher.handle(event("container", "create", "h1" * 8, **attributes))
+    watcher.handle(event("container", "die", "c1" * 8, **attributes))
+
+    assert len(docker_client._volume_size_cache) == 3
+    assert docker_client.client.api.containers.call_count == 1
+
+
+def test_mounts_index_is_a_copy(watcher):
+    """Test that callers cannot alter the live index."""
+    watcher.mounts_index()["volume1"].clear()
+
+    assert len(watcher.mounts_index()["volume1"]) == 1
+
+
+def test_start_event_watcher(docker_client, monkeypatch):
+    """
+    Test that the live index is served and the cache timeout extended
+    while the watcher runs, and that the cache is cleared when the stream
+    is interrupted.
+    """
+    received = threading.Event()
+
+    def stream():
+        yield event("volume", "destroy", "volume3")
+        received.set()
+        raise ConnectionError("stream lost")
+
+    docker_client.client.events.side_effect = lambda **kwargs: stream()
+    monkeypatch.setattr(
+        "docker_volume_analyzer.docker_client.DockerEventWatcher",
+        lambda client: DockerEventWatcher(client, retry_delay=0.01),
+    )
+
+    docker_client.start_event_watcher(cache_timeout=600)
+    watcher = docker_client._event_watcher
+    assert received.wait(1)
+
+    assert docker_client._cache_timeout == 600
+    docker_client.client.events.assert_called_with(
+        decode=True, filters={"type": ["volume", "container"]}
+    )
+    for _ in range(100):
+        if docker_client.client.events.call_count > 1:
+            break
+        time.sleep(0.01)
+    assert docker_client._volume_size_cache == {}
+
+    calls = docker_client.client.api.containers.call_count
+    assert set(docker_client.get_mounts_index()) == {"volume1", "volume2"}
+    assert docker_client.client.api.containers.call_count == calls
+
+    docker_client.stop_event_watcher()
+    watcher._thread.join(1)
+    assert not watcher.running
+    assert docker_client._cache_timeout == DockerClient.CACHE_TIMEOUT
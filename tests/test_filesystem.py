@@ -1,11 +1,18 @@
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 
 import pytest
 
+from docker_volume_analyzer import filesystem
 from docker_volume_analyzer.filesystem import (
     FileNode,
     FileSystem,
+    FileSystemBuilder,
+    add_directory_totals,
+    parse_du_output,
     parse_find_output,
+    parse_find_records,
 )
 
 
@@ -40,6 +47,31 @@ def fs():
     return FileSystem()
 
 
+def records(*entries):
+    """Builds a NUL-delimited batch of (type, path, size) entries."""
+    fields = [str(len(entries)).encode()]
+    fields.extend(path for _, path, _ in entries)
+    for type_str, _, size in entries:
+        fields.extend(
+            [type_str, str(size).encode(), b"-rw-r--r--"]
+            + [b"user", b"group", b"1633024800"]
+        )
+    return b"".join(field + b"\0" for field in fields) + b"\0"
+
+
+@pytest.fixture
+def sample_records():
+    """Sample NUL-delimited output, in two batches."""
+    return records(
+        (b"directory", b"/mnt/docker_volume", 4096),
+        (b"directory", b"/mnt/docker_volume/dir1", 4096),
+    ) + records(
+        (b"regular file", b"/mnt/docker_volume/dir1/a|b.txt", 1024),
+        (b"regular file", b"/mnt/docker_volume/dir1/new\nline", 2048),
+        (b"regular file", b"/mnt/docker_volume/dir1/caf\xe9", 10),
+    )
+
+
 @pytest.fixture
 def sample_output():
     """Sample output from the 'find' command."""
@@ -65,6 +97,49 @@ def test_add_node_to_filesystem(fs, make_file):
     assert fs.index["dir1/file.txt"].size == 1024
 
 
+def test_file_node_is_compact(make_file):
+    """Test that nodes have no instance dictionary nor children map."""
+    node = make_file("file.txt", "file.txt", 1024)
+
+    assert not hasattr(node, "__dict__")
+    assert node._childrens is None
+    assert node.childrens == {}
+    with pytest.raises(TypeError):
+        node.childrens["other"] = node
+
+
+def test_file_node_mtime():
+    """Test that mtime is stored as an integer timestamp."""
+    node = FileNode("a", "a", 0, 1633024800, "-rw-r--r--", "u", "g", False)
+
+    assert node.mtime_epoch == 1633024800
+    assert node.mtime == datetime.fromtimestamp(1633024800)
+
+    node.mtime = datetime.fromtimestamp(1700000000.5)
+    assert node.mtime_epoch == 1700000000
+
+
+def test_file_node_interns_strings():
+    """Test that mode and owner strings are shared between nodes."""
+    first = FileNode("a", "a", 0, 0, "".join("-rw-"), "us" + "er", "g", False)
+    second = FileNode("b", "b", 0, 0, "".join("-rw-"), "u" + "ser", "g", False)
+
+    assert first.mode is second.mode
+    assert first.user is second.user
+
+
+def test_file_node_children(fs, make_file):
+    """Test adding and removing children."""
+    fs.add_node(make_file("file.txt", "dir1/file.txt", 1024))
+    directory = fs.index["dir1"]
+
+    assert list(directory.childrens) == ["file.txt"]
+    assert directory.childrens["file.txt"].parent is directory
+
+    directory.remove_child("file.txt")
+    assert directory._childrens is None
+
+
 def test_compute_directory_sizes(fs, make_file):
     """Test computing directory sizes in the FileSystem."""
     fs.add_node(make_file("file1.txt", "dir1/file1.txt", 1024))
@@ -73,6 +148,56 @@ def test_compute_directory_sizes(fs, make_file):
     fs.compute_directory_sizes()
 
     assert fs.index["dir1"].size == 3072
+    assert fs.index[""].size == 3072
+
+
+def test_compute_directory_sizes_nested(fs, make_file):
+    """Test that sizes accumulate through every level up to the root."""
+    fs.add_node(make_file("a", "a/b/c/d/file.txt", 10))
+    fs.add_node(make_file("top.txt", "top.txt", 1))
+    fs.add_node(make_file("other.txt", "a/b/other.txt", 100))
+
+    fs.compute_directory_sizes()
+
+    assert fs.index["a/b/c/d"].size == 10
+    assert fs.index["a/b"].size == 110
+    assert fs.index["a"].size == 110
+    assert fs.index[""].size == 111
+
+
+def test_add_node_in_any_order(fs, make_file):
+    """Test that entries out of 'find' order land in the right place."""
+    paths = ["x/y/f1", "a/f2", "x/y/z/f3", "x/f4", "a/b/f5", "x/y/f6"]
+    for path in paths:
+        fs.add_node(make_file(path.rsplit("/")[-1], path, 1))
+
+    assert list(fs.index["x/y"].childrens) == ["f1", "z", "f6"]
+    assert list(fs.index["x"].childrens) == ["y", "f4"]
+    assert list(fs.index["a"].childrens) == ["f2", "b"]
+    for path in paths:
+        node = fs.index[path]
+        assert node.parent is fs.index[path.rpartition("/")[0]]
+        assert node.name == path.rpartition("/")[2]
+
+
+def test_add_node_ignores_known_paths(fs, make_file):
+    """Test that a path already in the tree is not replaced."""
+    fs.add_node(make_file("file.txt", "dir1/file.txt", 1))
+    fs.add_node(make_file("file.txt", "/dir1/file.txt/", 2))
+
+    assert fs.index["dir1/file.txt"].size == 1
+    assert len(fs.index) == 3
+
+
+def test_add_node_after_delete(fs, make_file):
+    """Test adding nodes below a deleted then recreated directory."""
+    fs.add_node(make_file("file1.txt", "dir1/sub/file1.txt", 1))
+    fs.delete_node("dir1/sub")
+
+    fs.add_node(make_file("file2.txt", "dir1/sub/file2.txt", 2))
+
+    assert list(fs.index["dir1/sub"].childrens) == ["file2.txt"]
+    assert fs.index["dir1/sub"].parent is fs.index["dir1"]
 
 
 def test_parse_find_output(sample_output):
@@ -116,18 +241,21 @@ def test_parse_find_output_with_strip_prefix(
     assert non_root_keys == expected_keys
 
 
-def test_parse_find_output_malformed_line():
-    """Test parsing output with a malformed line."""
+def test_parse_find_output_malformed_line(capsys):
+    """Test parsing output with malformed lines."""
     output = (
         "directory|/mnt/docker_volume/dir1|4096"
         "|drwxr-xr-x|user|group|1633024800\n"
-        "malformed_line"
+        "malformed_line\n"
+        "file|/mnt/docker_volume/dir1/a|size|-rw-r--r--|user|group|0"
     )
 
     fs = parse_find_output(output)
 
     assert "dir1" in fs.index
     assert len(fs.index) == 2
+    assert fs.malformed == 2
+    assert capsys.readouterr().out == ""
 
 
 def test_parse_find_output_empty():
@@ -179,3 +307,329 @@ def test_delete_node(fs, make_file):
         match="Path 'nonexistent' does not exist in the file system.",
     ):
         fs.delete_node("nonexistent")
+
+
+@pytest.fixture
+def sized_fs():
+    """Fixture for a FileSystem with computed directory sizes."""
+    fs = FileSystem()
+    fs.add_entries(
+        [
+            ("b.txt", 30, 3, "-rw-r--r--", "user", "group", False),
+            ("a", 0, 2, "drwxr-xr-x", "user", "group", True),
+            ("a/big.bin", 100, 1, "-rw-r--r--", "user", "group", False),
+            ("c.txt", 50, 1, "-rw-r--r--", "user", "group", False),
+        ]
+    )
+    return fs.compute_directory_sizes()
+
+
+def test_sorted_children(sized_fs):
+    """Test that children are sorted by name, size or modification time."""
+
+    def names(nodes):
+        return [node.name for node in nodes]
+
+    assert names(sized_fs.sorted_children("")) == ["a", "b.txt", "c.txt"]
+    assert names(sized_fs.sorted_children("", "size", reverse=True)) == [
+        "a",
+        "c.txt",
+        "b.txt",
+    ]
+    assert names(sized_fs.sorted_children("", "mtime")) == [
+        "c.txt",
+        "a",
+        "b.txt",
+    ]
+    assert sized_fs.sorted_children("missing") == []
+    with pytest.raises(ValueError, match="Unknown sort key 'owner'."):
+        sized_fs.sorted_children("", "owner")
+
+
+def test_sorted_children_are_cached_until_changed(sized_fs):
+    """Test that a view is sorted once, until the directory changes."""
+    view = sized_fs.sorted_children("", "size")
+
+    assert sized_fs.sorted_children("", "size") is view
+
+    sized_fs.delete_node("a/big.bin")
+    assert [node.name for node in sized_fs.sorted_children("", "size")] == [
+        "a",
+        "b.txt",
+        "c.txt",
+    ]
+
+    view = sized_fs.sorted_children("", "size")
+    sized_fs.add_entry("d.txt", 1, 0, "-rw-r--r--", "user", "group", False)
+    assert sized_fs.sorted_children("", "size") is not view
+    assert len(sized_fs.sorted_children("", "size")) == 4
+
+
+def test_largest(sized_fs):
+    """Test the largest files and directories queries."""
+    assert [node.path for node in sized_fs.largest(2)] == [
+        "a/big.bin",
+        "c.txt",
+    ]
+    assert [node.path for node in sized_fs.largest(directories=True)] == ["a"]
+    assert (
+        sized_fs.largest(2)
+        == sized_fs.largest(FileSystem.LARGEST_INDEX_SIZE + 1)[:2]
+    )
+
+    sized_fs.delete_node("a/big.bin")
+    assert [node.path for node in sized_fs.largest(1)] == ["c.txt"]
+
+
+def test_search(sized_fs):
+    """Test searching names with size, age, owner and directory filters."""
+    now = int(time.time())
+    sized_fs.add_entry("a/old.log", 5, 1, "-rw-r--r--", "app", "app", False)
+    sized_fs.add_entry("new.log", 5, now, "-rw-r--r--", "app", "app", False)
+
+    def paths(*args, **kwargs):
+        return sorted(node.path for node in sized_fs.search(*args, **kwargs))
+
+    assert paths("*.log") == ["a/old.log", "new.log"]
+    assert paths("*.txt", min_size=40) == ["c.txt"]
+    assert paths("*.log", older_than=timedelta(days=1)) == ["a/old.log"]
+    assert paths("*", user="app") == ["a/old.log", "new.log"]
+    assert paths("*", under="a/") == ["a/big.bin", "a/old.log"]
+    assert paths("^[ab]", "regex") == ["a", "a/big.bin", "b.txt"]
+    with pytest.raises(ValueError):
+        paths("*", "sql")
+
+
+def test_search_index_is_kept_until_changed(sized_fs):
+    """Test that the name index is built once, until the tree changes."""
+    list(sized_fs.search("b.txt"))
+    index = sized_fs._names
+
+    assert [node.path for node in sized_fs.search("*.bin")] == ["a/big.bin"]
+    assert sized_fs._names is index
+
+    sized_fs.delete_node("a/big.bin")
+    assert list(sized_fs.search("*.bin")) == []
+
+
+def test_file_system_builder_is_incremental(sample_output):
+    """Test that the builder exposes nodes as soon as lines are fed."""
+    builder = FileSystemBuilder()
+    lines = iter(sample_output.split("\n"))
+
+    builder.feed_line(next(lines))
+    assert "dir1" in builder.fs.index
+    assert "dir1/file1.txt" not in builder.fs.index
+
+    fs = builder.feed(lines).build()
+    assert fs is builder.fs
+    assert "dir1/file1.txt" in fs.index
+    assert "dir1/file2.txt" in fs.index
+
+
+def test_file_system_builder_skips_empty_lines():
+    """Test that empty lines are ignored by the builder."""
+    fs = FileSystemBuilder().feed(["", ""]).build()
+
+    assert len(fs.index) == 1
+
+
+def test_parse_find_records(sample_records):
+    """Test parsing NUL-delimited records, whatever the file names."""
+    fs = parse_find_records(memoryview(sample_records))
+
+    assert set(fs.index) == {
+        "",
+        "dir1",
+        "dir1/a|b.txt",
+        "dir1/new\nline",
+        "dir1/caf\udce9",
+    }
+    assert fs.index["dir1"].is_directory
+    assert fs.index["dir1/a|b.txt"].size == 1024
+    assert fs.index["dir1/a|b.txt"].user == "user"
+    assert fs.index["dir1/new\nline"].mtime == datetime.fromtimestamp(
+        1633024800
+    )
+    assert fs.index["dir1/caf\udce9"].parent is fs.index["dir1"]
+    assert fs.malformed == 0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_file_system_builder_feed_chunks(sample_records, chunk_size):
+    """Test that batches split across chunks are reassembled."""
+    chunks = [
+        sample_records[i : i + chunk_size]
+        for i in range(0, len(sample_records), chunk_size)
+    ]
+    builder = FileSystemBuilder()
+
+    builder.feed_chunk(chunks[0])
+    assert len(builder.fs.index) == 1
+
+    fs = builder.feed_records(chunks[1:]).build()
+    assert len(fs.index) == 5
+    assert fs.malformed == 0
+
+
+def test_parse_find_records_malformed():
+    """Test that malformed records and truncated output are counted."""
+    data = records(
+        (b"directory", b"/mnt/docker_volume/dir1", 4096),
+        (b"regular file", b"/mnt/docker_volume/dir1/a", b"size"),
+        (b"regular file", b"/mnt/docker_volume/dir1/b", 1),
+    )
+
+    fs = parse_find_records(data + b"3\0/mnt/docker_volume/c\0")
+
+    assert set(fs.index) == {"", "dir1", "dir1/b"}
+    assert fs.malformed == 2
+
+
+def test_parse_find_records_bad_header():
+    """Test that the output is dropped once the framing is lost."""
+    data = b"garbage\0" + records((b"directory", b"/mnt/docker_volume/d", 1))
+
+    fs = parse_find_records(data)
+
+    assert len(fs.index) == 1
+    assert fs.malformed == 1
+
+
+def test_parse_find_records_strip_prefix():
+    """Test that only the prefix is stripped from paths."""
+    data = records(
+        (b"directory", b"/mnt/vol", 4096),
+        (b"directory", b"/mnt/vol/dir", 4096),
+        (b"regular file", b"/mnt/vol/dir/mnt/vol/a", 1),
+    )
+
+    fs = parse_find_records(data, strip_prefix="/mnt/vol")
+
+    assert "dir/mnt/vol/a" in fs.index
+    assert fs.index["dir/mnt/vol/a"].parent.path == "dir/mnt/vol"
+
+
+@pytest.fixture
+def large_records():
+    """NUL-delimited output of 50 batches of 20 files."""
+    return records((b"directory", b"/mnt/docker_volume/dir", 4096)) + b"".join(
+        records(
+            *(
+                (
+                    b"regular file",
+                    f"/mnt/docker_volume/dir/{i}-{j}".encode(),
+                    j,
+                )
+                for j in range(20)
+            )
+        )
+        for i in range(50)
+    )
+
+
+def test_parse_find_records_in_parallel(large_records, monkeypatch):
+    """Test that records parsed by a pool of processes are all merged."""
+    monkeypatch.setattr(FileSystemBuilder, "PIECE_SIZE", 1000)
+
+    fs = parse_find_records(large_records, parallel_threshold=1, workers=2)
+
+    assert list(fs.index) == list(parse_find_records(large_records).index)
+    assert fs.index["dir/49-19"].size == 19
+    assert fs.index["dir/49-19"].user == "user"
+    assert fs.index["dir/49-19"].parent is fs.index["dir"]
+    assert fs.malformed == 0
+
+
+def test_parallel_parser_workers_not_forked(large_records, monkeypatch):
+    """
+    Test that the parsing processes of a threaded caller are started by
+    a fork server instead of being forked from it.
+    """
+    monkeypatch.setattr(FileSystemBuilder, "PIECE_SIZE", 1000)
+    start_methods = []
+    executor = filesystem.ProcessPoolExecutor
+
+    def make_executor(*args, **kwargs):
+        start_methods.append(kwargs["mp_context"].get_start_method())
+        return executor(*args, **kwargs)
+
+    monkeypatch.setattr(filesystem, "ProcessPoolExecutor", make_executor)
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(
+            parse_find_records(large_records, parallel_threshold=1, workers=2)
+        )
+    )
+    thread.start()
+    thread.join(60)
+
+    assert start_methods == ["forkserver"]
+    assert len(results[0].index) == len(
+        parse_find_records(large_records).index
+    )
+
+
+def test_file_system_builder_switches_to_parallel(large_records, monkeypatch):
+    """
+    Test that the builder parses the output past the threshold in
+    parallel, and still counts truncated output.
+    """
+    monkeypatch.setattr(FileSystemBuilder, "PIECE_SIZE", 1000)
+    chunks = [
+        large_records[i : i + 300] for i in range(0, len(large_records), 300)
+    ]
+    builder = FileSystemBuilder(parallel_threshold=600, workers=2)
+
+    fs = builder.feed_records(chunks + [b"1\0/mnt/docker_volume/x\0"]).build()
+
+    assert len(fs.index) == 1002
+    assert fs.malformed == 1
+
+
+def test_parse_find_output_in_parallel(sample_output, monkeypatch):
+    """Test that lines parsed by a pool of processes are all merged."""
+    monkeypatch.setattr(FileSystemBuilder, "PIECE_SIZE", 10)
+
+    fs = parse_find_output(
+        sample_output + "\nmalformed", parallel_threshold=1, workers=2
+    )
+
+    assert set(fs.index) == {"", "dir1", "dir1/file1.txt", "dir1/file2.txt"}
+    assert fs.malformed == 1
+
+
+def test_single_worker_never_parses_in_parallel():
+    """Test that no pool is started without several workers."""
+    builder = FileSystemBuilder(parallel_threshold=1, workers=1)
+
+    assert builder.parallel_threshold is None
+
+
+def test_parse_du_output():
+    """Test that 'du -k' totals are keyed by relative path, in bytes."""
+    output = (
+        "8\t/mnt/docker_volume/a\n"
+        "12\t/mnt/docker_volume/new\nline\n"
+        "40\t/mnt/docker_volume\n"
+    )
+
+    assert parse_du_output(output) == {
+        "a": 8192,
+        "new\nline": 12288,
+        "": 40960,
+    }
+
+
+def test_add_directory_totals():
+    """Test that directories get their totals, known or not."""
+    fs = FileSystem()
+    fs.add_entry("a", 4096, 0, "drwxr-xr-x", "root", "root", True)
+
+    add_directory_totals({"a/b/c": 10, "a": 30, "": 40}, fs)
+
+    assert fs.index["a"].size == 30
+    assert fs.index["a"].user == "root"
+    assert fs.index["a/b/c"].size == 10
+    assert fs.index["a/b/c"].is_directory
+    assert fs.index[""].size == 40
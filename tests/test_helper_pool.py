@@ -0,0 +1,329 @@
+import socket
+import tempfile
+import threading
+import time
+from unittest.mock import ANY, MagicMock
+
+import docker
+import pytest
+
+from docker_volume_analyzer.helper_pool import HelperContainerPool
+
+BINDING = {"volume1": {"bind": "/mnt/volume1", "mode": "ro"}}
+
+
+@pytest.fixture(autouse=True)
+def owners_directory(tmp_path, monkeypatch):
+    """Fixture keeping the owner files of the pools in tmp_path."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def client():
+    """Fixture for a mocked Docker SDK client."""
+    client = MagicMock()
+    client.containers.run.side_effect = lambda **kwargs: MagicMock()
+    return client
+
+
+def warm(pool, volumes_binding=BINDING):
+    """Starts the warm container of a set of volumes, left idle."""
+    entry = pool._acquire(volumes_binding)
+    pool._release(entry)
+    return entry["container"]
+
+
+@pytest.fixture
+def pool(client):
+    """Fixture for a helper pool with a closed reaper."""
+    pool = HelperContainerPool(client, idle_timeout=60)
+    yield pool
+    pool.close()
+
+
+def test_exec_run_reuses_warm_container(client, pool):
+    """
+    Test that consecutive commands on the same volumes share a container.
+    """
+    container = warm(pool)
+    container.exec_run.return_value = MagicMock(exit_code=0, output=b"out")
+
+    assert pool.exec_run(["ls"], BINDING) == (0, b"out")
+    assert pool.exec_run(["ls"], BINDING) == (0, b"out")
+    client.containers.run.assert_called_once_with(
+        image="alpine",
+        command=["tail", "-f", "/dev/null"],
+        volumes=BINDING,
+        labels={
+            HelperContainerPool.LABEL: "true",
+            HelperContainerPool.OWNER_LABEL: ANY,
+        },
+        auto_remove=True,
+        detach=True,
+    )
+    container.exec_run.assert_called_with(
+        cmd=["ls"], stdout=True, stderr=False
+    )
+
+
+def test_exec_run_one_container_per_volume_set(client, pool):
+    """
+    Test that a different set of volumes gets its own container.
+    """
+    pool.exec_run(["ls"], BINDING)
+    pool.exec_run(["ls"], {"volume2": {"bind": "/mnt/volume2", "mode": "ro"}})
+    pool.exec_run(["ls"], {"volume1": {"bind": "/mnt/volume1", "mode": "rw"}})
+
+    assert client.containers.run.call_count == 3
+
+
+def stream_output(container, chunks, exit_code=0):
+    """
+    Makes the commands streamed in a mocked container write chunks, and
+    exit with a code.
+    """
+    api = container.client.api
+    api.exec_create.return_value = {"Id": "exec-id"}
+    api.exec_start.return_value = iter(chunks)
+    api.exec_inspect.return_value = {"ExitCode": exit_code}
+    return api
+
+
+def test_exec_stream_returns_output_generator(pool):
+    """
+    Test that exec_stream runs the command in streaming mode, and
+    returns its exit code.
+    """
+    container = warm(pool)
+    api = stream_output(container, [b"a\n"], exit_code=2)
+
+    stream = pool.exec_stream(["ls", "-l"], BINDING)
+    assert next(stream) == b"a\n"
+    with pytest.raises(StopIteration) as stop:
+        next(stream)
+
+    assert stop.value.value == 2
+    api.exec_create.assert_called_once_with(
+        container.id, ANY, stdout=True, stderr=False
+    )
+    cmd = api.exec_create.call_args.args[1]
+    assert cmd[0:2] == ["sh", "-c"]
+    assert cmd[3:] == ["sh", "ls", "-l"]
+    api.exec_start.assert_called_once_with("exec-id", stream=True)
+    api.exec_inspect.assert_called_once_with("exec-id")
+    assert pool._containers[pool._key(BINDING)]["busy"] == 0
+
+
+def test_exec_stream_busy_container_not_reaped(pool):
+    """
+    Test that a container streaming the output of a command is kept
+    by the reaper, however long the command runs.
+    """
+    container = warm(pool)
+    stream_output(container, [b"a", b"b"])
+    pool.idle_timeout = 0
+
+    stream = pool.exec_stream(["find"], BINDING)
+    assert next(stream) == b"a"
+    time.sleep(0.01)
+    pool.reap_idle()
+    container.remove.assert_not_called()
+
+    assert list(stream) == [b"b"]
+    time.sleep(0.01)
+    pool.reap_idle()
+    container.remove.assert_called_once_with(force=True)
+
+
+def test_exec_stream_closed_kills_command(pool):
+    """
+    Test that closing a stream before its end kills the command through
+    the PID file written by its shell, and releases the container.
+    """
+    container = warm(pool)
+    api = stream_output(container, [b"a", b"b"])
+
+    stream = pool.exec_stream(["find"], BINDING)
+    assert next(stream) == b"a"
+    stream.close()
+
+    script = api.exec_create.call_args.args[1][2]
+    pid_file = script.split()[3].rstrip(";")
+    api.exec_inspect.assert_not_called()
+    kill = container.exec_run.call_args.kwargs["cmd"]
+    assert kill[0:2] == ["sh", "-c"]
+    assert f"kill_tree $(cat {pid_file})" in kill[2]
+    assert pool._containers[pool._key(BINDING)]["busy"] == 0
+
+
+def test_exec_run_busy_until_command_returns(pool):
+    """
+    Test that a container is busy while running a command.
+    """
+    container = warm(pool)
+    entry = pool._containers[pool._key(BINDING)]
+
+    def exec_run(**kwargs):
+        assert entry["busy"] == 1
+        return MagicMock(exit_code=0, output=b"")
+
+    container.exec_run.side_effect = exec_run
+
+    assert pool.exec_run(["ls"], BINDING) == (0, b"")
+    assert entry["busy"] == 0
+
+
+def test_exec_run_recovers_from_dead_container(client, pool):
+    """
+    Test that a crashed helper container is replaced and the command
+    retried.
+    """
+    dead = warm(pool)
+    dead.exec_run.side_effect = docker.errors.APIError("is not running")
+
+    assert pool.exec_run(["ls"], BINDING)
+    dead.remove.assert_called_once_with(force=True)
+    assert warm(pool) is not dead
+    assert client.containers.run.call_count == 2
+
+
+def test_reap_idle_removes_idle_containers(pool):
+    """
+    Test that only containers idle for longer than the timeout are removed.
+    """
+    idle = warm(pool)
+    other = {"volume2": {"bind": "/mnt/volume2", "mode": "ro"}}
+    busy = warm(pool, other)
+    pool._containers[pool._key(BINDING)]["last_used"] -= 120
+
+    pool.reap_idle()
+
+    idle.remove.assert_called_once_with(force=True)
+    busy.remove.assert_not_called()
+    assert list(pool._containers) == [pool._key(other)]
+
+
+def test_close_removes_all_containers(client):
+    """
+    Test that closing the pool removes every container and stops
+    the reaper.
+    """
+    pool = HelperContainerPool(client, idle_timeout=0.01)
+    container = warm(pool)
+    container.remove.side_effect = docker.errors.APIError("gone")
+
+    pool.close()
+    time.sleep(0.05)
+
+    container.remove.assert_called_once_with(force=True)
+    assert pool._containers == {}
+    assert not pool._reaper.is_alive()
+
+
+def test_container_started_outside_pool_lock(client, pool):
+    """
+    Test that a slow container start does not block the other sets of
+    volumes, while the callers of the same set wait for it, and that it
+    is started once.
+    """
+    other = {"volume2": {"bind": "/mnt/volume2", "mode": "ro"}}
+    starting = threading.Event()
+    release = threading.Event()
+
+    def run(volumes, **kwargs):
+        if volumes is BINDING:
+            starting.set()
+            release.wait(5)
+        return MagicMock()
+
+    client.containers.run.side_effect = run
+    callers = [threading.Thread(target=warm, args=(pool,)) for _ in range(2)]
+    callers[0].start()
+    starting.wait(5)
+    callers[1].start()
+
+    unblocked = threading.Thread(target=warm, args=(pool, other))
+    unblocked.start()
+    unblocked.join(1)
+    assert not unblocked.is_alive()
+    assert client.containers.run.call_count == 2
+
+    release.set()
+    for caller in callers:
+        caller.join(5)
+    assert client.containers.run.call_count == 2
+    assert pool._containers[pool._key(BINDING)]["busy"] == 0
+
+
+def test_failed_start_retried_by_waiting_caller(client, pool):
+    """
+    Test that a caller waiting for a container whose start failed starts
+    it again.
+    """
+    client.containers.run.side_effect = [
+        docker.errors.APIError("pull failed"),
+        MagicMock(),
+    ]
+
+    with pytest.raises(docker.errors.APIError):
+        warm(pool)
+
+    assert pool._containers == {}
+    assert warm(pool)
+
+
+def test_orphan_containers_removed(client):
+    """
+    Test that a new pool removes the warm containers of the dead pools
+    of this host, keeping those of live pools and of other hosts.
+    """
+    hostname = socket.gethostname()
+
+    def container(owner):
+        return MagicMock(labels={HelperContainerPool.OWNER_LABEL: owner})
+
+    live = HelperContainerPool(client)
+    warm(live)
+    orphan = container(f"{hostname}/dead")
+    alive = container(
+        client.containers.run.call_args.kwargs["labels"][
+            HelperContainerPool.OWNER_LABEL
+        ]
+    )
+    remote = container("other-host/dead")
+    client.containers.list.return_value = [orphan, alive, remote]
+
+    pool = HelperContainerPool(client)
+
+    client.containers.list.assert_called_with(
+        filters={"label": HelperContainerPool.OWNER_LABEL}
+    )
+    orphan.remove.assert_called_once_with(force=True)
+    alive.remove.assert_not_called()
+    remote.remove.assert_not_called()
+    pool.close()
+    live.close()
+
+
+def test_orphan_owner_file_removed(client, owners_directory):
+    """
+    Test that the owner file of a closed pool is removed, and that the
+    containers of a pool which crashed are removed by the next one.
+    """
+    crashed = HelperContainerPool(client)
+    warm(crashed)
+    owner = client.containers.run.call_args.kwargs["labels"][
+        HelperContainerPool.OWNER_LABEL
+    ]
+    # The lock is released by the kernel when the process exits.
+    crashed._owner_file.close()
+    container = MagicMock(labels={HelperContainerPool.OWNER_LABEL: owner})
+    client.containers.list.return_value = [container]
+
+    pool = HelperContainerPool(client)
+    container.remove.assert_called_once_with(force=True)
+    assert len(list(owners_directory.iterdir())) == 1
+
+    pool.close()
+    assert list(owners_directory.iterdir()) == []
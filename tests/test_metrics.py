@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+from docker_volume_analyzer.metrics import VolumeCollector
+from docker_volume_analyzer.snapshots import VolumeSnapshot
+
+
+def samples(collector: VolumeCollector) -> dict:
+    return {
+        (sample.name, tuple(sample.labels.values())): sample.value
+        for family in collector.collect()
+        for sample in family.samples
+    }
+
+
+def test_collect():
+    """Test that metric families are built from the latest snapshot."""
+    refresher = MagicMock()
+    refresher.snapshot = VolumeSnapshot({"a": "4", "b": None}, taken_at=100.0)
+    refresher.snapshot.age = MagicMock(return_value=12.5)
+
+    assert samples(VolumeCollector(refresher)) == {
+        ("docker_volumes_total", ()): 2,
+        ("docker_volume_size_bytes", ("a",)): 4.0,
+        ("docker_volume_analyzer_snapshot_age_seconds", ()): 12.5,
+    }
+
+
+def test_collect_follows_snapshots():
+    """
+    Test that each scrape only exports the volumes of the latest snapshot.
+    """
+    refresher = MagicMock()
+    collector = VolumeCollector(refresher)
+    refresher.snapshot = VolumeSnapshot({"a": "4", "b": "8"}, 0)
+    assert ("docker_volume_size_bytes", ("b",)) in samples(collector)
+
+    refresher.snapshot = VolumeSnapshot({"a": "4"}, 0)
+
+    assert ("docker_volume_size_bytes", ("b",)) not in samples(collector)
+
+
+def test_collect_without_snapshot():
+    """Test that nothing is exported before the first snapshot."""
+    refresher = MagicMock(snapshot=None)
+
+    assert list(VolumeCollector(refresher).collect()) == []
@@ -0,0 +1,67 @@
+import pytest
+
+from docker_volume_analyzer.query import NameIndex, NameQuery
+
+NAMES = [
+    ("app.log", 1),
+    ("core.1234", 2),
+    (".log", 3),
+    ("app.log", 4),
+    ("archive.tar.gz", 5),
+    ("notes", 6),
+]
+
+
+@pytest.fixture
+def index():
+    """Fixture for an index of NAMES."""
+    return NameIndex(NAMES)
+
+
+def test_name_index(index):
+    """Test that nodes are indexed by name and names by suffix."""
+    assert index.nodes["app.log"] == [1, 4]
+    assert index.nodes["notes"] == 6
+    assert index.suffixes[".log"] == ["app.log", ".log"]
+    assert index.suffixes[""] == ["notes"]
+
+
+@pytest.mark.parametrize(
+    "pattern, syntax, expected",
+    [
+        ("*.log", "glob", [1, 4, 3]),
+        ("core.*", "glob", [2]),
+        ("app.log", "glob", [1, 4]),
+        ("missing", "glob", []),
+        ("*.tar.gz", "glob", [5]),
+        ("[an]*", "glob", [1, 4, 5, 6]),
+        (".log", "suffix", [1, 4, 3]),
+        ("tar.gz", "suffix", [5]),
+        (r"^core\.\d+$", "regex", [2]),
+        ("o", "regex", [1, 4, 2, 3, 6]),
+    ],
+)
+def test_name_query(index, pattern, syntax, expected):
+    """Test glob, suffix and regex queries."""
+    assert list(index.match(NameQuery(pattern, syntax))) == expected
+
+
+def test_name_query_uses_index(index):
+    """Test that exact names and '*.ext' globs are not matched by regex."""
+    assert NameQuery("app.log").exact == "app.log"
+    assert NameQuery("*.log").suffix == ".log"
+    assert NameQuery(".log", "suffix").suffix == ".log"
+    assert NameQuery("*.tar.gz").suffix is None
+
+
+@pytest.mark.parametrize(
+    "pattern, syntax, message",
+    [
+        ("*", "sql", "Unknown pattern syntax 'sql'."),
+        ("(", "regex", "Invalid regular expression"),
+    ],
+)
+def test_name_query_invalid(pattern, syntax, message):
+    """Test that invalid queries raise a ValueError."""
+    with pytest.raises(ValueError, match=message.replace("(", r"\(")):
+        NameQuery(pattern, syntax)
@@ -0,0 +1,90 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from docker_volume_analyzer.report_jobs import ReportJobs
+
+
+def report(**values):
+    """Returns a mock VolumeReport whose dictionary is the given values."""
+    return MagicMock(**{"to_dict.return_value": values})
+
+
+def wait_for(jobs, volume_name, timeout=5):
+    """Returns the status and result of a report once it is computed."""
+    deadline = time.monotonic() + timeout
+    status, result = jobs.get(volume_name)
+    while status == ReportJobs.PENDING and time.monotonic() < deadline:
+        time.sleep(0.01)
+        status, result = jobs.get(volume_name)
+    return status, result
+
+
+@pytest.fixture
+def compute():
+    return MagicMock(return_value=report(files=1))
+
+
+def test_report_computed_in_background(tmp_path, compute):
+    """
+    Test that the first request of a report starts computing it without
+    waiting for it, and that the next ones are served the report.
+    """
+    computed = threading.Event()
+    compute.side_effect = lambda name: computed.wait(5) and report(files=1)
+    jobs = ReportJobs(compute, str(tmp_path))
+
+    assert jobs.get("volume1") == (ReportJobs.PENDING, None)
+    assert jobs.get("volume1") == (ReportJobs.PENDING, None)
+
+    computed.set()
+
+    assert wait_for(jobs, "volume1") == (ReportJobs.DONE, {"files": 1})
+    compute.assert_called_once_with("volume1")
+
+
+def test_report_shared_between_processes(tmp_path, compute):
+    """
+    Test that the instances sharing a directory, as the Gunicorn workers
+    do, compute a report once and all serve it.
+    """
+    computed = threading.Event()
+    compute.side_effect = lambda name: computed.wait(5) and report(files=1)
+    worker1 = ReportJobs(compute, str(tmp_path))
+    worker2 = ReportJobs(compute, str(tmp_path))
+
+    assert worker1.get("volume1") == (ReportJobs.PENDING, None)
+    assert worker2.get("volume1") == (ReportJobs.PENDING, None)
+
+    computed.set()
+
+    assert wait_for(worker1, "volume1") == (ReportJobs.DONE, {"files": 1})
+    assert worker2.get("volume1") == (ReportJobs.DONE, {"files": 1})
+    compute.assert_called_once_with("volume1")
+
+
+def test_report_computed_again_once_expired(tmp_path, compute):
+    """Test that an expired report is computed again."""
+    jobs = ReportJobs(compute, str(tmp_path), ttl=0.05)
+    assert wait_for(jobs, "volume1") == (ReportJobs.DONE, {"files": 1})
+
+    compute.return_value = report(files=2)
+    time.sleep(0.05)
+
+    assert jobs.get("volume1") == (ReportJobs.PENDING, None)
+    assert wait_for(jobs, "volume1") == (ReportJobs.DONE, {"files": 2})
+    assert compute.call_count == 2
+
+
+def test_failed_report_computed_again(tmp_path, compute):
+    """
+    Test that a failed report is served once, as an error, then computed
+    again.
+    """
+    compute.side_effect = [RuntimeError("scan failed"), report(files=1)]
+    jobs = ReportJobs(compute, str(tmp_path))
+
+    assert wait_for(jobs, "volume1") == (ReportJobs.FAILED, "scan failed")
+    assert wait_for(jobs, "volume1") == (ReportJobs.DONE, {"files": 1})
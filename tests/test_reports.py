@@ -0,0 +1,129 @@
+import pytest
+
+from docker_volume_analyzer.columnar import ColumnarFileSystem
+from docker_volume_analyzer.filesystem import FileSystem
+from docker_volume_analyzer.reports import (
+    AGE_BUCKETS,
+    VolumeReport,
+    age_labels,
+    build_report,
+)
+
+NOW = 1_700_000_000
+DAY = 86400
+
+ENTRIES = [
+    ("logs", 0, NOW, "drwxr-xr-x", "root", "root", True),
+    ("logs/app.log", 100, NOW - 2 * DAY, "-rw-r--r--", "app", "app", False),
+    ("logs/old.LOG", 50, NOW - 400 * DAY, "-rw-r--r--", "app", "adm", False),
+    (
+        "backup.tar.gz",
+        1000,
+        NOW - 40 * DAY,
+        "-rw-r--r--",
+        "root",
+        "root",
+        False,
+    ),
+    (".bashrc", 3, NOW - 10 * DAY, "-rw-r--r--", "root", "root", False),
+    ("Makefile", 7, NOW - 100 * DAY, "-rw-r--r--", "app", "app", False),
+    ("odd.", 1, NOW, "-rw-r--r--", "app", "app", False),
+]
+
+
+@pytest.fixture(params=[FileSystem, ColumnarFileSystem])
+def fs(request):
+    """Fixture for a tree of ENTRIES, with either engine."""
+    fs = request.param()
+    fs.add_entries(ENTRIES)
+    return fs.compute_directory_sizes()
+
+
+def test_age_labels():
+    """Test that age buckets are labelled from the oldest."""
+    assert AGE_BUCKETS == (7, 30, 90, 365)
+    assert age_labels() == (
+        "> 365 days",
+        "90-365 days",
+        "30-90 days",
+        "7-30 days",
+        "< 7 days",
+    )
+
+
+@pytest.mark.parametrize("batch_size", [2, 2**20])
+def test_build_report(fs, batch_size):
+    """
+    Test that files are grouped by extension, owner, group and age, in
+    batches or not, directories being left out.
+    """
+    report = build_report(fs, now=NOW, batch_size=batch_size)
+
+    assert report.files == 6
+    assert report.bytes == 1161
+    assert report.extensions == {
+        ".log": (2, 150),
+        ".gz": (1, 1000),
+        "": (2, 10),
+        ".": (1, 1),
+    }
+    assert report.users == {"app": (4, 158), "root": (2, 1003)}
+    assert report.groups == {
+        "app": (3, 108),
+        "adm": (1, 50),
+        "root": (2, 1003),
+    }
+    assert report.ages == {
+        "> 365 days": (1, 50),
+        "90-365 days": (1, 7),
+        "30-90 days": (1, 1000),
+        "7-30 days": (1, 3),
+        "< 7 days": (2, 101),
+    }
+    assert report.timings["report"] >= 0
+
+
+def test_build_report_empty():
+    """Test that every age bucket is reported, even empty."""
+    report = build_report(FileSystem())
+
+    assert (report.files, report.bytes) == (0, 0)
+    assert report.extensions == {}
+    assert list(report.ages.values()) == [(0, 0)] * 5
+
+
+def test_build_report_after_delete():
+    """Test that deleted files are left out of the columnar report."""
+    fs = ColumnarFileSystem()
+    fs.add_entries(ENTRIES)
+    fs.delete_node("logs")
+
+    report = build_report(fs, now=NOW)
+
+    assert report.files == 4
+    assert ".log" not in report.extensions
+
+
+def test_to_dict():
+    """Test that groups are sorted by size, and ages kept in order."""
+    report = VolumeReport()
+    report.files, report.bytes = 3, 30
+    report.extensions = {".txt": (1, 10), ".log": (2, 20)}
+    report.ages = {"old": (1, 5), "new": (2, 25)}
+    report.timings = {"report": 0.5}
+
+    assert report.to_dict() == {
+        "files": 3,
+        "bytes": 30,
+        "extensions": [
+            {"name": ".log", "files": 2, "bytes": 20},
+            {"name": ".txt", "files": 1, "bytes": 10},
+        ],
+        "users": [],
+        "groups": [],
+        "ages": [
+            {"name": "old", "files": 1, "bytes": 5},
+            {"name": "new", "files": 2, "bytes": 25},
+        ],
+        "timings": {"report": 0.5},
+    }
@@ -0,0 +1,394 @@
+import os
+import stat
+from unittest.mock import MagicMock
+
+import pytest
+
+from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.filesystem import FileSystem
+from docker_volume_analyzer.scan_backends import (
+    HelperContainerBackend,
+    HostDirectBackend,
+    ScanBackend,
+    _reporting,
+)
+from docker_volume_analyzer.units import VolumeSize
+
+
+@pytest.fixture
+def volume(tmp_path):
+    """Fixture creating a small volume mountpoint on disk."""
+    (tmp_path / "dir1" / "subdir").mkdir(parents=True)
+    (tmp_path / "dir1" / "file1.txt").write_bytes(b"a" * 1024)
+    (tmp_path / "dir1" / "subdir" / "file2.txt").write_bytes(b"b" * 2048)
+    (tmp_path / "file3.txt").write_bytes(b"c" * 10)
+    return tmp_path
+
+
+@pytest.fixture
+def backend(volume):
+    """Fixture for a host backend resolving every volume to `volume`."""
+    return HostDirectBackend(lambda volume_name: str(volume))
+
+
+def test_host_backend_get_volume_tree(backend, volume):
+    """Test that the host backend builds the tree from the mountpoint."""
+    fs = backend.get_volume_tree("volume1").compute_directory_sizes()
+
+    assert set(fs.index) == {
+        "",
+        "dir1",
+        "dir1/file1.txt",
+        "dir1/subdir",
+        "dir1/subdir/file2.txt",
+        "file3.txt",
+    }
+    file1 = fs.index["dir1/file1.txt"]
+    st = os.lstat(volume / "dir1" / "file1.txt")
+    assert file1.size == 1024
+    assert not file1.is_directory
+    assert file1.mode == stat.filemode(st.st_mode)
+    assert file1.mtime.timestamp() == int(st.st_mtime)
+    assert fs.index["dir1/subdir"].is_directory
+    assert fs.index["dir1/subdir"].size == (
+        os.lstat(volume / "dir1" / "subdir").st_size + 2048
+    )
+
+
+def test_host_backend_get_volume_tree_of_directory(backend):
+    """Test that paths stay relative to the volume for a sub directory."""
+    fs = backend.get_volume_tree("volume1", directory="dir1/")
+
+    assert set(fs.index) == {
+        "",
+        "dir1",
+        "dir1/file1.txt",
+        "dir1/subdir",
+        "dir1/subdir/file2.txt",
+    }
+
+
+def test_reporting_calls_progress_every_n_items():
+    """Test that progress is reported each time `every` items are read."""
+    fs = FileSystem()
+    progress = MagicMock()
+
+    assert list(_reporting(range(5), fs, progress, every=2)) == [0, 1, 2, 3, 4]
+    assert progress.call_count == 2
+    progress.assert_called_with(fs)
+
+
+def test_reporting_progress_stops_iteration():
+    """Test that an exception raised by the progress callback stops it."""
+    items = _reporting(
+        range(5), FileSystem(), MagicMock(side_effect=RuntimeError)
+    )
+
+    assert next(items) == 0
+    with pytest.raises(RuntimeError):
+        next(items)
+
+
+def test_host_backend_get_directory_level(backend, volume):
+    """Test that only a level is listed, with directory totals."""
+    fs = backend.get_directory_level("volume1")
+
+    assert set(fs.index) == {"", "dir1", "file3.txt"}
+    assert fs.index["dir1"].size == backend.disk_usage(str(volume / "dir1"))
+    assert fs.index[""].size == backend.disk_usage(str(volume))
+    assert fs.index["file3.txt"].size == 10
+
+    backend.get_directory_level("volume1", "dir1", fs)
+
+    assert set(fs.index["dir1"].childrens) == {"file1.txt", "subdir"}
+    assert "dir1/subdir/file2.txt" not in fs.index
+
+
+def test_host_backend_get_directory_level_walks_once(
+    backend, volume, monkeypatch
+):
+    """
+    Test that each subdirectory is walked once, the total of the listed
+    directory being summed from its entries, hard links counted once.
+    """
+    os.link(volume / "dir1" / "file1.txt", volume / "link1.txt")
+    expected = backend.disk_usage(str(volume))
+    walked = []
+    walk = backend._walk
+    monkeypatch.setattr(
+        backend, "_walk", lambda root: walked.append(root) or walk(root)
+    )
+
+    fs = backend.get_directory_level("volume1")
+
+    assert walked == [str(volume / "dir1")]
+    assert fs.index[""].size == expected
+
+
+@pytest.mark.parametrize("directory", [None, "dir1"])
+def test_host_backend_get_directory_totals(backend, volume, directory):
+    """Test that directory totals follow the 'du -d' conventions."""
+    fs = backend.get_directory_totals("volume1", 1, directory)
+
+    root = directory or ""
+    assert {path for path in fs.index if path.startswith(root)} == {
+        root,
+        f"{root}/subdir" if directory else "dir1",
+    }
+    assert fs.index[root].size == backend.disk_usage(str(volume / root))
+    for path in fs.index:
+        if path.startswith(root) and path != root:
+            assert fs.index[path].size == backend.disk_usage(
+                str(volume / path)
+            )
+
+
+def test_host_backend_unknown_owner(backend, monkeypatch):
+    """Test that unknown uids and gids are reported as numbers."""
+    monkeypatch.setattr(
+        "docker_volume_analyzer.scan_backends.pwd.getpwuid",
+        MagicMock(side_effect=KeyError),
+    )
+    monkeypatch.setattr(
+        "docker_volume_analyzer.scan_backends.grp.getgrgid",
+        MagicMock(side_effect=KeyError),
+    )
+
+    fs = backend.get_volume_tree("volume1")
+
+    assert fs.index["file3.txt"].user == str(os.getuid())
+    assert fs.index["file3.txt"].group == str(os.getgid())
+
+
+def test_host_backend_disk_usage_counts_hard_links_once(backend, volume):
+    """Test that hard linked files are only counted once."""
+    before = backend.disk_usage(str(volume))
+    os.link(volume / "file3.txt", volume / "link.txt")
+
+    assert backend.disk_usage(str(volume)) == before
+
+
+def test_host_backend_get_volumes_size(backend, volume):
+    """
+    Test that apparent sizes count the files only, hard links once, the
+    way the engine does, and allocated sizes follow 'du -s'.
+    """
+    os.link(volume / "file3.txt", volume / "dir1" / "link3.txt")
+    usage = backend.disk_usage(str(volume))
+
+    sizes = backend.get_volumes_size(["volume1"])
+
+    assert sizes == {"volume1": VolumeSize(1024 + 2048 + 10, disk=usage)}
+    assert usage % 512 == 0
+
+
+def test_host_backend_get_volumes_size_missing_mountpoint(tmp_path):
+    """Test that a volume whose mountpoint vanished is not reported."""
+    backend = HostDirectBackend(lambda volume_name: str(tmp_path / "gone"))
+
+    assert backend.get_volumes_size(["volume1"]) == {}
+
+
+@pytest.mark.parametrize(
+    "method, args",
+    [
+        ("get_volume_tree", ()),
+        ("get_directory_level", ()),
+        ("get_directory_totals", (1,)),
+    ],
+)
+def test_host_backend_unknown_mountpoint(method, args):
+    """
+    Test that scanning a volume of unknown mountpoint fails clearly.
+    """
+    backend = HostDirectBackend(lambda volume_name: None)
+
+    with pytest.raises(FileNotFoundError, match="volume 'volume1' is unknown"):
+        getattr(backend, method)("volume1", *args)
+    assert backend.get_volumes_size(["volume1"]) == {}
+
+
+def test_scan_backend_is_abstract():
+    """Test that backends must implement every scan method."""
+
+    class PartialBackend(ScanBackend):
+        def get_volume_tree(self, volume_name, directory=None, progress=None):
+            return FileSystem()
+
+    with pytest.raises(TypeError, match="abstract"):
+        PartialBackend()
+
+
+@pytest.mark.parametrize(
+    "mountpoint, expected",
+    [(None, False), ("/nonexistent/path", False), ("TMP", True)],
+)
+def test_host_backend_is_readable(tmp_path, mountpoint, expected):
+    """Test the detection of readable mountpoints."""
+    if mountpoint == "TMP":
+        mountpoint = str(tmp_path)
+
+    assert HostDirectBackend.is_readable(mountpoint) is expected
+
+
+def test_container_backend_delegates_to_docker_client():
+    """Test that the container backend uses the helper container."""
+    docker_client = MagicMock()
+    docker_client.stream_directory_informations_with_find.return_value = [
+        "file|/mnt/volume1/a.txt|10|-rw-r--r--|root|root|1633024800"
+    ]
+    docker_client.scan_volumes_size.return_value = {
+        "volume1": VolumeSize(4096)
+    }
+    docker_client.fs_factory = FileSystem
+    docker_client.parse_workers = None
+    docker_client.parallel_parse_threshold = None
+    docker_client.record_format = "lines"
+    backend = HelperContainerBackend(docker_client)
+
+    fs = backend.get_volume_tree("volume1", "dir")
+
+    assert fs.index["a.txt"].size == 10
+    (
+        docker_client.stream_directory_informations_with_find
+    ).assert_called_once_with("volume1", directory="dir")
+    assert backend.get_volumes_size(["volume1"]) == {
+        "volume1": VolumeSize(4096)
+    }
+    docker_client.scan_volumes_size.assert_called_once_with(["volume1"])
+
+
+def test_container_backend_reads_nul_records():
+    """Test that the container backend parses NUL-delimited records."""
+    docker_client = MagicMock()
+    docker_client.stream_directory_records_with_find.return_value = [
+        b"1\0/mnt/volume1/a\nb\0regular file\x0010\0-rw-r--r--\0root",
+        b"\0root\x001633024800\0\0",
+    ]
+    docker_client.fs_factory = FileSystem
+    docker_client.parse_workers = None
+    docker_client.parallel_parse_threshold = None
+    docker_client.record_format = "nul"
+    backend = HelperContainerBackend(docker_client)
+
+    fs = backend.get_volume_tree("volume1")
+
+    assert fs.index["a\nb"].size == 10
+    (docker_client.stream_directory_records_with_find).assert_called_once_with(
+        "volume1", directory=None
+    )
+
+
+def test_container_backend_reports_progress():
+    """Test that the progress callback is called for each chunk read."""
+    docker_client = MagicMock()
+    docker_client.stream_directory_records_with_find.return_value = [
+        b"1\0/mnt/volume1/a\0regular file\x0010\0-rw-r--r--\0root",
+        b"\0root\x001633024800\0\0",
+    ]
+    docker_client.fs_factory = FileSystem
+    docker_client.parse_workers = None
+    docker_client.parallel_parse_threshold = None
+    docker_client.record_format = "nul"
+    backend = HelperContainerBackend(docker_client)
+    progress = MagicMock()
+
+    fs = backend.get_volume_tree("volume1", progress=progress)
+
+    assert progress.call_count == 2
+    progress.assert_called_with(fs)
+
+
+def test_container_backend_get_directory_level():
+    """Test that the container backend applies 'du' totals to a level."""
+    docker_client = MagicMock()
+    docker_client.stream_directory_level_with_find.return_value = [
+        b"8\t/mnt/volume1/d\n12\t/mnt/",
+        b"volume1\n\x001\0/mnt/volume1/d\0directory\x004096\0drwxr-xr-x",
+        b"\0root\0root\x001633024800\0\0",
+    ]
+    backend = HelperContainerBackend(docker_client)
+
+    fs = backend.get_directory_level("volume1")
+
+    assert fs.index["d"].size == 8192
+    assert fs.index[""].size == 12288
+    assert fs.malformed == 0
+    (docker_client.stream_directory_level_with_find).assert_called_once_with(
+        "volume1", directory=None
+    )
+
+
+def test_container_backend_get_directory_totals():
+    """Test that the container backend builds a tree of 'du' totals."""
+    docker_client = MagicMock()
+    docker_client.stream_directory_totals_with_du.return_value = [
+        b"8\t/mnt/volume1/d/e\n12\t/mnt/",
+        b"volume1/d\n16\t/mnt/volume1\n",
+    ]
+    backend = HelperContainerBackend(docker_client)
+
+    fs = backend.get_directory_totals("volume1", 2)
+
+    assert {path: node.size for path, node in fs.index.items()} == {
+        "": 16384,
+        "d": 12288,
+        "d/e": 8192,
+    }
+    (docker_client.stream_directory_totals_with_du).assert_called_once_with(
+        "volume1", 2, directory=None
+    )
+
+
+def make_docker_client(mountpoint, scan_backend=None):
+    docker_client = DockerClient(scan_backend=scan_backend)
+    docker_client.client = MagicMock()
+    volume = MagicMock(attrs={"Mountpoint": mountpoint})
+    volume.name = "volume1"
+    docker_client.client.volumes.list.return_value = [volume]
+    docker_client.list_volumes()
+    return docker_client
+
+
+def test_backend_for_auto_uses_readable_mountpoint(volume):
+    """Test that readable mountpoints are walked directly in auto mode."""
+    docker_client = make_docker_client(str(volume))
+
+    assert docker_client.mountpoint_of("volume1") == str(volume)
+    assert docker_client.backend_for("volume1") is docker_client.host_backend
+    assert (
+        docker_client.backend_for("unknown") is docker_client.container_backend
+    )
+
+
+@pytest.mark.parametrize(
+    "scan_backend, expected", [("container", "container"), ("host", "host")]
+)
+def test_backend_for_forced_backend(volume, scan_backend, expected):
+    """Test that the backend can be forced."""
+    docker_client = make_docker_client(str(volume), scan_backend)
+
+    assert docker_client.backend_for("volume1").name == expected
+
+
+def test_scan_backend_from_environment(monkeypatch):
+    """Test that the backend can be selected with SCAN_BACKEND."""
+    monkeypatch.setenv("SCAN_BACKEND", "container")
+
+    assert DockerClient().scan_backend == "container"
+
+
+def test_invalid_scan_backend():
+    """Test that an unknown backend is rejected."""
+    with pytest.raises(ValueError, match="scan_backend must be one of"):
+        DockerClient(scan_backend="unknown")
+
+
+def test_get_volumes_size_without_helper_container(volume):
+    """Test that readable volumes are sized without starting containers."""
+    docker_client = make_docker_client(str(volume))
+
+    result = docker_client.get_volumes_size(["volume1"], human_readable=False)
+
+    assert result == {"volume1": 1024 + 2048 + 10}
+    docker_client.client.containers.run.assert_not_called()
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from docker_volume_analyzer.singleflight import SingleFlight
+
+
+def test_do_coalesces_concurrent_calls():
+    """
+    Test that callers arriving while a key is in flight share its result.
+    """
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    results = []
+    leader = threading.Thread(
+        target=lambda: results.append(flights.do("key", compute))
+    )
+    leader.start()
+    started.wait(5)
+    future, first = flights.begin("key")
+    release.set()
+    leader.join(5)
+
+    assert not first
+    assert future.result(5) is results[0]
+    assert len(calls) == 1
+    assert flights.do("key", lambda: "again") == "again"
+
+
+def test_do_shares_errors():
+    """Test that waiting callers get the exception of the computation."""
+    flights = SingleFlight()
+    future, _ = flights.begin("key")
+    flights.finish("key", error=ValueError("failed"))
+
+    with pytest.raises(ValueError, match="failed"):
+        future.result()
+    with pytest.raises(KeyError):
+        flights.do("key", {}.__getitem__, "missing")
+
+
+def test_finish_once():
+    """Test that a computation only ends once."""
+    flights = SingleFlight()
+    future, first = flights.begin("key")
+    flights.finish("key", 1)
+    flights.finish("key", 2)
+
+    assert first
+    assert future.result() == 1
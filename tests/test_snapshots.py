@@ -0,0 +1,131 @@
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from docker_volume_analyzer.snapshots import (
+    SnapshotRefresher,
+    SnapshotStore,
+    VolumeSnapshot,
+)
+
+
+@pytest.fixture
+def volume_manager():
+    """Fixture for a mock VolumeManager of two volumes."""
+    volume_manager = MagicMock()
+    volume_manager.list_volumes.return_value = {"a": {}, "b": {}}
+    volume_manager.get_volumes_size.return_value = {"a": "4"}
+    return volume_manager
+
+
+def test_volume_snapshot_age():
+    """Test that the age of a snapshot is the time since it was taken."""
+    assert VolumeSnapshot({}, taken_at=100.0).age(now=130.5) == 30.5
+
+
+def test_refresh(volume_manager):
+    """
+    Test that a refresh measures every volume without listing their
+    containers, and replaces the snapshot.
+    """
+    refresher = SnapshotRefresher(volume_manager)
+    assert refresher.snapshot is None
+
+    snapshot = refresher.refresh()
+
+    assert refresher.snapshot is snapshot
+    assert snapshot.sizes == {"a": "4", "b": None}
+    assert snapshot.age() < 60
+    assert refresher.wait(0)
+    volume_manager.get_volumes_size.assert_called_once_with(
+        ["a", "b"], human_readable=False
+    )
+    volume_manager.get_containers_by_volume.assert_not_called()
+
+
+def test_background_refresh(volume_manager):
+    """
+    Test that the snapshot is refreshed in the background, failed
+    refreshes keeping the previous snapshot.
+    """
+    volume_manager.get_volumes_size.side_effect = [
+        {"a": "4", "b": "8"},
+        Exception("Docker is down"),
+        {"a": "4", "b": "8"},
+    ]
+    refresher = SnapshotRefresher(volume_manager, interval=0.01)
+
+    refresher.start()
+    refresher.start()
+    assert refresher.wait(5)
+    assert refresher.running
+    refresher.stop()
+    refresher._thread.join(5)
+
+    assert not refresher.running
+    assert refresher.snapshot.sizes == {"a": "4", "b": "8"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture for a store in a temporary directory."""
+    return SnapshotStore(str(tmp_path / "snapshot.json"))
+
+
+def test_store_write_read(store, tmp_path):
+    """
+    Test that snapshots are swapped whole, and only parsed again when
+    replaced.
+    """
+    assert store.read() is None
+
+    store.write(VolumeSnapshot({"a": "4"}, 100.0, 2.0))
+    first = store.read()
+
+    assert first.to_dict() == {
+        "sizes": {"a": "4"},
+        "taken_at": 100.0,
+        "duration": 2.0,
+    }
+    assert store.read() is first
+    store.write(VolumeSnapshot({"b": None}, 200.0))
+    assert store.read().sizes == {"b": None}
+    assert os.listdir(tmp_path) == ["snapshot.json"]
+
+
+def test_store_lock(store):
+    """Test that a single store holds the lock until it releases it."""
+    other = SnapshotStore(store.path)
+
+    assert store.try_lock()
+    assert store.try_lock()
+    assert not other.try_lock()
+    store.unlock()
+    assert other.try_lock()
+    other.unlock()
+
+
+def test_shared_refresh(volume_manager, store):
+    """
+    Test that only the refresher holding the lock measures the volumes,
+    the others reading its snapshot.
+    """
+    other_manager = MagicMock()
+    leader = SnapshotRefresher(volume_manager, interval=0.01, store=store)
+    follower = SnapshotRefresher(
+        other_manager, interval=0.01, store=SnapshotStore(store.path)
+    )
+
+    leader.start()
+    assert leader.wait(5)
+    follower.start()
+    assert follower.wait(5)
+    follower.stop()
+    leader.stop()
+    follower._thread.join(5)
+    leader._thread.join(5)
+
+    assert follower.snapshot.sizes == {"a": "4", "b": None}
+    other_manager.list_volumes.assert_not_called()
+    assert not store._lock_file
@@ -1,45 +1,80 @@
-from unittest.mock import MagicMock, PropertyMock, patch
+from unittest.mock import ANY, MagicMock, PropertyMock, patch
 
 import pytest
 from textual.events import Key
-from textual.widgets import Button, DataTable, Static
+from textual.widgets import Button, DataTable, Input, Select, Static
 
+from docker_volume_analyzer.errors import ScanCancelledError
+from docker_volume_analyzer.filesystem import FileSystem
+from docker_volume_analyzer.reports import VolumeReport
 from docker_volume_analyzer.tui import (
     ConfirmationScreen,
     DockerTUI,
     ErrorScreen,
+    ReportScreen,
+    SearchScreen,
     VolumeBrowserScreen,
     VolumeDetailScreen,
 )
 
 
+def make_manager(volumes: dict) -> MagicMock:
+    """
+    Mock VolumeManager listing `volumes`, then their containers and sizes.
+    """
+    manager = MagicMock()
+    manager.list_volumes.return_value = {
+        volume["name"]: {**volume, "size": None, "containers": []}
+        for volume in volumes.values()
+    }
+    manager.get_containers_by_volume.return_value = {
+        volume["name"]: volume["containers"] for volume in volumes.values()
+    }
+    manager.iter_volumes_size.return_value = iter(
+        [{volume["name"]: volume["size"]} for volume in volumes.values()]
+    )
+    return manager
+
+
+async def wait_for_workers(pilot) -> None:
+    await pilot.app.workers.wait_for_complete()
+    await pilot.pause()
+
+
 @pytest.mark.asyncio
 async def test_on_mount():
     """
     Test that the on_mount method populates
     the DataTable with volume data.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        0: {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [{"container_name": "container1"}],
-            "created_at": "2023-01-01T00:00:00Z",
-        },
-        1: {
-            "name": "volume2",
-            "size": "20GB",
-            "containers": [],
-            "created_at": "2023-01-02T00:00:00Z",
-        },
-    }
+    mock_manager = make_manager(
+        {
+            0: {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [{"container_name": "container1"}],
+                "created_at": "2023-01-01T00:00:00Z",
+            },
+            1: {
+                "name": "volume2",
+                "size": "20GB",
+                "containers": [],
+                "created_at": "2023-01-02T00:00:00Z",
+            },
+            2: {
+                "name": "volume3",
+                "size": None,
+                "containers": [],
+                "created_at": "2023-01-03T00:00:00Z",
+            },
+        }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -48,9 +83,54 @@ async def test_on_mount():
 
             rows = [table.get_row(row_key) for row_key in table.rows]
 
-            assert len(rows) == 2
+            assert len(rows) == 3
             assert rows[0] == ["volume1", "10GB", 1, "2023-01-01T00:00:00Z"]
             assert rows[1] == ["volume2", "20GB", 0, "2023-01-02T00:00:00Z"]
+            assert rows[2] == ["volume3", "N/A", 0, "2023-01-03T00:00:00Z"]
+            assert [str(column.label) for column in table.ordered_columns] == [
+                "Name",
+                "Apparent size",
+                "Containers",
+                "Created at",
+            ]
+
+
+@pytest.mark.asyncio
+async def test_on_mount_fills_sizes_progressively():
+    """
+    Test that the volumes are listed first, their sizes being filled in
+    as they are computed while the progress bar is shown.
+    """
+    mock_manager = make_manager(
+        {
+            0: {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [],
+                "created_at": "2023-01-01T00:00:00Z",
+            },
+        }
+    )
+    sizes = []
+
+    def iter_volumes_size(volume_names):
+        sizes.append(app.query_one(DataTable).get_row("volume1")[1])
+        yield {"volume1": "10GB"}
+
+    mock_manager.iter_volumes_size.side_effect = iter_volumes_size
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        app = DockerTUI()
+        async with app.run_test() as pilot:
+            await wait_for_workers(pilot)
+
+            table = app.query_one("#volumes_table", expect_type=DataTable)
+            assert sizes == ["…"]
+            assert table.get_row("volume1")[1] == "10GB"
+            assert app.query_one("#sizes_progress").display is False
+            mock_manager.iter_volumes_size.assert_called_once_with(["volume1"])
 
 
 def test_action_toggle_dark():
@@ -71,31 +151,32 @@ async def test_action_information():
     Test that the action_information method displays the correct
     volume details.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [
-                {"short_id": "abc123", "container_name": "container1"}
-            ],
-            "created_at": "2023-01-01T00:00:00Z",
-            "mountpoint": "/var/lib/docker/volumes/volume1",
-        },
-        "volume2": {
-            "name": "volume2",
-            "size": "20GB",
-            "containers": [],
-            "created_at": "2023-01-02T00:00:00Z",
-            "mountpoint": "/var/lib/docker/volumes/volume2",
-        },
-    }
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [
+                    {"short_id": "abc123", "container_name": "container1"}
+                ],
+                "created_at": "2023-01-01T00:00:00Z",
+                "mountpoint": "/var/lib/docker/volumes/volume1",
+            },
+            "volume2": {
+                "name": "volume2",
+                "size": "20GB",
+                "containers": [],
+                "created_at": "2023-01-02T00:00:00Z",
+                "mountpoint": "/var/lib/docker/volumes/volume2",
+            },
+        }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -129,24 +210,25 @@ async def test_action_information_no_selection():
     Test that the action_information method does nothing
     when no row is selected in the DataTable.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [
-                {"short_id": "abc123", "container_name": "container1"}
-            ],
-            "created_at": "2023-01-01T00:00:00Z",
-            "mountpoint": "/var/lib/docker/volumes/volume1",
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [
+                    {"short_id": "abc123", "container_name": "container1"}
+                ],
+                "created_at": "2023-01-01T00:00:00Z",
+                "mountpoint": "/var/lib/docker/volumes/volume1",
+            }
         }
-    }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -195,21 +277,22 @@ async def test_action_delete_volume_with_no_selection():
     Test that the action_delete_volume method does nothing
     when no row is selected in the DataTable.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [],
-            "created_at": "2023-01-01T00:00:00Z",
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [],
+                "created_at": "2023-01-01T00:00:00Z",
+            }
         }
-    }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -232,21 +315,22 @@ async def test_action_delete_volume_with_attached_containers():
     Test that the action_delete_volume method shows an error screen
     when the selected volume has attached containers.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [{"container_name": "container1"}],
-            "created_at": "2023-01-01T00:00:00Z",
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [{"container_name": "container1"}],
+                "created_at": "2023-01-01T00:00:00Z",
+            }
         }
-    }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -273,21 +357,22 @@ async def test_action_delete_volume_success():
     Test that the action_delete_volume method deletes the selected volume
     when confirmed.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [],
-            "created_at": "2023-01-01T00:00:00Z",
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [],
+                "created_at": "2023-01-01T00:00:00Z",
+            }
         }
-    }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -302,6 +387,7 @@ async def test_action_delete_volume_success():
             confirmation_screen.on_button_pressed(
                 Button.Pressed(Button("Yes", id="yes_button"))
             )
+            await wait_for_workers(pilot)
 
             mock_manager.delete_volume.assert_called_once_with("volume1")
             assert len(table.rows) == 0
@@ -313,21 +399,22 @@ async def test_action_delete_volume_not_confirmed():
     Test that the action_delete_volume method does not delete the volume
     when the user does not confirm.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [],
-            "created_at": "2023-01-01T00:00:00Z",
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [],
+                "created_at": "2023-01-01T00:00:00Z",
+            }
         }
-    }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -353,22 +440,23 @@ async def test_action_delete_volume_throw_exception():
     Test that the action_delete_volume method handles exceptions
     when trying to delete a volume.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [],
-            "created_at": "2023-01-01T00:00:00Z",
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [],
+                "created_at": "2023-01-01T00:00:00Z",
+            }
         }
-    }
+    )
     mock_manager.delete_volume.side_effect = Exception("Docker error")
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
     ):
         async with DockerTUI().run_test() as pilot:
-            await pilot.pause()
+            await wait_for_workers(pilot)
 
             app = pilot.app
             table: DataTable = app.query_one(
@@ -383,6 +471,7 @@ async def test_action_delete_volume_throw_exception():
             confirmation_screen.on_button_pressed(
                 Button.Pressed(Button("Yes", id="yes_button"))
             )
+            await wait_for_workers(pilot)
 
             assert isinstance(app.screen_stack[-1], ErrorScreen)
             assert (
@@ -417,15 +506,16 @@ async def test_action_browse():
     Test that the action_browse method pushes the VolumeBrowserScreen
     with the correct volume name.
     """
-    mock_manager = MagicMock()
-    mock_manager.get_volumes.return_value = {
-        "volume1": {
-            "name": "volume1",
-            "size": "10GB",
-            "containers": [],
-            "created_at": "2023-01-01T00:00:00Z",
+    mock_manager = make_manager(
+        {
+            "volume1": {
+                "name": "volume1",
+                "size": "10GB",
+                "containers": [],
+                "created_at": "2023-01-01T00:00:00Z",
+            }
         }
-    }
+    )
 
     with patch(
         "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
@@ -451,6 +541,70 @@ async def test_action_browse():
             )
 
 
+@pytest.mark.asyncio
+async def test_action_browse_lazy():
+    """
+    Test that the action_browse_lazy method pushes a lazy
+    VolumeBrowserScreen.
+    """
+    mock_manager = make_manager({})
+    mock_manager.get_lazy_volume_tree.return_value.fs = MagicMock(index={})
+    mock_manager.get_lazy_volume_tree.return_value.loaded = {""}
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            app = pilot.app
+
+            app.query_one("#volumes_table", expect_type=DataTable).add_row(
+                "volume1", "10GB", 0, "2023-01-01T00:00:00Z"
+            )
+            await pilot.press("l")
+            await wait_for_workers(pilot)
+
+            screen = app.screen_stack[-1]
+            assert isinstance(screen, VolumeBrowserScreen)
+            assert (
+                screen.lazy_tree
+                is mock_manager.get_lazy_volume_tree.return_value
+            )
+            mock_manager.get_lazy_volume_tree.assert_called_once_with(
+                "volume1", None
+            )
+            mock_manager.get_volume_tree.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_action_browse_totals():
+    """
+    Test that the action_browse_totals method pushes a VolumeBrowserScreen
+    showing directory totals only.
+    """
+    mock_manager = make_manager({})
+    mock_manager.get_lazy_volume_tree.return_value.fs = MagicMock(index={})
+    mock_manager.get_lazy_volume_tree.return_value.loaded = {""}
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            app = pilot.app
+
+            app.query_one("#volumes_table", expect_type=DataTable).add_row(
+                "volume1", "10GB", 0, "2023-01-01T00:00:00Z"
+            )
+            await pilot.press("u")
+            await wait_for_workers(pilot)
+
+            screen = app.screen_stack[-1]
+            assert isinstance(screen, VolumeBrowserScreen)
+            assert screen.totals_depth == DockerTUI.TOTALS_DEPTH
+            mock_manager.get_lazy_volume_tree.assert_called_once_with(
+                "volume1", DockerTUI.TOTALS_DEPTH
+            )
+
+
 @pytest.mark.asyncio
 async def test_volume_browser_screen_initialization():
     """
@@ -465,7 +619,50 @@ async def test_volume_browser_screen_initialization():
     assert screen.volume_name == "test_volume"
     assert screen.volume_manager == mock_manager
     assert screen.current_path == ""
-    assert screen.volume_tree == mock_manager.get_volume_tree.return_value
+    assert screen.volume_tree is None
+    mock_manager.get_volume_tree.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_volume_browser_screen_lazy():
+    """
+    Test that a lazy VolumeBrowserScreen loads each directory when it
+    is displayed.
+    """
+    mock_manager = MagicMock()
+    lazy_tree = mock_manager.get_lazy_volume_tree.return_value
+    lazy_tree.fs = MagicMock(index={})
+
+    lazy_tree.loaded = {""}
+
+    screen = VolumeBrowserScreen(mock_manager, "test_volume", lazy=True)
+    screen.volume_tree = lazy_tree.fs
+    screen.lazy_tree = lazy_tree
+    screen.current_path = "folder1"
+
+    with (
+        patch.object(screen, "query_one", return_value=MagicMock()),
+        patch.object(screen, "load_directory") as mock_load_directory,
+    ):
+        screen.load_data()
+
+    mock_load_directory.assert_called_once_with("folder1")
+    mock_manager.get_volume_tree.assert_not_called()
+
+
+def test_volume_browser_screen_lazy_labels_disk_usage():
+    """
+    Test that the 'du' totals of directories are labelled as disk usage
+    in lazy mode, unlike the apparent sizes of files.
+    """
+    directory = MagicMock(is_directory=True, size=8192)
+    file = MagicMock(is_directory=False, size=10)
+    lazy = VolumeBrowserScreen(MagicMock(), "test_volume", lazy=True)
+    full = VolumeBrowserScreen(MagicMock(), "test_volume")
+
+    assert lazy.cells_of("d", "d", directory)[2] == "8192 bytes on disk"
+    assert lazy.cells_of("f", "f", file)[2] == "10 bytes"
+    assert full.cells_of("d", "d", directory)[2] == "8192 bytes"
 
 
 @pytest.mark.asyncio
@@ -478,6 +675,7 @@ async def test_volume_browser_screen_load_data_empty_directory():
     mock_manager.get_volume_tree.return_value = MagicMock(index={})
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
 
     with patch.object(
         screen, "query_one", return_value=MagicMock()
@@ -522,6 +720,7 @@ async def test_volume_browser_screen_load_data_with_files():
     )
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
 
     mock_table = MagicMock()
     mock_current_path = MagicMock()
@@ -583,6 +782,7 @@ async def test_volume_browser_screen_on_key_enter_directory():
     )
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
     screen.current_path = ""
 
     with patch.object(
@@ -606,6 +806,7 @@ async def test_volume_browser_screen_on_key_backspace():
     mock_manager.get_volume_tree.return_value = MagicMock(index={})
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
     screen.current_path = "folder1/subfolder"
 
     with patch.object(
@@ -626,6 +827,7 @@ async def test_on_key_enter_invalid_selection():
     mock_manager.get_volume_tree.return_value = MagicMock(index={})
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
     screen.current_path = ""
 
     mock_node = MagicMock()
@@ -656,6 +858,7 @@ async def test_on_key_other_key():
     mock_manager.get_volume_tree.return_value = MagicMock(index={})
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
     screen.current_path = "folder1/subfolder"
 
     with patch.object(
@@ -668,76 +871,50 @@ async def test_on_key_other_key():
 
 
 @pytest.mark.asyncio
-async def test_volume_browser_screen_on_key_delete_file_error():
+async def test_volume_browser_screen_on_key_delete_file():
     """
-    Test that pressing 'delete' shows an error screen if deleting a file fails.
+    Test that pressing 'delete' deletes the selected file in a worker.
     """
     mock_manager = MagicMock()
     mock_node = MagicMock(is_directory=False, path="folder1/file1.txt")
     mock_manager.get_volume_tree.return_value = MagicMock(
         index={"folder1": MagicMock(childrens={"file1.txt": mock_node})}
     )
-    mock_manager.delete_volume_file.side_effect = Exception("Delete error")
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
     screen.current_path = "folder1"
 
     with (
         patch.object(
             screen, "query_one", return_value=MagicMock()
         ) as mock_query,
-        patch.object(
-            type(screen), "app", new_callable=PropertyMock
-        ) as mock_app_prop,
+        patch.object(screen, "delete_file") as mock_delete_file,
     ):
-        mock_app = MagicMock()
-        mock_app_prop.return_value = mock_app
         mock_query.return_value.cursor_row = 0
         mock_query.return_value.get_row_at.return_value = ["📄 ", "file1.txt"]
 
         screen.on_key(Key("delete", None))
 
-        mock_manager.delete_volume_file.assert_called_once_with(
-            "test_volume", "folder1/file1.txt"
-        )
-        screen.volume_tree.delete_node.assert_not_called()
-        mock_app.push_screen.assert_called_once()
-        assert isinstance(mock_app.push_screen.call_args[0][0], ErrorScreen)
-        assert (
-            mock_app.push_screen.call_args[0][0].message
-            == "Error deleting file: Delete error"
-        )
+        mock_delete_file.assert_called_once_with(mock_node)
 
 
 @pytest.mark.asyncio
-async def test_volume_browser_screen_on_key_delete_file_success():
+async def test_volume_browser_screen_file_deleted():
     """
-    Test that pressing 'delete' successfully deletes a file and updates the UI.
+    Test that a deleted file is removed from the tree and the UI updated.
     """
     mock_manager = MagicMock()
-    mock_node = MagicMock(is_directory=False, path="folder1/file1.txt")
-    mock_manager.get_volume_tree.return_value = MagicMock(
-        index={"folder1": MagicMock(childrens={"file1.txt": mock_node})}
-    )
+    mock_manager.get_volume_tree.return_value = MagicMock(index={})
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
-    screen.current_path = "folder1"
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
 
-    with patch.object(
-        screen, "query_one", return_value=MagicMock()
-    ) as mock_query:
-        mock_query.return_value.cursor_row = 0
-        mock_query.return_value.get_row_at.return_value = ["📄 ", "file1.txt"]
+    with patch.object(screen, "load_data") as mock_load_data:
+        screen.file_deleted("folder1/file1.txt")
 
-        screen.on_key(Key("delete", None))
-
-        screen.volume_tree.delete_node.assert_called_once_with(
-            "folder1/file1.txt"
-        )
-
-        mock_manager.delete_volume_file.assert_called_once_with(
-            "test_volume", "folder1/file1.txt"
-        )
+    screen.volume_tree.delete_node.assert_called_once_with("folder1/file1.txt")
+    mock_load_data.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -753,6 +930,7 @@ async def test_volume_browser_screen_on_key_delete_invalid_node():
     )
 
     screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
     screen.current_path = ""
 
     with patch.object(
@@ -769,3 +947,403 @@ async def test_volume_browser_screen_on_key_delete_invalid_node():
         mock_manager.delete_volume_file.assert_not_called()
         screen.volume_tree.delete_node.assert_not_called()
         mock_query.return_value.clear.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_volume_browser_screen_scans_in_worker():
+    """
+    Test that the volume is scanned in a worker, the tree being shown once
+    the scan is complete.
+    """
+    mock_manager = make_manager({})
+    tree = MagicMock(index={"": MagicMock(childrens={})})
+    mock_manager.get_volume_tree.return_value = tree
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            screen = VolumeBrowserScreen(mock_manager, "test_volume")
+            await pilot.app.push_screen(screen)
+            await wait_for_workers(pilot)
+
+            assert screen.volume_tree is tree
+            assert screen.query_one("#scan_status").display is False
+            mock_manager.get_volume_tree.assert_called_once_with(
+                "test_volume", progress=ANY
+            )
+
+
+@pytest.mark.asyncio
+async def test_volume_browser_screen_scan_cancelled():
+    """
+    Test that a cancelled scan leaves the screen without a tree.
+    """
+    mock_manager = make_manager({})
+    mock_manager.get_volume_tree.side_effect = ScanCancelledError()
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            screen = VolumeBrowserScreen(mock_manager, "test_volume")
+            await pilot.app.push_screen(screen)
+            await wait_for_workers(pilot)
+
+            assert screen.volume_tree is None
+            assert screen.query_one("#scan_status").display is True
+
+
+@pytest.mark.asyncio
+async def test_volume_browser_screen_delete_file_error():
+    """
+    Test that an error screen is shown if deleting a file fails.
+    """
+    mock_manager = make_manager({})
+    mock_manager.get_volume_tree.return_value = MagicMock(index={})
+    mock_manager.delete_volume_file.side_effect = Exception("Delete error")
+    mock_node = MagicMock(is_directory=False, path="folder1/file1.txt")
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            screen = VolumeBrowserScreen(mock_manager, "test_volume")
+            await pilot.app.push_screen(screen)
+            await wait_for_workers(pilot)
+
+            screen.delete_file(mock_node)
+            await wait_for_workers(pilot)
+
+            mock_manager.delete_volume_file.assert_called_once_with(
+                "test_volume", "folder1/file1.txt"
+            )
+            screen.volume_tree.delete_node.assert_not_called()
+            assert isinstance(pilot.app.screen, ErrorScreen)
+            assert (
+                pilot.app.screen.message == "Error deleting file: Delete error"
+            )
+
+
+@pytest.mark.asyncio
+async def test_volume_browser_screen_renders_rows_by_page():
+    """
+    Test that the rows of a directory are rendered a page at a time, the
+    next page being rendered when the cursor gets close to the last row.
+    """
+    fs = FileSystem()
+    fs.add_entries(
+        (f"d/f{i}", i, 1700000000, "-rw-r--r--", "root", "root", False)
+        for i in range(VolumeBrowserScreen.PAGE_SIZE + 10)
+    )
+    mock_manager = make_manager({})
+    mock_manager.get_volume_tree.return_value = fs
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            screen = VolumeBrowserScreen(mock_manager, "test_volume")
+            await pilot.app.push_screen(screen)
+            await wait_for_workers(pilot)
+            screen.current_path = "d"
+            screen.load_data()
+            await pilot.pause()
+
+            table = screen.query_one(DataTable)
+            assert table.row_count == VolumeBrowserScreen.PAGE_SIZE
+            assert table.get_row_at(0)[1] == "f0"
+
+            table.move_cursor(row=VolumeBrowserScreen.PAGE_SIZE - 1)
+            await pilot.pause()
+
+            assert table.row_count == VolumeBrowserScreen.PAGE_SIZE + 10
+
+
+@pytest.mark.asyncio
+async def test_volume_browser_screen_caches_rows():
+    """
+    Test that the rows of a directory are listed and formatted once, until
+    a file is deleted from it.
+    """
+    mock_manager = MagicMock()
+    file_node = MagicMock(is_directory=False, size=10)
+    mock_manager.get_volume_tree.return_value = MagicMock(
+        index={"d": MagicMock(childrens={"file1.txt": file_node})}
+    )
+
+    screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    screen.volume_tree = mock_manager.get_volume_tree.return_value
+    screen.current_path = "d"
+
+    with patch.object(screen, "query_one", return_value=MagicMock()):
+        screen.load_data()
+        screen.load_data()
+        assert file_node.mtime.strftime.call_count == 1
+        assert screen.rows == [("d/file1.txt", "file1.txt", file_node)]
+
+        screen.file_deleted("d/other.txt")
+        file_node.size = 20
+        screen.load_data()
+
+    assert file_node.mtime.strftime.call_count == 1
+    assert screen.cells_of("d/file1.txt", "file1.txt", file_node)[2] == (
+        "10 bytes"
+    )
+    assert "d" not in screen._cells
+    assert screen._rows == {"d": {None: screen.rows}}
+
+
+def test_volume_browser_screen_forget():
+    """
+    Test that the cells of a deleted node and of its parents are dropped,
+    with the rows of the directories holding them.
+    """
+    screen = VolumeBrowserScreen(MagicMock(), "test_volume")
+    screen._cells = {"a": 1, "a/b": 2, "a/b/c": 3, "a/d": 4}
+    screen._rows = {"": 1, "a": 2, "a/b": 3, "a/d": 4}
+
+    screen.forget("a/b/c")
+
+    assert screen._cells == {"a/d": 4}
+    assert screen._rows == {"a/d": 4}
+
+
+@pytest.mark.asyncio
+async def test_volume_browser_screen_action_sort():
+    """
+    Test that the sort bindings show the sorted views of the file system,
+    pressing a sort key twice reversing the order.
+    """
+    fs = FileSystem()
+    fs.add_entries(
+        [
+            ("b.txt", 30, 3, "-rw-r--r--", "user", "group", False),
+            ("a.txt", 10, 1, "-rw-r--r--", "user", "group", False),
+            ("c.txt", 20, 2, "-rw-r--r--", "user", "group", False),
+        ]
+    )
+    mock_manager = make_manager({})
+    mock_manager.get_volume_tree.return_value = fs.compute_directory_sizes()
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            screen = VolumeBrowserScreen(mock_manager, "test_volume")
+            await pilot.app.push_screen(screen)
+            await wait_for_workers(pilot)
+            table = screen.query_one(DataTable)
+
+            def names():
+                return [table.get_row_at(i)[1] for i in range(table.row_count)]
+
+            assert names() == ["b.txt", "a.txt", "c.txt"]
+
+            await pilot.press("s")
+            assert names() == ["b.txt", "c.txt", "a.txt"]
+            assert screen.sort == ("size", True)
+
+            await pilot.press("s")
+            assert names() == ["a.txt", "c.txt", "b.txt"]
+
+            await pilot.press("n")
+            assert names() == ["a.txt", "b.txt", "c.txt"]
+            assert screen.sort == ("name", False)
+
+            with patch.object(
+                fs, "sorted_children", wraps=fs.sorted_children
+            ) as sorted_children:
+                await pilot.press("m")
+                await pilot.press("n")
+                await pilot.press("m")
+
+            assert names() == ["b.txt", "c.txt", "a.txt"]
+            sorted_children.assert_called_once_with("", "mtime", True)
+
+
+@pytest.fixture
+def search_fs():
+    """Fixture for a FileSystem holding a few log files."""
+    fs = FileSystem()
+    fs.add_entries(
+        [
+            ("logs", 0, 1, "drwxr-xr-x", "root", "root", True),
+            ("logs/app.log", 10, 1, "-rw-r--r--", "app", "app", False),
+            ("logs/db.log", 20, 1, "-rw-r--r--", "db", "db", False),
+            ("core.1", 30, 1, "-rw-r--r--", "root", "root", False),
+        ]
+    )
+    return fs.compute_directory_sizes()
+
+
+async def open_search(pilot, mock_manager):
+    screen = VolumeBrowserScreen(mock_manager, "test_volume")
+    await pilot.app.push_screen(screen)
+    await wait_for_workers(pilot)
+    await pilot.press("slash")
+    await pilot.pause()
+    return screen, pilot.app.screen
+
+
+@pytest.mark.asyncio
+async def test_search_screen_streams_matches(search_fs):
+    """
+    Test that the search screen lists the matches of the form, selecting
+    one opening its directory in the browser.
+    """
+    mock_manager = make_manager({})
+    mock_manager.get_volume_tree.return_value = search_fs
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            browser, search = await open_search(pilot, mock_manager)
+            assert isinstance(search, SearchScreen)
+
+            search.query_one("#user", Input).value = "db"
+            search.query_one("#pattern", Input).value = "*.log"
+            await pilot.press("enter")
+            await wait_for_workers(pilot)
+
+            table = search.query_one(DataTable)
+            assert table.row_count == 1
+            assert table.get_row_at(0)[0] == "logs/db.log"
+            assert str(search.query_one("#search_status").render()) == (
+                "1 matches"
+            )
+
+            table.focus()
+            await pilot.press("enter")
+            await pilot.pause()
+
+            assert pilot.app.screen is browser
+            assert browser.current_path == "logs"
+            assert browser.query_one(DataTable).cursor_row == 1
+
+
+@pytest.mark.asyncio
+async def test_search_screen_limits_results(search_fs):
+    """Test that only the first MAX_RESULTS matches are shown."""
+    mock_manager = make_manager({})
+    mock_manager.get_volume_tree.return_value = search_fs
+
+    with (
+        patch(
+            "docker_volume_analyzer.tui.VolumeManager",
+            return_value=mock_manager,
+        ),
+        patch.object(SearchScreen, "BATCH_SIZE", 1),
+        patch.object(SearchScreen, "MAX_RESULTS", 2),
+    ):
+        async with DockerTUI().run_test() as pilot:
+            _, search = await open_search(pilot, mock_manager)
+
+            search.query_one("#min_size", Input).value = "15"
+            await pilot.press("enter")
+            await wait_for_workers(pilot)
+
+            assert search.query_one(DataTable).row_count == 2
+            assert str(search.query_one("#search_status").render()) == (
+                "3 matches, the first 2 shown"
+            )
+
+
+@pytest.mark.asyncio
+async def test_search_screen_invalid_pattern(search_fs):
+    """Test that an invalid pattern is reported, and escape goes back."""
+    mock_manager = make_manager({})
+    mock_manager.get_volume_tree.return_value = search_fs
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            browser, search = await open_search(pilot, mock_manager)
+
+            search.query_one("#syntax", Select).value = "regex"
+            search.query_one("#pattern", Input).value = "("
+            await pilot.press("enter")
+            await wait_for_workers(pilot)
+
+            assert str(search.query_one("#search_status").render()).startswith(
+                "Invalid regular expression"
+            )
+
+            await pilot.press("escape")
+            await pilot.pause()
+            assert pilot.app.screen is browser
+            assert browser.current_path == ""
+
+
+@pytest.mark.asyncio
+async def test_action_report():
+    """
+    Test that the report screen shows the top groups of each table, with
+    their share of the volume size, and the report timings.
+    """
+    report = VolumeReport()
+    report.files, report.bytes = 6, 4096
+    report.extensions = {".log": (1, 1024), "": (2, 2048), ".gz": (3, 1024)}
+    report.users = {"app": (6, 4096)}
+    report.groups = {"app": (6, 4096)}
+    report.ages = {"old": (6, 4096), "new": (0, 0)}
+    report.timings = {"scan": 1.0, "report": 0.25}
+    mock_manager = make_manager({})
+    mock_manager.get_volume_report.return_value = report
+
+    with (
+        patch(
+            "docker_volume_analyzer.tui.VolumeManager",
+            return_value=mock_manager,
+        ),
+        patch.object(ReportScreen, "TOP", 2),
+    ):
+        async with DockerTUI().run_test() as pilot:
+            app = pilot.app
+            app.query_one("#volumes_table", expect_type=DataTable).add_row(
+                "volume1", "10GB", 0, "2023-01-01T00:00:00Z"
+            )
+            await pilot.press("r")
+            await wait_for_workers(pilot)
+
+            screen = app.screen
+            assert isinstance(screen, ReportScreen)
+            mock_manager.get_volume_report.assert_called_once_with(
+                "volume1", progress=ANY
+            )
+            extensions = screen.query_one("#report_extensions", DataTable)
+            assert [extensions.get_row_at(i) for i in range(3)] == [
+                ["(none)", "2", "2.0K", "50.0%"],
+                [".log", "1", "1.0K", "25.0%"],
+                ["(1 others)", "3", "1.0K", "25.0%"],
+            ]
+            ages = screen.query_one("#report_ages", DataTable)
+            assert ages.get_row_at(0)[0] == "old"
+            assert str(screen.query_one("#report_status").render()) == (
+                "6 files, 4.0K (scan 1.00s, report 0.25s)"
+            )
+
+            await pilot.press("escape")
+            assert not isinstance(app.screen, ReportScreen)
+
+
+@pytest.mark.asyncio
+async def test_report_screen_scan_cancelled():
+    """Test that a cancelled scan leaves the report empty."""
+    mock_manager = make_manager({})
+    mock_manager.get_volume_report.side_effect = ScanCancelledError()
+
+    with patch(
+        "docker_volume_analyzer.tui.VolumeManager", return_value=mock_manager
+    ):
+        async with DockerTUI().run_test() as pilot:
+            screen = ReportScreen(mock_manager, "volume1")
+            await pilot.app.push_screen(screen)
+            await wait_for_workers(pilot)
+
+            assert screen.query_one("#report_users", DataTable).row_count == 0
+            assert str(screen.query_one("#report_status").render()) == (
+                "Scanning volume..."
+            )
@@ -0,0 +1,23 @@
+import pytest
+
+from docker_volume_analyzer.units import format_size
+
+
+@pytest.mark.parametrize(
+    "num_bytes, expected",
+    [
+        (0, "0"),
+        (1023, "1023"),
+        (1024, "1.0K"),
+        (1500, "1.5K"),
+        (10239, "10K"),
+        (1024**2 - 1, "1.0M"),
+        (10 * 1024**2, "10M"),
+        (1300000000, "1.3G"),
+        (5 * 1024**6, "5.0E"),
+        (2000 * 1024**6, "2000E"),
+    ],
+)
+def test_format_size(num_bytes, expected):
+    """Test that sizes are formatted like 'du -h'."""
+    assert format_size(num_bytes) == expected
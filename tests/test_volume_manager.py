@@ -1,8 +1,15 @@
 import random
+import threading
+import time
 from typing import List
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
-from docker_volume_analyzer.filesystem import FileSystem
+import pytest
+
+from docker_volume_analyzer.docker_client import DockerClient
+from docker_volume_analyzer.errors import ScanCancelledError
+from docker_volume_analyzer.filesystem import FileSystem, add_directory_totals
+from docker_volume_analyzer.scan_backends import HelperContainerBackend
 from docker_volume_analyzer.volume_manager import VolumeManager
 
 
@@ -17,14 +24,10 @@ def make_mock_volume(name: str, mountpoint: str, created_at: str) -> MagicMock:
     return volume
 
 
-def make_mock_container_with_mounts(
+def make_container_summary(
     short_id: str, name: str, mounts: List[dict]
-) -> MagicMock:
-    container = MagicMock()
-    container.short_id = short_id
-    container.name = name
-    container.attrs = {"Mounts": mounts}
-    return container
+) -> dict:
+    return {"Id": short_id, "Names": [f"/{name}"], "Mounts": mounts}
 
 
 def generate_test_data(num_volumes: int, max_containers_per_volume: int):
@@ -50,15 +53,14 @@ def generate_test_data(num_volumes: int, max_containers_per_volume: int):
             cont_name = f"container{i}_{j}"
             short_id = f"{i:02d}{j:02d}"
             mount = {
+                "Type": "volume",
                 "Name": vol_name,
                 "Destination": mountpoint,
                 "Driver": "local",
                 "Mode": "rw",
                 "RW": True,
             }
-            container = make_mock_container_with_mounts(
-                short_id, cont_name, [mount]
-            )
+            container = make_container_summary(short_id, cont_name, [mount])
             containers.append(container)
 
             volume_containers.append(
@@ -69,6 +71,7 @@ def generate_test_data(num_volumes: int, max_containers_per_volume: int):
                     "driver": "local",
                     "mode": "rw",
                     "rw": True,
+                    "running": False,
                 }
             )
 
@@ -97,7 +100,10 @@ def test_get_volumes() -> None:
     # Configurer le client mocké
     mock_client = MagicMock()
     mock_client.list_volumes.return_value = volumes
-    mock_client.list_containers.return_value = containers
+    docker_client = DockerClient()
+    docker_client.client = MagicMock()
+    docker_client.client.api.containers.return_value = containers
+    mock_client.get_mounts_index.side_effect = docker_client.get_mounts_index
     mock_client.get_volumes_size.side_effect = lambda *args: {
         name: expected_sizes[name] for name in args[0]
     }
@@ -109,6 +115,50 @@ def test_get_volumes() -> None:
 
     assert result == expected
     assert volume_manager.get_volumes() == expected
+    docker_client.client.containers.get.assert_not_called()
+
+
+def test_list_volumes() -> None:
+    volume = MagicMock(attrs={"Mountpoint": "/mnt", "CreatedAt": "now"})
+    volume.name = "volume1"
+    mock_client = MagicMock()
+    mock_client.list_volumes.return_value = [volume]
+
+    volume_manager = VolumeManager()
+    volume_manager.client = mock_client
+
+    assert volume_manager.list_volumes() == {
+        "volume1": {
+            "name": "volume1",
+            "mountpoint": "/mnt",
+            "size": None,
+            "created_at": "now",
+            "containers": [],
+        }
+    }
+    mock_client.get_volumes_size.assert_not_called()
+
+
+def test_iter_volumes_size() -> None:
+    mock_client = MagicMock()
+    mock_client.iter_volumes_size.return_value = iter([{"volume1": "1K"}])
+
+    volume_manager = VolumeManager()
+    volume_manager.client = mock_client
+
+    assert list(volume_manager.iter_volumes_size(["volume1"], False)) == [
+        {"volume1": "1K"}
+    ]
+    mock_client.iter_volumes_size.assert_called_once_with(["volume1"], False)
+
+
+def test_watch_events() -> None:
+    mock_client = MagicMock()
+
+    volume_manager = VolumeManager(docker_client=mock_client)
+    volume_manager.watch_events()
+
+    mock_client.start_event_watcher.assert_called_once_with()
 
 
 def test_delete_volume_success() -> None:
@@ -141,65 +191,50 @@ def test_delete_volume_failure() -> None:
 def test_get_volume_tree_success() -> None:
     volume_name = "test_volume"
     mock_find_output = [
-        {"path": "/file1.txt", "size": 100},
-        {"path": "/dir1/file2.txt", "size": 200},
-        {"path": "/dir1/file3.txt", "size": 300},
-        {"path": "/dir2/file4.txt", "size": 400},
+        "directory|/mnt/test_volume|4096|drwxr-xr-x|root|root|1633024800",
+        "file|/mnt/test_volume/file1.txt|100|-rw-r--r--|root|root|1633024800",
+        "directory|/mnt/test_volume/dir1|0|drwxr-xr-x|root|root|1633024800",
+        "file|/mnt/test_volume/dir1/file2.txt|200"
+        "|-rw-r--r--|root|root|1633024800",
+        "file|/mnt/test_volume/dir1/file3.txt|300"
+        "|-rw-r--r--|root|root|1633024800",
+        "file|/mnt/test_volume/dir2/file4.txt|400"
+        "|-rw-r--r--|root|root|1633024800",
     ]
-    expected_tree = {
-        "name": "/",
-        "size": 1000,
-        "childrens": [
-            {"name": "file1.txt", "size": 100, "childrens": []},
-            {
-                "name": "dir1",
-                "size": 500,
-                "childrens": [
-                    {"name": "file2.txt", "size": 200, "childrens": []},
-                    {"name": "file3.txt", "size": 300, "childrens": []},
-                ],
-            },
-            {
-                "name": "dir2",
-                "size": 400,
-                "childrens": [
-                    {"name": "file4.txt", "size": 400, "childrens": []},
-                ],
-            },
-        ],
-    }
 
     mock_client = MagicMock()
-    (mock_client.get_directory_informations_with_find).return_value = (
+    mock_client.stream_directory_informations_with_find.return_value = iter(
         mock_find_output
     )
-
-    mock_parse_find_output = MagicMock()
-    (
-        mock_parse_find_output.return_value.compute_directory_sizes
-    ).return_value = expected_tree
+    mock_client.fs_factory = FileSystem
+    mock_client.parse_workers = None
+    mock_client.parallel_parse_threshold = None
+    mock_client.backend_for.return_value = HelperContainerBackend(mock_client)
 
     volume_manager = VolumeManager()
     volume_manager.client = mock_client
 
-    with patch(
-        "docker_volume_analyzer.volume_manager.parse_find_output",
-        mock_parse_find_output,
-    ):
-        assert volume_manager.get_volume_tree(volume_name) == expected_tree
-        (
-            mock_client.get_directory_informations_with_find
-        ).assert_called_once_with(volume_name, directory=None)
-        mock_parse_find_output.assert_called_once_with(
-            mock_find_output, f"/mnt/{volume_name}"
-        )
+    tree = volume_manager.get_volume_tree(volume_name)
+
+    assert isinstance(tree, FileSystem)
+    assert tree.index["dir1"].size == 500
+    assert tree.index["dir2"].size == 400
+    assert tree.index[""].size == 1000
+    assert set(tree.index["dir1"].childrens) == {"file2.txt", "file3.txt"}
+    (
+        mock_client.stream_directory_informations_with_find
+    ).assert_called_once_with(volume_name, directory=None)
 
 
 def test_get_volume_tree_empty() -> None:
     volume_name = "empty_volume"
 
     mock_client = MagicMock()
-    mock_client.get_directory_informations_with_find.return_value = []
+    mock_client.stream_directory_informations_with_find.return_value = iter([])
+    mock_client.fs_factory = FileSystem
+    mock_client.parse_workers = None
+    mock_client.parallel_parse_threshold = None
+    mock_client.backend_for.return_value = HelperContainerBackend(mock_client)
 
     volume_manager = VolumeManager()
     volume_manager.client = mock_client
@@ -209,9 +244,9 @@ def test_get_volume_tree_empty() -> None:
     assert isinstance(result, FileSystem)
     assert len(result.index) == 1
     assert result.index[""].size == 0
-    mock_client.get_directory_informations_with_find.assert_called_once_with(
-        volume_name, directory=None
-    )
+    (
+        mock_client.stream_directory_informations_with_find
+    ).assert_called_once_with(volume_name, directory=None)
 
 
 def test_delete_volume_file_success() -> None:
@@ -244,3 +279,158 @@ def test_delete_volume_file_failure() -> None:
     mock_client.delete_volume_file.assert_called_once_with(
         volume_name, file_path
     )
+
+
+def test_get_lazy_volume_tree() -> None:
+    """Test that directories are listed once, when they are loaded."""
+    backend = MagicMock()
+
+    def get_directory_level(volume_name, directory, fs):
+        path = f"{directory}/sub" if directory else "sub"
+        fs.add_entry(path, 10, 0, "drwxr-xr-x", "root", "root", True)
+        return fs
+
+    backend.get_directory_level.side_effect = get_directory_level
+    mock_client = MagicMock()
+    mock_client.backend_for.return_value = backend
+    volume_manager = VolumeManager(mock_client)
+
+    tree = volume_manager.get_lazy_volume_tree("volume1")
+
+    assert set(tree.fs.index) == {"", "sub"}
+    assert tree.load("sub") is tree.fs.index["sub"]
+    assert tree.load("sub") is tree.fs.index["sub"]
+    assert set(tree.fs.index) == {"", "sub", "sub/sub"}
+    assert backend.get_directory_level.call_count == 2
+    backend.get_directory_level.assert_called_with("volume1", "sub", tree.fs)
+
+
+def test_get_volume_tree_coalesces_concurrent_scans() -> None:
+    """
+    Test that concurrent callers share the scan of a volume, even from
+    different managers of the same client.
+    """
+    mock_client = MagicMock()
+    backend = mock_client.backend_for.return_value
+    started = threading.Event()
+    release = threading.Event()
+
+    def get_volume_tree(volume_name, directory, progress):
+        started.set()
+        release.wait(5)
+        return FileSystem()
+
+    backend.get_volume_tree.side_effect = get_volume_tree
+    trees = []
+    callers = [
+        threading.Thread(
+            target=lambda: trees.append(
+                VolumeManager(mock_client).get_volume_tree("volume1")
+            )
+        )
+        for _ in range(2)
+    ]
+    callers[0].start()
+    started.wait(5)
+    callers[1].start()
+    time.sleep(0.1)
+    release.set()
+    for caller in callers:
+        caller.join(5)
+
+    assert len(trees) == 2
+    assert trees[0] is trees[1]
+    backend.get_volume_tree.assert_called_once()
+
+
+def test_get_volume_tree_after_cancelled_scan() -> None:
+    """
+    Test that a caller waiting for a scan cancelled by its own caller
+    scans the volume itself.
+    """
+    mock_client = MagicMock()
+    backend = mock_client.backend_for.return_value
+    backend.get_volume_tree.return_value = FileSystem()
+    flights = VolumeManager._tree_flights
+    future, _ = flights.begin((mock_client, "volume1"))
+    waiter = threading.Thread(
+        target=lambda: VolumeManager(mock_client).get_volume_tree("volume1")
+    )
+    waiter.start()
+    time.sleep(0.1)
+    flights.finish((mock_client, "volume1"), error=ScanCancelledError())
+    waiter.join(5)
+
+    assert not waiter.is_alive()
+    backend.get_volume_tree.assert_called_once()
+
+
+def test_get_volume_tree_cancelled() -> None:
+    """Test that a caller cancelling its own scan gets the error."""
+    mock_client = MagicMock()
+    backend = mock_client.backend_for.return_value
+    backend.get_volume_tree.side_effect = ScanCancelledError()
+
+    with pytest.raises(ScanCancelledError):
+        VolumeManager(mock_client).get_volume_tree("volume1")
+
+
+def test_get_directory_totals() -> None:
+    """Test that directory totals are measured by the volume backend."""
+    mock_client = MagicMock()
+    backend = mock_client.backend_for.return_value
+    volume_manager = VolumeManager(mock_client)
+
+    fs = volume_manager.get_directory_totals("volume1", 3, "dir")
+
+    assert fs is backend.get_directory_totals.return_value
+    backend.get_directory_totals.assert_called_once_with(
+        "volume1", 3, directory="dir"
+    )
+
+
+def test_get_volume_report() -> None:
+    """Test that the report of a volume is built from its scanned tree."""
+    mock_client = MagicMock()
+    backend = mock_client.backend_for.return_value
+    fs = FileSystem()
+    fs.add_entries([("a.log", 10, 1, "-rw-r--r--", "app", "app", False)])
+    backend.get_volume_tree.return_value = fs
+    volume_manager = VolumeManager(mock_client)
+    progress = MagicMock()
+
+    report = volume_manager.get_volume_report("volume1", progress=progress)
+
+    assert report.extensions == {".log": (1, 10)}
+    assert set(report.timings) == {"scan", "report"}
+    backend.get_volume_tree.assert_called_once_with(
+        "volume1", directory=None, progress=progress
+    )
+
+
+def test_get_lazy_volume_tree_of_totals() -> None:
+    """
+    Test that only the directories of the last level of totals are
+    fetched again when they are loaded.
+    """
+    backend = MagicMock()
+
+    def get_directory_totals(volume_name, max_depth, directory, fs):
+        base = f"{directory}/" if directory else ""
+        return add_directory_totals({f"{base}a": 2, f"{base}a/b": 1}, fs)
+
+    backend.get_directory_totals.side_effect = get_directory_totals
+    mock_client = MagicMock()
+    mock_client.backend_for.return_value = backend
+    volume_manager = VolumeManager(mock_client)
+
+    tree = volume_manager.get_lazy_volume_tree("volume1", totals_depth=2)
+    tree.load("a")
+    tree.load("a/b")
+
+    assert tree.loaded == {"", "a", "a/b", "a/b/a"}
+    assert "a/b/a/b" in tree.fs.index
+    assert backend.get_directory_totals.call_count == 2
+    backend.get_directory_totals.assert_called_with(
+        "volume1", 2, "a/b", tree.fs
+    )
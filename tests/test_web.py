@@ -1,7 +1,10 @@
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from docker_volume_analyzer import web
 from docker_volume_analyzer.web import app
 
 
@@ -12,25 +15,77 @@ def client():
         yield client
 
 
-@patch("docker_volume_analyzer.web.VolumeManager")
-def test_metrics_endpoint(mock_volume_manager, client):
+@pytest.fixture
+def refresher():
     """
-    Test the /metrics endpoint to ensure it returns Prometheus metrics.
+    Fixture for the refresher of the app, measuring the volumes of a mock
+    VolumeManager, without starting it.
     """
-    mock_volume_manager_instance = MagicMock()
-    mock_volume_manager.return_value = mock_volume_manager_instance
-    mock_volume_manager_instance.get_volumes.return_value = {
-        "volume1": {"size": 1024},
-        "volume2": {"size": 2048},
+    volume_manager = MagicMock()
+    volume_manager.list_volumes.return_value = {
+        "volume1": {},
+        "volume2": {},
+        "volume3": {},
     }
+    volume_manager.get_volumes_size.return_value = {
+        "volume1": 1024,
+        "volume2": 2048,
+        "volume3": None,
+    }
+    with (
+        patch.object(web.refresher, "volume_manager", volume_manager),
+        patch.object(web.refresher, "_snapshot", None),
+        patch.object(web.refresher, "start") as start,
+    ):
+        web.refresher.start_mock = start
+        yield web.refresher
+    del web.refresher.start_mock
+
+
+def test_metrics_endpoint(refresher, client):
+    """
+    Test the /metrics endpoint to ensure it returns Prometheus metrics
+    from the latest snapshot, without measuring volumes.
+    """
+    refresher.refresh()
+    refresher.volume_manager.reset_mock()
 
     response = client.get("/metrics")
 
     assert response.status_code == 200
 
-    assert b"docker_volumes_total 2" in response.data
+    assert b"docker_volumes_total 3" in response.data
     assert b'docker_volume_size_bytes{name="volume1"} 1024.0' in response.data
     assert b'docker_volume_size_bytes{name="volume2"} 2048.0' in response.data
+    assert b'docker_volume_size_bytes{name="volume3"}' not in response.data
+    assert b"docker_volume_analyzer_snapshot_age_seconds " in response.data
+    assert refresher.volume_manager.method_calls == []
+    refresher.start_mock.assert_called_once_with()
+
+
+def test_metrics_endpoint_removed_volume(refresher, client):
+    """
+    Test that the series of a removed volume are no longer exported.
+    """
+    refresher.refresh()
+    assert b'name="volume2"' in client.get("/metrics").data
+
+    del refresher.volume_manager.list_volumes.return_value["volume2"]
+    refresher.refresh()
+    response = client.get("/metrics")
+
+    assert b"docker_volumes_total 2" in response.data
+    assert b'name="volume2"' not in response.data
+
+
+def test_metrics_endpoint_before_first_snapshot(refresher, client):
+    """
+    Test that /metrics is unavailable until the volumes are measured.
+    """
+    response = client.get("/metrics")
+
+    assert response.status_code == 503
+    refresher.start_mock.assert_called_once_with()
 
 
 def test_index_endpoint(client):
@@ -42,3 +97,94 @@ def test_index_endpoint(client):
     assert response.status_code == 200
 
     assert b"Docker Volume Analyzer Metrics Endpoint" in response.data
+
+
+@pytest.fixture
+def report_jobs(tmp_path):
+    """
+    Fixture keeping the reports of the app in a temporary directory, until
+    the reports computed in the background are written.
+    """
+    with patch.object(web.report_jobs, "directory", str(tmp_path)):
+        yield web.report_jobs
+        for thread in threading.enumerate():
+            if thread.name.startswith("volume-report-"):
+                thread.join(5)
+
+
+def wait_for_report(client, path, timeout=5):
+    """Polls a report endpoint until the report is no longer pending."""
+    deadline = time.monotonic() + timeout
+    response = client.get(path)
+    while response.status_code == 202 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        response = client.get(path)
+    return response
+
+
+@patch("docker_volume_analyzer.web.VolumeManager")
+def test_volume_report_endpoint(mock_volume_manager, client, report_jobs):
+    """
+    Test the /volumes/<name>/report endpoint to ensure it answers 202
+    while the report is computed, then returns the report as JSON.
+    """
+    computed = threading.Event()
+    manager = mock_volume_manager.return_value
+    manager.list_volumes.return_value = {"volume1": {}}
+    manager.get_volume_report.side_effect = lambda name: (
+        computed.wait(5),
+        MagicMock(**{"to_dict.return_value": {"files": 1}}),
+    )[1]
+
+    response = client.get("/volumes/volume1/report")
+
+    assert response.status_code == 202
+    assert response.get_json() == {"status": "pending"}
+    assert response.headers["Retry-After"] == "5"
+
+    computed.set()
+    response = wait_for_report(client, "/volumes/volume1/report")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"files": 1}
+    manager.get_volume_report.assert_called_once_with("volume1")
+
+
+@patch("docker_volume_analyzer.web.VolumeManager")
+def test_volume_report_endpoint_failure(
+    mock_volume_manager, client, report_jobs
+):
+    """
+    Test that a failed report is a 500 with the error, and is computed
+    again by the next request.
+    """
+    manager = mock_volume_manager.return_value
+    manager.list_volumes.return_value = {"volume1": {}}
+    manager.get_volume_report.side_effect = RuntimeError("scan failed")
+
+    response = wait_for_report(client, "/volumes/volume1/report")
+
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "scan failed"}
+
+    response = client.get("/volumes/volume1/report")
+
+    assert response.status_code == 202
+
+
+@patch("docker_volume_analyzer.web.VolumeManager")
+def test_volume_report_endpoint_not_found(
+    mock_volume_manager, client, report_jobs
+):
+    """
+    Test that the report of a missing volume is a 404, without scanning
+    (and creating) it.
+    """
+    manager = mock_volume_manager.return_value
+    manager.list_volumes.return_value = {}
+
+    response = client.get("/volumes/missing/report")
+
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Volume 'missing' not found."}
+    manager.get_volume_report.assert_not_called()